@@ -1,8 +1,9 @@
 import os
-import whisper
 from moviepy import VideoFileClip
 from scoring_engine import ScoringEngine
-from rubric_parser import RubricParser
+from model_registry import acquire_whisper, acquire_rubric_parser
+from model_server import RemoteWhisper
+from tracing import tracer, span, traced
 import json
 
 class Agent:
@@ -12,10 +13,15 @@ class Agent:
     def log(self, message):
         print(f"[{self.name}] {message}")
 
+    def close(self):
+        """Release shared models held by this agent"""
+        pass
+
 class VideoProcessorAgent(Agent):
     def __init__(self):
         super().__init__("VideoProcessor")
 
+    @traced("VideoProcessorAgent.extract_audio")
     def extract_audio(self, video_path, output_audio_path="temp_audio.mp3"):
         self.log(f"Processing video: {video_path}")
         try:
@@ -34,26 +40,153 @@ class VideoProcessorAgent(Agent):
             raise
 
 class TranscriptionAgent(Agent):
-    def __init__(self, model_size="base"):
+    def __init__(self, model_size="base", model_socket=None):
         super().__init__("Transcriber")
+        model_socket = model_socket or os.environ.get("SCORING_MODEL_SOCKET")
+        if model_socket:
+            self.log(f"Using model server at {model_socket} (whisper {model_size})")
+            self._model_handle = None
+            self.model = RemoteWhisper(model_size, model_socket)
+            return
         self.log(f"Loading Whisper model ({model_size})...")
-        self.model = whisper.load_model(model_size)
+        with span("TranscriptionAgent.load_model", category="model", model=f"whisper-{model_size}"):
+            self._model_handle = acquire_whisper(model_size)
+        self.model = self._model_handle.value
         self.log("Model loaded.")
 
+    def close(self):
+        if self._model_handle is not None:
+            self._model_handle.release()
+
+    @traced("TranscriptionAgent.transcribe")
     def transcribe(self, audio_path):
         self.log(f"Transcribing audio: {audio_path}")
-        result = self.model.transcribe(audio_path)
+        if self._model_handle is None:
+            result = self.model.transcribe(audio_path)
+        else:
+            # Whisper's decoder is not safe to share between threads
+            with self._model_handle.lock:
+                result = self.model.transcribe(audio_path)
         transcript = result["text"]
         self.log("Transcription complete.")
         return transcript
 
+class TieredTranscriptionAgent(Agent):
+    """
+    Draft-then-refine transcription: every video is transcribed with a small
+    Whisper model and scored; only when a score-sensitive metric sits within
+    a margin of a rubric band edge is it retranscribed with the larger model.
+    With keyword_check (off by default), a concept matched by a single keyword also
+    triggers a refine; most introductions have one, so it refines nearly every video.
+    """
+    # Metric name -> (result field, default margin)
+    SENSITIVE_METRICS = {
+        "Words Per Minute": ("wpm", 5.0),
+        "Filler Word Rate": ("filler_rate", 0.5),
+        "Vocabulary Richness": ("ttr", 0.02),
+    }
+
+    def __init__(self, scoring_agent, draft_model="tiny", refine_model="base", margins=None, keyword_check=False):
+        super().__init__("TieredTranscriber")
+        self.scoring_agent = scoring_agent
+        self.draft_model = draft_model
+        self.refine_model = refine_model
+        self.margins = {name: default for name, (_, default) in self.SENSITIVE_METRICS.items()}
+        self.margins.update(margins or {})
+        self.keyword_check = keyword_check
+        self._transcribers = {}
+        self.tier_counts = {"draft": 0, "refined": 0}
+        self.last_tier = None
+        self.last_sensitive = []
+        # Scores of a draft transcript that was kept, so they need not be computed again
+        self.last_results = None
+
+    def _transcriber(self, model_size):
+        # Whisper models are loaded on first use, so the refine model costs nothing until needed
+        if model_size not in self._transcribers:
+            self._transcribers[model_size] = TranscriptionAgent(model_size)
+        return self._transcribers[model_size]
+
+    def close(self):
+        for transcriber in self._transcribers.values():
+            transcriber.close()
+
+    @staticmethod
+    def band_edges(metric):
+        """Interior boundaries of a metric's scoring ranges"""
+        bounds = set()
+        for range_data in metric.get("scoring", []):
+            bounds.update(range_data.get("range", []))
+        if len(bounds) < 2:
+            return []
+        ordered = sorted(bounds)
+        return ordered[1:-1]
+
+    def find_sensitive_metrics(self, results):
+        """Metrics whose draft value could plausibly flip band under a better transcript"""
+        rubric_metrics = {
+            metric["name"]: metric
+            for criterion in self.scoring_agent.rubrics["criteria"]
+            for metric in criterion["metrics"]
+        }
+        sensitive = []
+        for criterion in results["criteria_scores"]:
+            for metric_result in criterion["metrics"]:
+                name = metric_result["metric"]
+                if name in self.SENSITIVE_METRICS:
+                    field = self.SENSITIVE_METRICS[name][0]
+                    value = metric_result.get(field)
+                    margin = self.margins.get(name)
+                    if value is None or not margin:
+                        continue
+                    edges = self.band_edges(rubric_metrics.get(name, {}))
+                    if any(abs(value - edge) <= margin for edge in edges):
+                        sensitive.append(name)
+                elif name == "Keyword Presence" and self.keyword_check:
+                    # A concept hit by a single keyword can vanish (or appear) with one misheard word
+                    for concept in metric_result["keywords_found"].values():
+                        if concept["found"] and len(concept.get("keywords", [])) == 1:
+                            sensitive.append(name)
+                            break
+        return sensitive
+
+    @traced("TieredTranscriptionAgent.transcribe")
+    def transcribe(self, audio_path, duration):
+        """
+        Returns the final transcript; the tier used is kept in last_tier and, for
+        a draft transcript, its scores in last_results
+        """
+        transcript = self._transcriber(self.draft_model).transcribe(audio_path)
+        draft_results = self.scoring_agent.score_transcript(transcript, duration)
+        self.last_sensitive = self.find_sensitive_metrics(draft_results)
+
+        if self.last_sensitive:
+            self.log(f"Near band edge ({', '.join(self.last_sensitive)}), refining with '{self.refine_model}'...")
+            transcript = self._transcriber(self.refine_model).transcribe(audio_path)
+            self.last_tier = "refined"
+            self.last_results = None
+        else:
+            self.log(f"Draft transcript from '{self.draft_model}' is stable, skipping refinement.")
+            self.last_tier = "draft"
+            self.last_results = draft_results
+
+        self.tier_counts[self.last_tier] += 1
+        return transcript
+
 class ScoringAgent(Agent):
     def __init__(self):
         super().__init__("Scorer")
-        self.parser = RubricParser()
-        self.rubrics = self.parser.get_rubrics()
+        with span("ScoringAgent.load_rubrics"):
+            self._parser_handle = acquire_rubric_parser()
+            self.parser = self._parser_handle.value
+            self.rubrics = self.parser.get_rubrics()
         self.engine = ScoringEngine(self.rubrics)
 
+    def close(self):
+        self.engine.close()
+        self._parser_handle.release()
+
+    @traced("ScoringAgent.score_transcript")
     def score_transcript(self, transcript, duration):
         self.log("Scoring transcript based on rubrics...")
         results = self.engine.calculate_score(transcript, duration_seconds=duration)
@@ -64,7 +197,8 @@ class ReportingAgent(Agent):
     def __init__(self):
         super().__init__("Reporter")
 
-    def generate_report(self, results, transcript):
+    @traced("ReportingAgent.generate_report")
+    def generate_report(self, results, transcript, output_path="analysis_report.txt"):
         self.log("Generating final report...")
         
         report = []
@@ -91,8 +225,29 @@ class ReportingAgent(Agent):
         print(final_report)
         
         # Save to file
-        with open("analysis_report.txt", "w", encoding="utf-8") as f:
+        with open(output_path, "w", encoding="utf-8") as f:
             f.write(final_report)
         
-        self.log("Report saved to analysis_report.txt")
+        self.log(f"Report saved to {output_path}")
+
+        # Timing summary of this job's spans so far (this report's own span is still open)
+        trace_path = os.path.splitext(output_path)[0] + "_trace.json"
+        tracer.export_chrome_trace(trace_path, tracer.current_trace())
+        self.log(f"Stage timings:\n{tracer.format_summary(tracer.current_trace())}")
+        self.log(f"Chrome trace saved to {trace_path} (open in chrome://tracing or Perfetto)")
+        return final_report
+
+    @traced("ReportingAgent.generate_cohort_report")
+    def generate_cohort_report(self, aggregate, output_path="cohort_report.txt"):
+        """Summary over many videos from a CohortAggregate; its mergeable state is saved next to the report"""
+        self.log(f"Generating cohort report over {aggregate.count} results...")
+        final_report = aggregate.format_report()
+        print(final_report)
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(final_report)
+        state_path = os.path.splitext(output_path)[0] + ".json"
+        aggregate.save(state_path)
+
+        self.log(f"Cohort report saved to {output_path} (mergeable aggregate: {state_path})")
         return final_report
@@ -0,0 +1,51 @@
+"""
+Analysis Context - Per-transcript state shared by all metrics of one scoring call
+
+The sentences of a transcript are split once and, the first time a semantic
+metric asks for them, encoded in a single batch into an L2-normalized float32
+matrix. Salutation, Flow and Keyword Presence then compare rows of that matrix
+against prototype matrices built when the engine was created, so a transcript
+costs at most one encode call however many semantic checks run on it.
+"""
+import time
+import numpy as np
+from tracing import span
+from semantic_keywords import normalize_rows, split_sentences
+
+
+class AnalysisContext:
+    """Lazily split sentences and their cached embedding matrix for one transcript"""
+
+    def __init__(self, transcript, model, sentences=None, embeddings=None):
+        self.transcript = transcript
+        self.model = model
+        self._sentences = sentences
+        self._embeddings = None if embeddings is None else normalize_rows(embeddings)
+        self.encode_calls = 0
+        self.encode_ms = 0.0
+
+    @property
+    def sentences(self):
+        if self._sentences is None:
+            self._sentences = split_sentences(self.transcript)
+        return self._sentences
+
+    @property
+    def encoded(self):
+        """Whether embeddings are available without an encode call"""
+        return self._embeddings is not None
+
+    @property
+    def embeddings(self):
+        """(sentences x dim) normalized float32 matrix, encoded on first access only"""
+        if self._embeddings is None:
+            sentences = self.sentences
+            if sentences:
+                started = time.perf_counter()
+                with span("ScoringEngine.encode", category="model", sentences=len(sentences)):
+                    self._embeddings = normalize_rows(self.model.encode(sentences))
+                self.encode_ms += (time.perf_counter() - started) * 1000
+                self.encode_calls += 1
+            else:
+                self._embeddings = np.zeros((0, 1), dtype=np.float32)
+        return self._embeddings
@@ -0,0 +1,132 @@
+"""
+Artifact Store - Persists per-stage pipeline outputs so interrupted runs can resume
+"""
+import os
+import json
+import hashlib
+import shutil
+import time
+
+# Pipeline stages in execution order
+STAGES = ["extract", "transcribe", "score", "report"]
+
+
+class ArtifactStore:
+    """
+    One directory per job holding each completed stage's output plus a
+    manifest.json that records which stages finished. A job is keyed by the
+    video's absolute path, size and modification time, so re-running the same
+    file resumes, while a replaced file starts a fresh job.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, video_path, root_dir="artifacts"):
+        self.video_path = os.path.abspath(video_path)
+        self.job_id = self.make_job_id(self.video_path)
+        self.job_dir = os.path.join(root_dir, self.job_id)
+        os.makedirs(self.job_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.job_dir, self.MANIFEST)
+        self.manifest = self._load_manifest()
+
+    @staticmethod
+    def make_job_id(video_path):
+        """Stable job id from path, size and mtime of the video"""
+        stat = os.stat(video_path)
+        key = f"{os.path.abspath(video_path)}|{stat.st_size}|{int(stat.st_mtime)}"
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        return f"{name}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                # A torn manifest means nothing after it can be trusted
+                pass
+        return {
+            "job_id": self.job_id,
+            "video_path": self.video_path,
+            "status": "pending",
+            "stages": {},
+        }
+
+    def _write_atomic(self, path, data, mode="w"):
+        tmp_path = path + ".tmp"
+        encoding = None if "b" in mode else "utf-8"
+        with open(tmp_path, mode, encoding=encoding) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _save_manifest(self):
+        self._write_atomic(self.manifest_path, json.dumps(self.manifest, indent=2))
+
+    def path(self, filename):
+        """Absolute path of a file inside the job directory"""
+        return os.path.join(self.job_dir, filename)
+
+    def is_done(self, stage):
+        """True if the stage completed and all of its files are still on disk"""
+        entry = self.manifest["stages"].get(stage)
+        if not entry or entry.get("status") != "done":
+            return False
+        return all(os.path.exists(self.path(f)) for f in entry.get("files", []))
+
+    def load(self, stage):
+        """Return the metadata recorded for a completed stage"""
+        return self.manifest["stages"][stage]["data"]
+
+    def read_text(self, filename):
+        with open(self.path(filename), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def read_json(self, filename):
+        with open(self.path(filename), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_text(self, filename, text):
+        self._write_atomic(self.path(filename), text)
+
+    def write_json(self, filename, obj):
+        self._write_atomic(self.path(filename), json.dumps(obj, indent=2, ensure_ascii=False))
+
+    def complete(self, stage, data=None, files=None):
+        """Mark a stage as done; later stages are invalidated since their inputs changed"""
+        later = STAGES[STAGES.index(stage) + 1:]
+        for name in later:
+            self.manifest["stages"].pop(name, None)
+        self.manifest["stages"][stage] = {
+            "status": "done",
+            "finished_at": time.time(),
+            "data": data or {},
+            "files": files or [],
+        }
+        self.manifest["status"] = "complete" if stage == STAGES[-1] else "running"
+        self.manifest.pop("error", None)
+        self._save_manifest()
+
+    def fail(self, stage, error):
+        """Record the stage that failed so a rerun knows where to resume"""
+        self.manifest["status"] = "failed"
+        self.manifest["error"] = {"stage": stage, "message": str(error), "at": time.time()}
+        self._save_manifest()
+
+    def next_stage(self):
+        """
+        Stage after the last completed one, or None if the job is complete.
+        Earlier artifacts (e.g. the extracted audio) may have been cleaned up
+        once a later stage superseded them.
+        """
+        for index in range(len(STAGES) - 1, -1, -1):
+            if self.is_done(STAGES[index]):
+                return STAGES[index + 1] if index + 1 < len(STAGES) else None
+        return STAGES[0]
+
+    def reset(self):
+        """Throw away all artifacts for this job"""
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+        os.makedirs(self.job_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
@@ -0,0 +1,382 @@
+"""
+Cohort Report - Streaming, mergeable aggregates over many scoring results
+
+A CohortAggregate consumes results one at a time and keeps only fixed-size
+state, whatever the number of results:
+
+    overall / per criterion   count, mean, variance, min, max (Welford, merged with Chan's formula)
+    overall                   KLL quantile sketch of the score (about 1% rank error at k=200)
+    per measured metric       KLL quantile sketch of the raw value: WPM, TTR, filler rate,
+                              sentiment, grammar errors per 100 words (METRIC_VALUE_FIELDS)
+    per metric                band occupancy: how many results were awarded each band score
+
+Aggregates built by parallel workers merge exactly for counts, means and
+variances, and within the sketch error for quantiles. They are saved as JSON,
+so bulk runs can write partial aggregates and a final step can merge them:
+
+    python excel_bulk.py part1.xlsx out1.xlsx --aggregate part1.json
+    python cohort_report.py part1.json part2.json --output cohort.json --report cohort_report.txt
+"""
+import json
+import math
+import random
+import argparse
+
+REPORT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# Raw value behind each measured metric; its band scores are few and counted exactly in `bands`
+METRIC_VALUE_FIELDS = {
+    "Words Per Minute": "wpm",
+    "Grammar Score": "errors_per_100",
+    "Vocabulary Richness": "ttr",
+    "Filler Word Rate": "filler_rate",
+    "Sentiment/Positivity": "sentiment_score",
+}
+
+
+class RunningStats:
+    """Count, mean, variance, min and max in O(1) memory"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (0 for fewer than two values)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        if stats.count:
+            stats.min = data["min"]
+            stats.max = data["max"]
+        return stats
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch. Level h holds items of weight 2**h; when the sketch
+    is over capacity, the lowest full level is sorted and every other item
+    (random offset) is promoted to the next level. Level capacities shrink
+    geometrically towards the bottom, so the sketch stays under about 3 * k items.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [[]]
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, value):
+        self.levels[0].append(value)
+        self.n += 1
+        self._size += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        while self._size >= self._max_size:
+            for level, items in enumerate(self.levels):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append([])
+                        self._max_size = sum(self._capacity(h) for h in range(len(self.levels)))
+                    items.sort()
+                    # An odd item out stays at this level so total weight is preserved
+                    keep = [items.pop()] if len(items) % 2 else []
+                    promoted = items[self._rng.randint(0, 1)::2]
+                    self.levels[level + 1].extend(promoted)
+                    self.levels[level] = keep
+                    self._size -= len(items) - len(promoted)
+                    break
+            else:
+                return
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.levels)))
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self._size = sum(len(items) for items in self.levels)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (exact min/max at q=0/1); None when empty"""
+        if self.n == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        target = q * sum(weight for _, weight in weighted)
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return self.max
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "levels": self.levels,
+                "min": self.min if self.n else None, "max": self.max if self.n else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.n = data["n"]
+        sketch.levels = [list(items) for items in data["levels"]]
+        sketch._size = sum(len(items) for items in sketch.levels)
+        sketch._max_size = sum(sketch._capacity(h) for h in range(len(sketch.levels)))
+        if sketch.n:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+def band_labels(rubrics):
+    """{metric: {awarded score: band label}} from the rubric's scoring bands"""
+    labels = {}
+    for criterion in rubrics["criteria"]:
+        for metric in criterion["metrics"]:
+            names = {}
+            for band in metric.get("scoring", []):
+                if "level" in band:
+                    label = band["level"]
+                elif "range" in band:
+                    label = f"{band['range'][0]}-{band['range'][1]}"
+                else:
+                    continue
+                # Bands awarding the same score (e.g. Fast and Slow) share one count
+                names[band["score"]] = f"{names[band['score']]}/{label}" if band["score"] in names else label
+            labels[metric["name"]] = names
+    return labels
+
+
+class CohortAggregate:
+    """Fixed-memory summary of any number of results; see the module docstring"""
+
+    def __init__(self, rubrics=None, k=200):
+        self.k = k
+        self.labels = band_labels(rubrics) if rubrics else {}
+        self.overall = RunningStats()
+        self.overall_sketch = KLLSketch(k)
+        self.criteria = {}
+        self.value_sketches = {}
+        self.bands = {}
+        if rubrics:
+            # Fix the report order to the rubric's
+            for criterion in rubrics["criteria"]:
+                self.criteria[criterion["name"]] = RunningStats()
+                for metric in criterion["metrics"]:
+                    if metric["name"] in METRIC_VALUE_FIELDS:
+                        self.value_sketches[metric["name"]] = KLLSketch(k)
+                    self.bands[metric["name"]] = {}
+
+    @property
+    def count(self):
+        return self.overall.count
+
+    def add(self, result):
+        """Fold one calculate_score result (dict or ScoreResult) into the aggregate"""
+        self.overall.add(result["overall_score"])
+        self.overall_sketch.update(result["overall_score"])
+        for criterion in result["criteria_scores"]:
+            stats = self.criteria.get(criterion["criterion"])
+            if stats is None:
+                stats = self.criteria[criterion["criterion"]] = RunningStats()
+            stats.add(criterion["weighted_score"])
+            for metric in criterion["metrics"]:
+                name = metric["metric"]
+                score = metric["score"]
+                counts = self.bands.setdefault(name, {})
+                counts[score] = counts.get(score, 0) + 1
+                field = METRIC_VALUE_FIELDS.get(name)
+                # WPM is None without a duration
+                value = metric.get(field) if field else None
+                if value is not None:
+                    sketch = self.value_sketches.get(name)
+                    if sketch is None:
+                        sketch = self.value_sketches[name] = KLLSketch(self.k)
+                    sketch.update(value)
+
+    def add_many(self, results):
+        for result in results:
+            self.add(result)
+        return self
+
+    def merge(self, other):
+        """Fold another aggregate (e.g. from a parallel worker) into this one"""
+        self.overall.merge(other.overall)
+        self.overall_sketch.merge(other.overall_sketch)
+        for name, stats in other.criteria.items():
+            self.criteria.setdefault(name, RunningStats()).merge(stats)
+        for name, sketch in other.value_sketches.items():
+            self.value_sketches.setdefault(name, KLLSketch(self.k)).merge(sketch)
+        for name, counts in other.bands.items():
+            mine = self.bands.setdefault(name, {})
+            for score, count in counts.items():
+                mine[score] = mine.get(score, 0) + count
+        for name, labels in other.labels.items():
+            self.labels.setdefault(name, labels)
+        return self
+
+    def to_dict(self):
+        return {
+            "k": self.k,
+            "overall": self.overall.to_dict(),
+            "overall_sketch": self.overall_sketch.to_dict(),
+            "criteria": {name: stats.to_dict() for name, stats in self.criteria.items()},
+            "value_sketches": {name: sketch.to_dict() for name, sketch in self.value_sketches.items()},
+            # JSON keys are strings, so band counts are stored as [score, count] pairs
+            "bands": {name: sorted(counts.items()) for name, counts in self.bands.items()},
+            "labels": {name: sorted(labels.items()) for name, labels in self.labels.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregate = cls(k=data["k"])
+        aggregate.overall = RunningStats.from_dict(data["overall"])
+        aggregate.overall_sketch = KLLSketch.from_dict(data["overall_sketch"])
+        aggregate.criteria = {name: RunningStats.from_dict(d) for name, d in data["criteria"].items()}
+        # Older files sketched band scores ("metric_sketches"); those must not mix with raw values
+        aggregate.value_sketches = {name: KLLSketch.from_dict(d) for name, d in data.get("value_sketches", {}).items()}
+        aggregate.bands = {name: {score: count for score, count in pairs} for name, pairs in data["bands"].items()}
+        aggregate.labels = {name: {score: label for score, label in pairs} for name, pairs in data["labels"].items()}
+        return aggregate
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def format_report(self, quantiles=REPORT_QUANTILES):
+        """Plain-text cohort summary in the style of the per-video report"""
+        def fmt(value):
+            return "-" if value is None else f"{value:g}"
+
+        header = "  ".join(f"p{int(q * 100)}".rjust(6) for q in quantiles)
+        report = ["=" * 60, "COHORT SUMMARY REPORT", "=" * 60, f"\nResults aggregated: {self.count}"]
+        if self.count == 0:
+            report.append("\n" + "=" * 60)
+            return "\n".join(report)
+
+        report.append("-" * 60)
+        report.append(f"OVERALL SCORE: mean {self.overall.mean:.2f}, std {self.overall.std:.2f}, "
+                      f"min {fmt(self.overall.min)}, max {fmt(self.overall.max)}")
+        report.append("  " + header)
+        report.append("  " + "  ".join(fmt(self.overall_sketch.quantile(q)).rjust(6) for q in quantiles))
+        report.append("-" * 60)
+
+        report.append("\nCRITERIA (weighted score):")
+        for name, stats in self.criteria.items():
+            report.append(f"  - {name}: mean {stats.mean:.2f}, std {stats.std:.2f}, "
+                          f"min {fmt(stats.min if stats.count else None)}, "
+                          f"max {fmt(stats.max if stats.count else None)}")
+
+        report.append("\nMETRICS (value quantiles):")
+        report.append(f"  {'':36}{header}")
+        for name, sketch in self.value_sketches.items():
+            label = f"{name[:22]} ({METRIC_VALUE_FIELDS.get(name, 'value')})"
+            values = "  ".join(fmt(_round(sketch.quantile(q))).rjust(6) for q in quantiles)
+            report.append(f"  {label:36}{values}")
+
+        report.append("\nBAND OCCUPANCY:")
+        for name, counts in self.bands.items():
+            total = sum(counts.values())
+            if not total:
+                continue
+            labels = self.labels.get(name, {})
+            report.append(f"  {name}:")
+            for score in sorted(counts, reverse=True):
+                label = f"{labels[score]} ({fmt(score)})" if score in labels else f"score {fmt(score)}"
+                report.append(f"    {label}: {counts[score]} ({counts[score] / total * 100:.1f}%)")
+
+        report.append("\n" + "=" * 60)
+        return "\n".join(report)
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Merge partial cohort aggregates and print a summary")
+    arg_parser.add_argument("parts", nargs="+", help="Aggregate JSON files written by bulk runs")
+    arg_parser.add_argument("--output", help="Write the merged aggregate here (mergeable again later)")
+    arg_parser.add_argument("--report", help="Write the text report here")
+    args = arg_parser.parse_args()
+
+    merged = CohortAggregate.load(args.parts[0])
+    for path in args.parts[1:]:
+        merged.merge(CohortAggregate.load(path))
+
+    report = merged.format_report()
+    print(report)
+    if args.output:
+        merged.save(args.output)
+        print(f"Merged aggregate of {merged.count} results saved to {args.output}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
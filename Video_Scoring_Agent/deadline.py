@@ -0,0 +1,78 @@
+"""
+Deadline - Per-request latency budgets and learned cost estimates for scoring steps
+
+A Deadline is created per calculate_score call with a budget in milliseconds.
+Before an expensive step (a sentence-embedding encode, the grammar check or
+sentiment over a long transcript) the engine asks whether the step's estimated
+cost still fits; if not, the step is skipped or run on a sample, and the
+metric is recorded as degraded with the reason.
+
+Estimates come from a CostModel: per-unit costs (per call, or per 1,000 words)
+seeded with priors and updated with an exponential moving average of observed
+timings, so a cold model's slow first encode and the host's real speed are
+learned from traffic.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+
+class CostModel:
+    """Moving-average per-unit cost estimates in milliseconds"""
+
+    def __init__(self, priors, smoothing=0.2):
+        self.smoothing = smoothing
+        self._per_unit = dict(priors)
+        self._lock = threading.Lock()
+
+    def estimate(self, key, units=1.0):
+        return self._per_unit.get(key, 0.0) * units
+
+    def observe(self, key, elapsed_ms, units=1.0):
+        if units <= 0:
+            return
+        with self._lock:
+            previous = self._per_unit.get(key)
+            per_unit = elapsed_ms / units
+            self._per_unit[key] = per_unit if previous is None else \
+                previous + self.smoothing * (per_unit - previous)
+
+    @contextmanager
+    def measure(self, key, units=1.0):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(key, (time.perf_counter() - started) * 1000, units)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: round(value, 4) for key, value in self._per_unit.items()}
+
+
+class Deadline:
+    """Time left in one request's budget, and the metrics degraded to stay inside it"""
+
+    def __init__(self, budget_ms, reserve_ms=1.0):
+        self.budget_ms = budget_ms
+        # Kept back for assembling and serializing the result after the last metric
+        self.reserve_ms = reserve_ms
+        self.started = time.perf_counter()
+        self.degraded = {}
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def remaining_ms(self):
+        return self.budget_ms - self.reserve_ms - self.elapsed_ms()
+
+    def allows(self, cost_ms):
+        """Whether a step estimated at cost_ms still fits the budget"""
+        return cost_ms <= self.remaining_ms()
+
+    def degrade(self, metric_name, reason):
+        self.degraded.setdefault(metric_name, reason)
+
+    def summary(self):
+        """[{"metric", "reason"}] in the order metrics were degraded"""
+        return [{"metric": name, "reason": reason} for name, reason in self.degraded.items()]
@@ -0,0 +1,156 @@
+"""
+Grammar Checker - Offline rule-based grammar checking with a precompiled pattern set
+
+All rules are compiled once into a single regular expression. Every rule is a
+zero-width lookahead probed only at word starts, so one scan over the text
+tests all rules at each word. Errors that start at different words are all
+reported, even when they overlap; when several rules match at the same word,
+only the first one in RULES is.
+"""
+import re
+import time
+
+# Words spelled with a leading vowel but spoken with a consonant sound ("a university")
+CONSONANT_SOUND_VOWEL_WORDS = (
+    "one", "once", "uni", "union", "unique", "unit", "united", "universe", "universal",
+    "university", "uniform", "usual", "usually", "use", "used", "useful", "user", "usa",
+    "european", "europe", "eu", "euro", "ewe", "ufo", "utensil", "utility",
+)
+# Words spelled with a leading consonant but spoken with a vowel sound ("an hour")
+VOWEL_SOUND_CONSONANT_WORDS = (
+    "hour", "hours", "hourly", "honest", "honestly", "honor", "honour", "honorable",
+    "heir", "herb", "mba", "mla", "mp", "fm", "x",
+)
+
+# Words that are legitimately doubled in normal speech ("that that", "had had")
+ALLOWED_REPEATS = ("that", "had", "very", "so", "bye", "no", "really", "ha", "knock")
+
+THIRD_PERSON = r"(?:he|she|it|my\s+(?:father|mother|brother|sister|friend|teacher)|everyone|everybody|nobody)"
+BASE_VERBS = (
+    r"(?:have|do|go|like|love|want|live|play|study|enjoy|know|make|take|come|"
+    r"need|feel|think|work|teach|watch|read|write|say|get|give|look|help|try|don't)"
+)
+
+# A subject after these takes the base verb: questions and negations ("does he like"),
+# modals ("can she go") and causative/perception verbs ("let it go", "watch my brother play")
+BASE_VERB_GOVERNORS = (
+    "do", "does", "did", "don't", "doesn't", "didn't", "can", "could", "will", "would", "shall",
+    "should", "may", "might", "must", "can't", "couldn't", "won't", "wouldn't", "shouldn't",
+    "let", "lets", "make", "makes", "made", "help", "helps", "helped", "watch", "watches",
+    "watched", "see", "sees", "saw", "hear", "hears", "heard",
+)
+# One fixed-width look-behind per word (Python look-behinds cannot alternate widths)
+NOT_GOVERNED = "".join(r"(?<!\b%s\s)" % re.escape(word) for word in BASE_VERB_GOVERNORS)
+
+# (rule id, message, pattern). Patterns are matched case-insensitively unless they start with (?-i:
+RULES = [
+    ("REPEATED_WORD", "Repeated word",
+     r"\b(?P<rep>(?!(?:%s)\b)[a-z']+)\s+(?P=rep)\b" % "|".join(ALLOWED_REPEATS)),
+    ("A_BEFORE_VOWEL", "Use 'an' before a vowel sound",
+     r"\ba\s+(?!(?:%s)\b)(?:[aeiou]\w*|(?:%s)\b)" % ("|".join(CONSONANT_SOUND_VOWEL_WORDS),
+                                                  "|".join(VOWEL_SOUND_CONSONANT_WORDS))),
+    ("AN_BEFORE_CONSONANT", "Use 'a' before a consonant sound",
+     r"\ban\s+(?:(?!(?:%s)\b)[b-df-hj-np-tv-z]\w*|(?:%s)\b)" % ("|".join(VOWEL_SOUND_CONSONANT_WORDS),
+                                                             "|".join(CONSONANT_SOUND_VOWEL_WORDS))),
+    ("THIRD_PERSON_AGREEMENT", "Verb does not agree with a singular subject",
+     r"\b(?=%s\s)%s%s\s+(?:always\s+|also\s+|really\s+|usually\s+)?%s\b"
+     % (THIRD_PERSON, NOT_GOVERNED, THIRD_PERSON, BASE_VERBS)),
+    ("I_AGREEMENT", "Verb does not agree with 'I'",
+     r"\bi\s+(?:is|was\s+not\s+is|has|does|goes|likes|loves|wants|lives|plays|studies|enjoys|were)\b"),
+    ("PLURAL_AGREEMENT", "Verb does not agree with a plural subject",
+     r"\b(?:we|they|you|my\s+parents|people)\s+(?:is|was|has|does|goes|likes|lives|plays)\b"),
+    ("ARE_AFTER_SINGULAR", "Use 'is' with a singular subject",
+     r"\b(?:he|she|it|this)\s+are\b"),
+    ("OBJECT_PRONOUN_SUBJECT", "Use a subject pronoun ('I', 'he', 'she') here",
+     r"\b(?:(?:me|him|her|them|us)\s+and\s+(?:my|his|her|our)\s+\w+\s+(?:am|is|are|was|were|went|go|play|like|live)|"
+     r"(?:him|her|them|us)\s+(?:is|are|was|were|has|have)\b)"),
+    ("MYSELF_AS_NAME", "Use 'I am' or 'My name is' instead of 'myself' as a subject",
+     r"(?:^|(?<=[.!?,]\s))myself\s+(?!am\b|is\b)[a-z]+"),
+    ("DOUBLE_COMPARATIVE", "Double comparative",
+     r"\b(?:more|most)\s+(?:better|best|worse|worst|bigger|biggest|smaller|easier|happier|taller)\b"),
+    ("PAST_AFTER_DID", "Use the base verb after 'did'",
+     r"\bdid(?:n't|\s+not)?\s+(?:went|came|saw|did|had|ate|took|made|played|liked|wanted|studied|goes|likes)\b"),
+    ("REDUNDANT_PREPOSITION", "Redundant word",
+     r"\b(?:discuss\s+about|return\s+back|revert\s+back|repeat\s+again|cousin\s+(?:brother|sister)|"
+     r"explain\s+about|reach\s+to|enter\s+into\s+the\s+room)\b"),
+    ("SINCE_DURATION", "Use 'for' with a duration",
+     r"\bsince\s+(?:\d+|one|two|three|four|five|six|seven|eight|nine|ten|many|few)\s+(?:years?|months?|days?|weeks?)\b"),
+    ("STATIVE_PROGRESSIVE", "Stative verb in continuous form",
+     r"\b(?:am|is|are)\s+having\s+(?:a\s+|an\s+)?(?:\d+|one|two|three|four|five|brothers?|sisters?|siblings?|family|pets?|dogs?|cats?)\b"),
+    ("AGE_WITHOUT_YEARS", "Say 'I am 13 years old' (not 'I am having 13 years')",
+     r"\b(?:am|is)\s+having\s+\d+\s+years\b"),
+    ("LOWERCASE_I", "The pronoun 'I' is always capitalized",
+     r"(?-i:\bi(?=(?:'m|'ve|'ll|'d)?\b)(?![\w-]))"),
+    ("SENTENCE_CASE", "Sentence should start with a capital letter",
+     r"(?-i:(?:^|(?<=[.!?]\s)|(?<=[.!?]\s\s))[a-z])"),
+]
+
+MESSAGES = {rule_id: message for rule_id, message, _ in RULES}
+
+
+def _compile(rules):
+    alternatives = []
+    for rule_id, _, pattern in rules:
+        alternatives.append(f"(?P<{rule_id}>{pattern})")
+    # One zero-width probe per word start; the captured group tells which rule fired
+    return re.compile(r"(?<![\w'-])(?=%s)" % "|".join(alternatives), re.IGNORECASE)
+
+
+COMPILED_RULES = _compile(RULES)
+
+
+class GrammarChecker:
+    """Runs the precompiled rule set over a transcript in one scan"""
+
+    def __init__(self, compiled=COMPILED_RULES):
+        self.compiled = compiled
+
+    def check(self, text):
+        """
+        Returns a list of issues: dicts with rule, message, offset and the
+        matched text. At most one rule is reported per starting position.
+        """
+        issues = []
+        for match in self.compiled.finditer(text):
+            rule_id = match.lastgroup
+            start, end = match.span(rule_id)
+            issues.append({
+                "rule": rule_id,
+                "message": MESSAGES[rule_id],
+                "offset": start,
+                "text": text[start:end],
+            })
+        return issues
+
+    def count_errors(self, text):
+        """Number of issues found, without building issue dicts"""
+        return sum(1 for _ in self.compiled.finditer(text))
+
+
+_default_checker = None
+
+
+def get_checker():
+    """Process-wide checker"""
+    global _default_checker
+    if _default_checker is None:
+        _default_checker = GrammarChecker()
+    return _default_checker
+
+
+if __name__ == "__main__":
+    checker = get_checker()
+    sample = open("Sample text for case study.txt", encoding="utf-8").read()
+
+    for issue in checker.check(sample):
+        print(f"  {issue['offset']:>5}  {issue['rule']:<24} {issue['text']!r}")
+
+    for words in (1000, 10000):
+        text = " ".join((sample + " ") * (words // len(sample.split()) + 1)).split()[:words]
+        text = " ".join(text)
+        runs = 20
+        started = time.perf_counter()
+        for _ in range(runs):
+            checker.check(text)
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{words:>6} words: {elapsed * 1000:.2f} ms per check")
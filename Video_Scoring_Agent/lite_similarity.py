@@ -0,0 +1,259 @@
+"""
+Lite Similarity - Hashed character n-gram sentence vectors for workers without torch
+
+A drop-in for the sentence transformer's encode(): each sentence becomes a
+sparse, L2-normalized vector of hashed character n-gram counts (padded words,
+like scikit-learn's "char_wb" analyzer). Cosine similarity is then a sparse
+dot product. Startup is instant and memory is a few MB, at the cost of only
+catching greetings that share spelling with a prototype, not paraphrases.
+
+Run `python lite_similarity.py` to print agreement with the labeled set below
+(and with the MiniLM fallback, when sentence-transformers and the model are
+available).
+"""
+import os
+import re
+import sys
+import time
+import zlib
+import numpy as np
+from scipy import sparse
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Character n-grams share little with paraphrases, so the lite backend gets a
+# wider set of greeting prototypes than the three MiniLM uses.
+LITE_GREETING_PATTERNS = [
+    "Hello everyone, I am happy to introduce myself",
+    "Good morning, I am excited to be here",
+    "Hi, my name is",
+    "Greetings to everyone",
+    "Warm greetings to all of you",
+    "Namaste everyone",
+    "Respected teachers and my dear friends",
+    "Dear friends and respected judges",
+    "Good afternoon to all",
+    "Welcome everyone",
+    "Hey everyone",
+]
+
+# Similarity above which the lite backend calls a first sentence a greeting,
+# chosen on LABELED_FIRST_SENTENCES (MiniLM's fallback uses 0.5)
+LITE_SALUTATION_THRESHOLD = 0.42
+
+# First sentences that reach the salutation fallback (no salutation keyword in them),
+# labeled greeting (True) or not
+LABELED_FIRST_SENTENCES = [
+    ("Greetings everyone", True),
+    ("Warm greetings, friends", True),
+    ("Namaste to all the teachers", True),
+    ("Respected sir and madam", True),
+    ("Dear friends, welcome", True),
+    ("Pranam to all my elders", True),
+    ("Welcome everyone to my introduction", True),
+    ("Hey everyone, nice to meet you", True),
+    ("Greetings to the respected judges", True),
+    ("Salutations to all of you", True),
+    ("Namaste", True),
+    ("Hey all", True),
+    ("A very warm welcome to everyone", True),
+    ("Respected principal, teachers and my dear friends", True),
+    ("Good to see you all", True),
+    ("Welcome to my talk", True),
+    ("Namaskar to everyone here", True),
+    ("Vanakkam everyone", True),
+    ("Sat sri akal to all", True),
+    ("Assalamu alaikum everyone", True),
+    ("Hey there, everybody", True),
+    ("Hey guys", True),
+    ("Greetings, respected teachers", True),
+    ("Respected judges and dear audience", True),
+    ("Dear teachers and fellow students", True),
+    ("Welcome, friends and family", True),
+    ("Warm welcome to the respected guests", True),
+    ("Good to be here with all of you", True),
+    ("Nice to meet you all", True),
+    ("Pleased to meet everyone", True),
+    ("Respected ma'am and dear classmates", True),
+    ("Greetings from class 8 B", True),
+    ("Dear all, welcome", True),
+    ("Honourable principal and respected staff", True),
+    ("Howdy everyone", True),
+    ("Hey, everyone, welcome to my introduction", True),
+    ("Salutations, dear friends", True),
+    ("Welcome to all the parents present", True),
+    ("Respected everyone", True),
+    ("Greetings and welcome", True),
+    ("A warm namaste to all of you", True),
+    ("Dear audience, welcome", True),
+    ("Hey friends, welcome back", True),
+    ("Welcome, respected guests", True),
+    ("Greetings to my teachers and friends", True),
+    ("Namaste, respected elders", True),
+    ("Hola everyone", True),
+    ("Good to meet you all", True),
+    ("Warm wishes to everyone", True),
+    ("My favourite subject is maths", False),
+    ("I study in class 8", False),
+    ("I live in Mumbai with my parents", False),
+    ("Today I will talk about my family", False),
+    ("My father works in a bank", False),
+    ("I am 13 years old", False),
+    ("Cricket is my favourite sport", False),
+    ("Our school is near the river", False),
+    ("I want to become a doctor", False),
+    ("Last year we went to Goa", False),
+    ("I play the guitar every evening", False),
+    ("Mathematics and science are interesting", False),
+    ("We have a dog named Bruno", False),
+    ("Everyone in my family loves music", False),
+    ("Let me start with my school", False),
+    ("My mother is a teacher", False),
+    ("My name is Ananya", False),
+    ("Myself Rohan from class 7", False),
+    ("I am Priya and I am 12 years old", False),
+    ("Everyone says I am a good dancer", False),
+    ("We welcome guests warmly during Diwali", False),
+    ("My dear grandmother lives in Pune", False),
+    ("I respect my teachers a lot", False),
+    ("Our teachers are very kind", False),
+    ("My friends call me Sonu", False),
+    ("The morning assembly starts at eight", False),
+    ("Every evening I go for a walk", False),
+    ("I was born in Kolkata", False),
+    ("My brother is older than me", False),
+    ("Football is my favourite game", False),
+    ("I love reading story books", False),
+    ("I have two sisters", False),
+    ("My best friend is Aarav", False),
+    ("We moved to Bangalore last year", False),
+    ("I am good at drawing", False),
+    ("My hobby is painting", False),
+    ("I want to be an engineer when I grow up", False),
+    ("My mother cooks tasty food", False),
+    ("Our family goes to the temple on Sundays", False),
+    ("I am in the school band", False),
+    ("I got a prize in the science fair", False),
+    ("We are four members in my family", False),
+    ("I like to dance and sing", False),
+    ("My grandfather tells us stories", False),
+    ("Once I lost my way in a market", False),
+    ("People say I talk too much", False),
+    ("I am learning to swim", False),
+    ("My school is called Modern Public School", False),
+    ("Summer holidays are my favourite time of the year", False),
+    ("I am a big fan of Virat Kohli", False),
+    ("My dream is to travel around the world", False),
+    ("I enjoy solving puzzles", False),
+    ("My favourite food is biryani", False),
+    ("Our class teacher is Mrs Sharma", False),
+    ("I wake up at six every day", False),
+    ("I am the monitor of my class", False),
+    ("English is an easy subject for me", False),
+    ("We celebrate every festival together", False),
+    ("I am a bit shy in front of a crowd", False),
+    ("My parents are doctors", False),
+    ("I read the newspaper every day", False),
+    ("Our house has a small garden", False),
+    ("I am going to talk about my hobbies", False),
+    ("So, let me tell you about myself", False),
+    ("First of all, my name is Kabir", False),
+    ("Today is a special day for me", False),
+    ("I am very nervous right now", False),
+    ("Everybody in my class is my friend", False),
+    ("All of us love playing together", False),
+    ("We are a joint family", False),
+    ("My uncle lives abroad", False),
+    ("I go to school by bus", False),
+    ("Teachers and friends help me a lot", False),
+    ("The guests arrived late at the party", False),
+    ("I scored ninety marks in maths", False),
+    ("My pet cat is called Snowy", False),
+    ("I am the youngest in my family", False),
+    ("I like to help my mother at home", False),
+    ("Our summer camp was great fun", False),
+    ("Respect for elders is important in my family", False),
+]
+
+
+def _crc32(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class HashedNgramEncoder:
+    """Sparse hashed character n-gram vectors; encode() mirrors SentenceTransformer.encode"""
+
+    def __init__(self, n_features=2 ** 18, ngram_range=(2, 4)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def _ngrams(self, sentence):
+        low, high = self.ngram_range
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n]
+
+    def encode(self, sentences, **kwargs):
+        """(sentences x n_features) CSR matrix, float32, each row L2-normalized"""
+        indices, indptr, data = [], [0], []
+        for sentence in sentences:
+            counts = {}
+            for gram in self._ngrams(sentence):
+                column = _crc32(gram) % self.n_features
+                counts[column] = counts.get(column, 0) + 1
+            columns = sorted(counts)
+            values = np.array([counts[c] for c in columns], dtype=np.float32)
+            norm = np.sqrt((values * values).sum())
+            indices.extend(columns)
+            data.extend((values / norm if norm else values).tolist())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(len(sentences), self.n_features)
+        )
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _fallback_decisions(model, patterns, threshold):
+    """Semantic salutation fallback over the labeled set: (is greeting, score) per sentence"""
+    from semantic_keywords import PrototypeMatrix
+    prototypes = PrototypeMatrix({"greeting": patterns}, model)
+    similarities = prototypes.similarities(model.encode([s for s, _ in LABELED_FIRST_SENTENCES]))[:, 0]
+    return [(bool(sim > threshold), min(int(sim * 5), 5) if sim > threshold else 0) for sim in similarities]
+
+
+if __name__ == "__main__":
+    labels = [label for _, label in LABELED_FIRST_SENTENCES]
+
+    started = time.perf_counter()
+    lite = _fallback_decisions(HashedNgramEncoder(), LITE_GREETING_PATTERNS, LITE_SALUTATION_THRESHOLD)
+    lite_seconds = time.perf_counter() - started
+    lite_accuracy = np.mean([decision == label for (decision, _), label in zip(lite, labels)])
+    print(f"lite:   {lite_accuracy:.1%} agreement with labels, startup+scoring {lite_seconds * 1000:.1f} ms, "
+          f"RSS {_rss_mb():.0f} MB, torch imported: {'torch' in sys.modules}")
+
+    try:
+        from scoring_engine import ScoringEngine
+        from model_registry import acquire_sentence_transformer
+        started = time.perf_counter()
+        handle = acquire_sentence_transformer("all-MiniLM-L6-v2")
+        minilm = _fallback_decisions(handle.value, ScoringEngine.GREETING_PATTERNS, 0.5)
+        minilm_seconds = time.perf_counter() - started
+    except Exception as e:
+        print(f"MiniLM unavailable ({type(e).__name__}); only label agreement reported")
+    else:
+        minilm_accuracy = np.mean([decision == label for (decision, _), label in zip(minilm, labels)])
+        agreement = np.mean([a[0] == b[0] for a, b in zip(lite, minilm)])
+        score_agreement = np.mean([a[1] == b[1] for a, b in zip(lite, minilm)])
+        print(f"MiniLM: {minilm_accuracy:.1%} agreement with labels, startup+scoring {minilm_seconds:.1f} s, "
+              f"RSS {_rss_mb():.0f} MB")
+        print(f"lite vs MiniLM: {agreement:.1%} same decision, {score_agreement:.1%} same score")
@@ -1,8 +1,14 @@
 import os
-import sys
-from agents import VideoProcessorAgent, TranscriptionAgent, ScoringAgent, ReportingAgent
+import shutil
+import argparse
+from agents import VideoProcessorAgent, TranscriptionAgent, TieredTranscriptionAgent, ScoringAgent, ReportingAgent
 from moviepy import ColorClip, TextClip, CompositeVideoClip, AudioFileClip
 from gtts import gTTS
+from artifacts import ArtifactStore, STAGES
+from tracing import tracer
+from model_registry import registry, acquire_rubric_parser
+from columnar_writer import ParquetResultWriter
+from cohort_report import CohortAggregate
 
 def create_dummy_video(filename="sample_video.mp4"):
     """Creates a dummy video with a self-introduction audio for testing."""
@@ -40,48 +46,248 @@ def create_dummy_video(filename="sample_video.mp4"):
     print(f"Dummy video created: {filename}")
     return filename
 
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+class LazyAgents:
+    """Builds each agent on first use so resumed jobs skip loading models they no longer need"""
+    def __init__(self, transcriber_factory=None):
+        self._agents = {}
+        self._factories = {
+            "video": VideoProcessorAgent,
+            "transcriber": transcriber_factory or TranscriptionAgent,
+            "scorer": ScoringAgent,
+            "reporter": ReportingAgent,
+        }
+
+    def close(self):
+        for agent in self._agents.values():
+            agent.close()
+        self._agents = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._agents:
+            self._agents[name] = self._factories[name]()
+        return self._agents[name]
+
+def collect_videos(paths):
+    """Expand directories into the video files they contain"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(path, name))
+        else:
+            videos.append(path)
+    return videos
+
+def process_video(video_path, agents, artifacts_dir="artifacts", fresh=False):
+    """
+    Run the pipeline for one video, persisting each stage to its job directory.
+    Stages that already completed are loaded from disk instead of recomputed.
+    Returns the job's ArtifactStore.
+    """
+    store = ArtifactStore(video_path, root_dir=artifacts_dir)
+    # Each job's trace covers only its own stages (plus any model loads it triggered),
+    # also when other jobs run on other threads of the same process
+    try:
+        with tracer.trace(store.job_id):
+            return run_stages(store, video_path, agents, fresh)
+    finally:
+        tracer.reset(store.job_id)
+
+def run_stages(store, video_path, agents, fresh=False):
+    """Stages of process_video from the first one not yet completed"""
+    if fresh:
+        store.reset()
+
+    resume_from = store.next_stage()
+    if resume_from is None:
+        print(f"[System] {store.job_id}: already complete, skipping")
+        return store
+    if resume_from != STAGES[0]:
+        print(f"[System] {store.job_id}: resuming from stage '{resume_from}'")
+
+    stage = STAGES[0]
+    draft_results = None
+    try:
+        # 1 + 2. Extract audio and transcribe (skipped entirely once a transcript exists)
+        if store.is_done("transcribe"):
+            transcript = store.read_text("transcript.txt")
+            duration = store.load("extract")["duration"]
+        else:
+            if store.is_done("extract"):
+                extract_data = store.load("extract")
+                audio_path = store.path(extract_data["audio_file"])
+                duration = extract_data["duration"]
+            else:
+                audio_path, duration = agents.video.extract_audio(video_path, store.path("audio.mp3"))
+                store.complete("extract", data={
+                    "audio_file": "audio.mp3",
+                    "duration": duration,
+                    "audio_bytes": os.path.getsize(audio_path),
+                }, files=["audio.mp3"])
+
+            stage = "transcribe"
+            transcribe_data = {}
+            if isinstance(agents.transcriber, TieredTranscriptionAgent):
+                transcript = agents.transcriber.transcribe(audio_path, duration)
+                transcribe_data["tier"] = agents.transcriber.last_tier
+                transcribe_data["sensitive_metrics"] = agents.transcriber.last_sensitive
+                # A kept draft was already scored while choosing the tier
+                draft_results = agents.transcriber.last_results
+            else:
+                transcript = agents.transcriber.transcribe(audio_path)
+            transcribe_data["characters"] = len(transcript)
+            store.write_text("transcript.txt", transcript)
+            store.complete("transcribe", data=transcribe_data, files=["transcript.txt"])
+
+            # The transcript supersedes the audio, so reclaim the disk space
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+                print(f"[System] Cleaned up temporary file: {audio_path}")
+
+        # 3. Score
+        stage = "score"
+        if store.is_done("score"):
+            results = store.read_json("scores.json")
+        else:
+            results = draft_results or agents.scorer.score_transcript(transcript, duration)
+            store.write_json("scores.json", results)
+            store.complete("score", data={"overall_score": results["overall_score"]}, files=["scores.json"])
+
+        # 4. Report
+        stage = "report"
+        if not store.is_done("report"):
+            agents.reporter.generate_report(results, transcript, output_path=store.path("report.txt"))
+            store.complete("report", files=["report.txt"])
+
+    except Exception as e:
+        store.fail(stage, e)
+        print(f"\n[ERROR] {store.job_id}: stage '{stage}' failed: {str(e)}")
+        print(f"[System] Completed stages are kept in {store.job_dir}; rerun to resume.")
+
+    return store
+
+def summarize_tiers(stores, draft_model, refine_model):
+    """Tier usage across jobs, read from their manifests so resumed jobs are counted too"""
+    counts = {"draft": 0, "refined": 0}
+    for store in stores:
+        if store.is_done("transcribe"):
+            tier = store.load("transcribe").get("tier")
+            if tier in counts:
+                counts[tier] += 1
+    total = sum(counts.values())
+    if total == 0:
+        return "Tier usage - no tiered transcriptions recorded"
+    return (f"Tier usage - draft ({draft_model}): {counts['draft']}/{total} "
+            f"({counts['draft'] / total * 100:.1f}%), refined ({refine_model}): "
+            f"{counts['refined']}/{total} ({counts['refined'] / total * 100:.1f}%)")
+
 def main():
     print("Initializing Video Scoring System (Agentic Architecture)...")
-    
-    # Check for video file
-    video_path = "sample_video.mp4"
-    if len(sys.argv) > 1:
-        video_path = sys.argv[1]
-    
-    if not os.path.exists(video_path):
+
+    arg_parser = argparse.ArgumentParser(description="Score self-introduction videos")
+    arg_parser.add_argument("videos", nargs="*", default=["sample_video.mp4"],
+                            help="Video files or directories of videos")
+    arg_parser.add_argument("--artifacts-dir", default="artifacts",
+                            help="Directory holding per-job stage artifacts")
+    arg_parser.add_argument("--fresh", action="store_true",
+                            help="Ignore existing artifacts and rerun every stage")
+    arg_parser.add_argument("--tiered", action="store_true",
+                            help="Draft with a small Whisper model, refine only near rubric band edges")
+    arg_parser.add_argument("--draft-model", default="tiny", help="Whisper model for the draft tier")
+    arg_parser.add_argument("--refine-model", default="base", help="Whisper model for the refine tier")
+    arg_parser.add_argument("--wpm-margin", type=float, default=5.0,
+                            help="Refine if WPM is within this many words/min of a band edge")
+    arg_parser.add_argument("--filler-margin", type=float, default=0.5,
+                            help="Refine if filler rate is within this many percentage points of a band edge")
+    arg_parser.add_argument("--ttr-margin", type=float, default=0.02,
+                            help="Refine if TTR is within this distance of a band edge")
+    arg_parser.add_argument("--keyword-check", action="store_true",
+                            help="Also refine when a keyword concept was matched by a single keyword")
+    arg_parser.add_argument("--parquet", metavar="PATH",
+                            help="Also write one row of flattened scores per video to this Parquet file")
+    arg_parser.add_argument("--cohort-report", metavar="PATH",
+                            help="Also write a cohort summary (quantiles, band occupancy, criterion mean/std) here")
+    args = arg_parser.parse_args()
+
+    video_paths = collect_videos(args.videos)
+    if not video_paths:
+        print(f"[ERROR] No videos found in: {', '.join(args.videos)} "
+              f"(looked for {', '.join(VIDEO_EXTENSIONS)})")
+        return
+
+    if len(video_paths) == 1 and not os.path.exists(video_paths[0]):
         try:
-            create_dummy_video(video_path)
+            create_dummy_video(video_paths[0])
         except Exception as e:
             print(f"Could not create dummy video: {e}")
             print("Please provide a video file path as an argument.")
             return
 
-    # Initialize Agents
-    video_agent = VideoProcessorAgent()
-    transcriber_agent = TranscriptionAgent()
-    scoring_agent = ScoringAgent()
-    reporting_agent = ReportingAgent()
+    transcriber_factory = None
+    if args.tiered:
+        margins = {
+            "Words Per Minute": args.wpm_margin,
+            "Filler Word Rate": args.filler_margin,
+            "Vocabulary Richness": args.ttr_margin,
+        }
+        transcriber_factory = lambda: TieredTranscriptionAgent(
+            agents.scorer, args.draft_model, args.refine_model, margins, args.keyword_check)
+    agents = LazyAgents(transcriber_factory)
+    failed = []
+    stores = []
+    writer = None
+    aggregate = None
+    if args.parquet or args.cohort_report:
+        with acquire_rubric_parser() as parser_handle:
+            rubrics = parser_handle.value.get_rubrics()
+        if args.parquet:
+            writer = ParquetResultWriter(args.parquet, rubrics)
+        if args.cohort_report:
+            aggregate = CohortAggregate(rubrics)
 
-    try:
-        # 1. Extract Audio
-        audio_path, duration = video_agent.extract_audio(video_path)
+    for video_path in video_paths:
+        if not os.path.exists(video_path):
+            print(f"[ERROR] Video file not found: {video_path}")
+            failed.append(video_path)
+            continue
+        store = process_video(video_path, agents, args.artifacts_dir, fresh=args.fresh)
+        stores.append(store)
+        if store.manifest["status"] != "complete":
+            failed.append(video_path)
+            continue
+        if writer is not None or aggregate is not None:
+            results = store.read_json("scores.json")
+            if writer is not None:
+                writer.write(results, transcript_id=store.job_id)
+            if aggregate is not None:
+                aggregate.add(results)
 
-        # 2. Transcribe
-        transcript = transcriber_agent.transcribe(audio_path)
+    if writer is not None:
+        writer.close()
+        print(f"[System] Wrote {writer.rows_written} result rows to {args.parquet}")
+    if aggregate is not None:
+        agents.reporter.generate_cohort_report(aggregate, args.cohort_report)
 
-        # 3. Score
-        results = scoring_agent.score_transcript(transcript, duration)
+    # Keep the single-video output where it has always been
+    if len(video_paths) == 1 and not failed:
+        shutil.copyfile(store.path("report.txt"), "analysis_report.txt")
+        print("[System] Report copied to analysis_report.txt")
 
-        # 4. Report
-        reporting_agent.generate_report(results, transcript)
+    if len(video_paths) > 1:
+        print(f"\n[System] Processed {len(video_paths)} videos, {len(failed)} failed")
 
-        # Cleanup
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-            print(f"[System] Cleaned up temporary file: {audio_path}")
+    for model in registry.stats():
+        print(f"[System] Loaded {model['kind']} '{model['name']}': {model['memory_mb']} MB, "
+              f"{model['load_seconds']}s to load, {model['refs']} reference(s)")
+    agents.close()
 
-    except Exception as e:
-        print(f"\n[ERROR] An error occurred during the process: {str(e)}")
+    if args.tiered:
+        print(f"[System] {summarize_tiers(stores, args.draft_model, args.refine_model)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,339 @@
+"""
+Model Server - Local daemon that owns the models and serves encode/transcribe over a Unix socket
+
+Run once per host:
+    python model_server.py --socket /tmp/scoring_models.sock
+
+Then point clients at it, e.g. ScoringEngine(rubrics, model_socket=...) or the
+SCORING_MODEL_SOCKET environment variable.
+
+Wire format (all integers little-endian):
+    frame    = u32 body_length | u8 opcode | body
+    ENCODE   body: u32 count, then count x (u32 length | utf-8 bytes)
+             reply EMBEDDINGS body: u32 rows | u32 dim | rows*dim float32
+    TRANSCRIBE body: u32 length | utf-8 model size | u32 length | utf-8 audio path
+             reply TEXT body: utf-8 transcript
+    any request may be answered with ERROR body: utf-8 message
+"""
+import os
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import queue
+import numpy as np
+
+OP_ENCODE = 1
+OP_TRANSCRIBE = 2
+OP_EMBEDDINGS = 101
+OP_TEXT = 102
+OP_ERROR = 255
+
+HEADER = struct.Struct("<IB")
+U32 = struct.Struct("<I")
+MAX_FRAME = 256 * 1024 * 1024
+
+DEFAULT_SOCKET = "/tmp/scoring_models.sock"
+
+
+# ---------------------------------------------------------------------------
+# Framing
+# ---------------------------------------------------------------------------
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Connection closed")
+        received += n
+    return bytes(buf)
+
+
+def send_frame(sock, opcode, body):
+    sock.sendall(HEADER.pack(len(body), opcode) + body)
+
+
+def recv_frame(sock):
+    length, opcode = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame too large: {length} bytes")
+    return opcode, _recv_exact(sock, length) if length else b""
+
+
+def socket_in_use(socket_path):
+    """True when a server answers on socket_path (a file left by a crashed server does not)"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def pack_strings(strings):
+    parts = [U32.pack(len(strings))]
+    for s in strings:
+        data = s.encode("utf-8")
+        parts.append(U32.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def unpack_strings(body):
+    (count,) = U32.unpack_from(body, 0)
+    offset = U32.size
+    strings = []
+    for _ in range(count):
+        (length,) = U32.unpack_from(body, offset)
+        offset += U32.size
+        strings.append(body[offset:offset + length].decode("utf-8"))
+        offset += length
+    return strings
+
+
+def pack_matrix(matrix):
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    rows, dim = matrix.shape
+    return struct.pack("<II", rows, dim) + matrix.tobytes()
+
+
+def unpack_matrix(body):
+    rows, dim = struct.unpack_from("<II", body, 0)
+    return np.frombuffer(body, dtype="<f4", count=rows * dim, offset=8).reshape(rows, dim)
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class EncodeBatcher:
+    """
+    Collects encode requests from all connections and runs them through the
+    model together: the first request waits up to max_wait_ms for others to
+    join, then one encode call covers the whole batch.
+    """
+
+    def __init__(self, model, max_batch=256, max_wait_ms=5):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.sentences = 0
+        thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+        thread.start()
+
+    def encode(self, sentences):
+        done = threading.Event()
+        slot = {"sentences": sentences, "done": done}
+        self.requests.put(slot)
+        done.wait()
+        if "error" in slot:
+            raise slot["error"]
+        return slot["result"]
+
+    def _run(self):
+        while True:
+            pending = [self.requests.get()]
+            size = len(pending[0]["sentences"])
+            while size < self.max_batch:
+                try:
+                    slot = self.requests.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                pending.append(slot)
+                size += len(slot["sentences"])
+
+            all_sentences = [s for slot in pending for s in slot["sentences"]]
+            try:
+                embeddings = np.asarray(self.model.encode(all_sentences), dtype=np.float32) if all_sentences else None
+                offset = 0
+                for slot in pending:
+                    n = len(slot["sentences"])
+                    slot["result"] = embeddings[offset:offset + n] if n else np.zeros((0, 0), dtype=np.float32)
+                    offset += n
+                self.batches += 1
+                self.sentences += len(all_sentences)
+            except Exception as e:
+                for slot in pending:
+                    slot["error"] = e
+            for slot in pending:
+                slot["done"].set()
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Every batch worker and API process on the host may connect at once
+    request_queue_size = 128
+
+    def __init__(self, socket_path, encoder_name="all-MiniLM-L6-v2", max_batch=256, max_wait_ms=5):
+        from model_registry import acquire_sentence_transformer
+        if os.path.exists(socket_path) and socket_in_use(socket_path):
+            raise RuntimeError(f"A model server is already listening on {socket_path}")
+        self.socket_path = socket_path
+        print(f"Loading sentence transformer model ({encoder_name})...")
+        self._encoder_handle = acquire_sentence_transformer(encoder_name)
+        self.batcher = EncodeBatcher(self._encoder_handle.value, max_batch, max_wait_ms)
+        self._whisper_handles = {}
+        self._whisper_lock = threading.Lock()
+        if os.path.exists(socket_path):
+            # Left behind by a server that did not shut down cleanly
+            os.remove(socket_path)
+        super().__init__(socket_path, ModelRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def whisper(self, model_size):
+        """Whisper handle for a size, loaded on first request"""
+        from model_registry import acquire_whisper
+        with self._whisper_lock:
+            if model_size not in self._whisper_handles:
+                print(f"Loading Whisper model ({model_size})...")
+                self._whisper_handles[model_size] = acquire_whisper(model_size)
+            return self._whisper_handles[model_size]
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class ModelRequestHandler(socketserver.BaseRequestHandler):
+    """Serves frames on one client connection until it closes"""
+
+    def handle(self):
+        sock = self.request
+        while True:
+            try:
+                opcode, body = recv_frame(sock)
+            except (ConnectionError, OSError, ValueError):
+                # Closed connection or a corrupt frame: the stream cannot be resynchronized
+                return
+            try:
+                if opcode == OP_ENCODE:
+                    embeddings = self.server.batcher.encode(unpack_strings(body))
+                    send_frame(sock, OP_EMBEDDINGS, pack_matrix(embeddings))
+                elif opcode == OP_TRANSCRIBE:
+                    model_size, audio_path = unpack_strings(body)
+                    handle = self.server.whisper(model_size)
+                    with handle.lock:
+                        result = handle.value.transcribe(audio_path)
+                    send_frame(sock, OP_TEXT, result["text"].encode("utf-8"))
+                else:
+                    send_frame(sock, OP_ERROR, f"Unknown opcode {opcode}".encode("utf-8"))
+            except Exception as e:
+                send_frame(sock, OP_ERROR, str(e).encode("utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+class ModelClient:
+    """Persistent, thread-safe connection to a model server"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=300):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _call(self, opcode, body, expected):
+        with self._lock:
+            for attempt in range(2):
+                if self._sock is None:
+                    self._sock = self._connect()
+                try:
+                    send_frame(self._sock, opcode, body)
+                    reply, payload = recv_frame(self._sock)
+                    break
+                except (ConnectionError, BrokenPipeError):
+                    # The server may have restarted; reconnect once
+                    self._sock.close()
+                    self._sock = None
+                    if attempt:
+                        raise
+                except BaseException:
+                    # A timeout or corrupt reply leaves the stream out of step; a reply still
+                    # in flight must never be read as the answer to the next request
+                    self._sock.close()
+                    self._sock = None
+                    raise
+        if reply == OP_ERROR:
+            raise RuntimeError(f"Model server error: {payload.decode('utf-8')}")
+        if reply != expected:
+            raise RuntimeError(f"Unexpected reply opcode {reply}")
+        return payload
+
+    def encode(self, sentences):
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        return unpack_matrix(self._call(OP_ENCODE, pack_strings(list(sentences)), OP_EMBEDDINGS))
+
+    def transcribe(self, audio_path, model_size="base"):
+        body = pack_strings([model_size, os.path.abspath(audio_path)])
+        return self._call(OP_TRANSCRIBE, body, OP_TEXT).decode("utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+
+class RemoteSentenceEncoder:
+    """Drop-in for SentenceTransformer.encode() backed by the model server"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.client = ModelClient(socket_path)
+
+    def encode(self, sentences, **kwargs):
+        return self.client.encode(sentences)
+
+
+class RemoteWhisper:
+    """Drop-in for a Whisper model's transcribe() backed by the model server"""
+
+    def __init__(self, model_size="base", socket_path=DEFAULT_SOCKET):
+        self.model_size = model_size
+        self.client = ModelClient(socket_path)
+
+    def transcribe(self, audio_path, **kwargs):
+        return {"text": self.client.transcribe(audio_path, self.model_size)}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve embeddings and transcription over a Unix socket")
+    arg_parser.add_argument("--socket", default=os.environ.get("SCORING_MODEL_SOCKET", DEFAULT_SOCKET))
+    arg_parser.add_argument("--encoder", default="all-MiniLM-L6-v2")
+    arg_parser.add_argument("--preload-whisper", nargs="*", default=[],
+                            help="Whisper sizes to load at startup (others load on first request)")
+    arg_parser.add_argument("--max-batch", type=int, default=256, help="Max sentences per encode batch")
+    arg_parser.add_argument("--max-wait-ms", type=float, default=5, help="How long a batch waits for more requests")
+    args = arg_parser.parse_args()
+
+    server = ModelServer(args.socket, args.encoder, args.max_batch, args.max_wait_ms)
+    for size in args.preload_whisper:
+        server.whisper(size)
+    print(f"Model server listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
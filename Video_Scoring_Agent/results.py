@@ -0,0 +1,196 @@
+"""
+Results - Compact scoring result types with lazy feedback and direct JSON serialization
+
+calculate_score(..., compact=True) returns these instead of nested dicts. Each
+object keeps only its fields in __slots__; the human-readable feedback string
+is formatted the first time it is read, so bulk callers that only look at
+scores never pay for it. The objects are read-only Mappings, so existing
+code that indexes results["overall_score"] keeps working, and to_json_bytes()
+serializes straight to bytes with orjson when it is installed. Either way the
+document has sorted keys, as Flask's jsonify produced, and NaN/infinity
+become null so the output is valid JSON.
+"""
+import json
+import math
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder produces the same document
+    orjson = None
+
+
+class ResultMapping(Mapping):
+    """Read-only dict view over a slotted result; _pairs() yields keys in output order"""
+
+    __slots__ = ()
+
+    def _pairs(self):
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        for name, value in self._pairs():
+            if name == key:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (name for name, _ in self._pairs())
+
+    def __len__(self):
+        return sum(1 for _ in self._pairs())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self._pairs())!r})"
+
+    def to_dict(self):
+        """Plain nested dicts/lists, identical to the non-compact calculate_score output"""
+        return _plain(self)
+
+    def to_json_bytes(self):
+        """UTF-8 JSON document for this result"""
+        return dumps(self)
+
+
+class MetricResult(ResultMapping):
+    """
+    One metric's result. `fields` holds the metric-specific keys; feedback is
+    either a finished string or a (template, args) pair formatted on first read.
+    """
+
+    __slots__ = ("metric", "score", "max_score", "fields", "_feedback")
+
+    def __init__(self, metric, score, max_score, fields=None, feedback=""):
+        self.metric = metric
+        self.score = score
+        self.max_score = max_score
+        self.fields = fields
+        self._feedback = feedback
+
+    @property
+    def feedback(self):
+        if type(self._feedback) is tuple:
+            template, args = self._feedback
+            self._feedback = template.format(*args)
+        return self._feedback
+
+    def _pairs(self):
+        yield "metric", self.metric
+        yield "score", self.score
+        if self.max_score is not None:
+            yield "max_score", self.max_score
+        if self.fields:
+            yield from self.fields.items()
+        yield "feedback", self.feedback
+
+    def __getitem__(self, key):
+        # Fast paths for the keys the engine itself reads
+        if key == "score":
+            return self.score
+        if key == "metric":
+            return self.metric
+        return ResultMapping.__getitem__(self, key)
+
+
+class CriterionResult(ResultMapping):
+    """Weighted result of one rubric criterion"""
+
+    __slots__ = ("criterion", "weight", "score", "max_score", "weighted_score", "metrics")
+
+    def __init__(self, criterion, weight, score, max_score, weighted_score, metrics):
+        self.criterion = criterion
+        self.weight = weight
+        self.score = score
+        self.max_score = max_score
+        self.weighted_score = weighted_score
+        self.metrics = metrics
+
+    def _pairs(self):
+        yield "criterion", self.criterion
+        yield "weight", self.weight
+        yield "score", self.score
+        yield "max_score", self.max_score
+        yield "weighted_score", self.weighted_score
+        yield "metrics", self.metrics
+
+
+class ScoreResult(ResultMapping):
+    """Top-level result of calculate_score"""
+
+    __slots__ = ("overall_score", "word_count", "criteria_scores", "wpm", "duration_seconds", "degraded")
+
+    def __init__(self, overall_score, word_count, criteria_scores, wpm, duration_seconds, degraded=None):
+        self.overall_score = overall_score
+        self.word_count = word_count
+        self.criteria_scores = criteria_scores
+        self.wpm = wpm
+        self.duration_seconds = duration_seconds
+        # [{"metric", "reason"}] when scored under a latency budget (see deadline.py)
+        self.degraded = degraded
+
+    def _pairs(self):
+        yield "overall_score", self.overall_score
+        yield "word_count", self.word_count
+        yield "criteria_scores", self.criteria_scores
+        yield "metadata", {"wpm": self.wpm, "duration_seconds": self.duration_seconds}
+        if self.degraded is not None:
+            yield "degraded", self.degraded
+
+    def scores_only(self):
+        """
+        Flat projection without feedback or metric details:
+        {"overall_score", "word_count", "criteria": {name: weighted}, "metrics": {name: score}}
+        """
+        scores = {
+            "overall_score": self.overall_score,
+            "word_count": self.word_count,
+            "criteria": {c.criterion: c.weighted_score for c in self.criteria_scores},
+            "metrics": {m.metric: m.score for c in self.criteria_scores for m in c.metrics},
+        }
+        if self.degraded is not None:
+            scores["degraded"] = self.degraded
+        return scores
+
+    def to_json_bytes(self, projection="full"):
+        """UTF-8 JSON document; projection="scores" serializes scores_only()"""
+        return dumps(self.scores_only() if projection == "scores" else self)
+
+
+def _plain(value):
+    if isinstance(value, ResultMapping):
+        return {name: _plain(item) for name, item in value._pairs()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _default(value):
+    """Serializer hook: result objects become shallow dicts, numpy scalars become Python numbers"""
+    if isinstance(value, ResultMapping):
+        return dict(value._pairs())
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _finite(value):
+    """Copy of value with result objects as dicts and non-finite floats as None (orjson does this itself)"""
+    if isinstance(value, ResultMapping):
+        return {name: _finite(item) for name, item in value._pairs()}
+    if isinstance(value, dict):
+        return {name: _finite(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def dumps(value):
+    """JSON bytes for results (or any plain structure containing them), keys sorted"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(_finite(value), default=_default, ensure_ascii=False, separators=(",", ":"),
+                      sort_keys=True, allow_nan=False).encode("utf-8")
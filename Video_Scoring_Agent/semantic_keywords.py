@@ -0,0 +1,113 @@
+"""
+Semantic Keywords - Concept-coverage scoring with precomputed concept embeddings
+
+Each must-have/good-to-have concept of the Keyword Presence metric is described
+by a few prototype sentences. They are embedded once when the rubric is
+compiled into a fixed, L2-normalized float32 matrix; a transcript's sentences
+are encoded in one batch, and a single matrix multiply gives every
+sentence-concept similarity.
+"""
+import re
+import numpy as np
+from scipy import sparse
+
+# How a student typically expresses each rubric concept
+CONCEPT_PROTOTYPES = {
+    "name": ["My name is Rahul", "I am Priya", "Myself Arjun"],
+    "age": ["I am 13 years old", "My age is twelve", "I turned fourteen this year"],
+    "school/class": ["I study in class 8 at Delhi Public School", "I am a student of grade seven",
+                     "I go to St. Mary's school"],
+    "family": ["I live with my parents", "There are four members in my family",
+               "I have a younger brother and my mom and dad"],
+    "hobbies": ["In my free time I like to paint", "My hobby is playing cricket",
+                "I enjoy reading books and dancing"],
+    "about_family": ["My family is very kind and supportive", "My parents are loving and caring"],
+    "origin": ["I am from Chennai", "I reside in Kerala", "My hometown is Jaipur", "I was born in Mumbai"],
+    "ambition": ["I want to become a doctor", "My dream is to be a scientist", "When I grow up I will be an engineer"],
+    "unique_fact": ["A fun fact about me is that I can solve a Rubik's cube",
+                    "Something people don't know about me", "One special thing about me"],
+    "achievements": ["I won the first prize in a quiz competition", "My strength is mathematics",
+                     "I am good at chess and got a medal"],
+}
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(transcript):
+    """Sentences with terminal punctuation kept, empty pieces dropped"""
+    return [s.strip() for s in SENTENCE_SPLIT.split(transcript) if s.strip()]
+
+
+def normalize_rows(matrix):
+    """L2-normalize rows as float32 so a dot product is cosine similarity"""
+    if sparse.issparse(matrix):
+        # Sparse encoders (lite_similarity) stay sparse
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms).astype(np.float32) @ matrix
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class PrototypeMatrix:
+    """
+    Named groups of prototype sentences embedded once into one normalized
+    matrix, rows grouped by name so reduceat can take the best row per group.
+    """
+
+    def __init__(self, groups, model):
+        self.names = list(groups)
+        self.texts = [text for name in self.names for text in groups[name]]
+        sizes = [len(groups[name]) for name in self.names]
+        self._group_starts = np.cumsum([0] + sizes[:-1])
+        self.matrix = normalize_rows(model.encode(self.texts))
+
+    def similarities(self, sentence_embeddings):
+        """(sentences x groups) best cosine similarity of each sentence to each group"""
+        sentence_embeddings = normalize_rows(sentence_embeddings)
+        if sentence_embeddings.shape[0] == 0:
+            return np.zeros((0, len(self.names)), dtype=np.float32)
+        similarities = sentence_embeddings @ self.matrix.T
+        if sparse.issparse(similarities):
+            similarities = similarities.toarray()
+        return np.maximum.reduceat(similarities, self._group_starts, axis=1)
+
+
+class ConceptIndex:
+    """Prototype embeddings for the Keyword Presence concepts of one rubric metric"""
+
+    def __init__(self, metric, model, threshold=0.55, prototypes=None):
+        prototypes = CONCEPT_PROTOTYPES if prototypes is None else prototypes
+        self.threshold = threshold
+        self.concepts = [item["keyword"] for item in metric["must_have"] + metric["good_to_have"]]
+
+        groups = {}
+        for item in metric["must_have"] + metric["good_to_have"]:
+            groups[item["keyword"]] = (prototypes.get(item["keyword"])
+                                       or [f"{item['keyword']}: {', '.join(item['keywords'])}"])
+        self.prototypes = PrototypeMatrix(groups, model)
+
+    def coverage(self, sentence_embeddings):
+        """
+        Best similarity per concept and the index of the sentence that achieved
+        it, from one (sentences x prototypes) matrix multiply.
+        """
+        per_concept = self.prototypes.similarities(sentence_embeddings)
+        if per_concept.shape[0] == 0:
+            zeros = np.zeros(len(self.concepts), dtype=np.float32)
+            return zeros, np.full(len(self.concepts), -1)
+        return per_concept.max(axis=0), per_concept.argmax(axis=0)
+
+    def matches(self, sentence_embeddings):
+        """{concept: (similarity, sentence index)} for concepts at or above the threshold"""
+        best, best_sentence = self.coverage(sentence_embeddings)
+        return {
+            concept: (float(best[i]), int(best_sentence[i]))
+            for i, concept in enumerate(self.concepts)
+            if best[i] >= self.threshold
+        }
@@ -0,0 +1,156 @@
+"""
+Tracing - Lightweight timing spans exportable as Chrome trace-event JSON
+
+Spans opened inside `tracer.trace(trace_id)` are tagged with that id (per thread
+and async context), so one job's spans can be exported or summarized without
+those of jobs running in parallel. SCORING_TRACING=0 turns recording off.
+"""
+import os
+import json
+import time
+import threading
+import functools
+import contextlib
+import contextvars
+from collections import deque
+
+_current_trace = contextvars.ContextVar("trace_id", default=None)
+
+
+class Tracer:
+    """
+    Records completed spans in a bounded buffer. Spans nest naturally: Chrome's
+    trace viewer (chrome://tracing, Perfetto) stacks "complete" events by time
+    on each thread, so no explicit parent links are needed.
+    """
+
+    def __init__(self, max_events=100000, enabled=True):
+        # (trace_id, event) pairs, oldest dropped first
+        self.events = deque(maxlen=max_events)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+
+    def span(self, name, category="pipeline", **args):
+        """Context manager timing the enclosed block"""
+        return _Span(self, name, category, args)
+
+    @contextlib.contextmanager
+    def trace(self, trace_id):
+        """Tag spans opened in the enclosed block (on this thread/context) with trace_id"""
+        token = _current_trace.set(trace_id)
+        try:
+            yield trace_id
+        finally:
+            _current_trace.reset(token)
+
+    @staticmethod
+    def current_trace():
+        """Trace id of the enclosing trace() block, or None"""
+        return _current_trace.get()
+
+    def _record(self, name, category, start_ns, end_ns, args):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._origin_ns) / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        trace_id = _current_trace.get()
+        with self._lock:
+            self.events.append((trace_id, event))
+
+    def reset(self, trace_id=None):
+        """Drop recorded spans: those of one trace, or all of them"""
+        with self._lock:
+            if trace_id is None:
+                self.events.clear()
+            else:
+                kept = [entry for entry in self.events if entry[0] != trace_id]
+                self.events.clear()
+                self.events.extend(kept)
+
+    def _events(self, trace_id=None):
+        """Recorded events, only those of one trace when trace_id is given"""
+        with self._lock:
+            return [event for entry_trace, event in self.events if trace_id is None or entry_trace == trace_id]
+
+    def export_chrome_trace(self, output_path, trace_id=None):
+        """Write spans (of one trace, or all) in the Chrome trace-event JSON format"""
+        events = self._events(trace_id)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return output_path
+
+    def summary(self, trace_id=None):
+        """Per-span-name call counts and total/mean wall time in ms, slowest first"""
+        events = self._events(trace_id)
+        totals = {}
+        for event in events:
+            entry = totals.setdefault(event["name"], {"name": event["name"], "count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += event["dur"] / 1000.0
+        rows = sorted(totals.values(), key=lambda e: e["total_ms"], reverse=True)
+        for row in rows:
+            row["mean_ms"] = round(row["total_ms"] / row["count"], 3)
+            row["total_ms"] = round(row["total_ms"], 3)
+        return rows
+
+    def format_summary(self, trace_id=None):
+        """Summary as aligned text lines for logs and reports"""
+        rows = self.summary(trace_id)
+        if not rows:
+            return "No spans recorded."
+        width = max(len(row["name"]) for row in rows)
+        lines = [f"{'Span'.ljust(width)}  {'Calls':>6}  {'Total ms':>10}  {'Mean ms':>10}"]
+        for row in rows:
+            lines.append(f"{row['name'].ljust(width)}  {row['count']:>6}  {row['total_ms']:>10.1f}  {row['mean_ms']:>10.1f}")
+        return "\n".join(lines)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start_ns")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.tracer.enabled:
+            if exc_type is not None:
+                self.args["error"] = exc_type.__name__
+            self.tracer._record(self.name, self.category, self.start_ns, time.perf_counter_ns(), self.args)
+        return False
+
+
+# Process-wide tracer shared by the scoring engine, agents and API
+tracer = Tracer(enabled=os.environ.get("SCORING_TRACING", "1") != "0")
+
+
+def span(name, category="pipeline", **args):
+    """Time a block on the process-wide tracer"""
+    return tracer.span(name, category, **args)
+
+
+def traced(name=None, category="pipeline"):
+    """Decorator recording a span around every call of the function"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,184 @@
+"""
+Admission - Priority queues, weighted fair scheduling and load shedding for scoring work
+
+Requests are admitted into one bounded queue per priority class ("interactive"
+for people waiting on a page, "bulk" for batch clients) and executed by a fixed
+pool of scoring workers. Workers pick the next class by stride scheduling: each
+class advances a virtual clock by 1/weight per job, so under contention an
+interactive:bulk weight of 4:1 yields four interactive jobs per bulk job, and an
+idle class's share goes to the other.
+
+Requests are refused up front instead of waiting in unbounded queues:
+
+    429  the client already has `per_client_limit` requests queued or running
+    503  the class queue is full, or its estimated wait exceeds the class's max wait
+
+Both carry a Retry-After estimate from queue depth and the recent average
+service time. stats() exports queue depths, running jobs, and admitted,
+completed and shed counts per class.
+"""
+import math
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+PRIORITIES = ("interactive", "bulk")
+
+
+class Rejected(Exception):
+    """Request refused at admission; status is the HTTP status to answer with"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class PriorityClass:
+    """One bounded queue with its scheduling weight and counters"""
+
+    def __init__(self, name, queue_limit, weight, max_wait_seconds=None):
+        self.name = name
+        self.queue_limit = queue_limit
+        self.weight = weight
+        self.max_wait_seconds = max_wait_seconds
+        self.queue = deque()
+        self.virtual_time = 0.0
+        self.running = 0
+        self.admitted = 0
+        self.completed = 0
+        self.shed = {"queue_full": 0, "wait_too_long": 0, "client_limit": 0}
+
+    def stats(self):
+        return {
+            "queued": len(self.queue),
+            "queue_limit": self.queue_limit,
+            "running": self.running,
+            "weight": self.weight,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "shed": dict(self.shed),
+        }
+
+
+class AdmissionController:
+    """Runs submitted callables on `workers` threads under per-class and per-client limits"""
+
+    def __init__(self, workers=2, queue_limits=None, weights=None, max_wait_seconds=None,
+                 per_client_limit=4):
+        queue_limits = {"interactive": 64, "bulk": 16, **(queue_limits or {})}
+        weights = {"interactive": 4, "bulk": 1, **(weights or {})}
+        max_wait_seconds = {"interactive": 10.0, "bulk": None, **(max_wait_seconds or {})}
+        self.classes = {name: PriorityClass(name, queue_limits[name], weights[name], max_wait_seconds[name])
+                        for name in PRIORITIES}
+        self.workers = workers
+        self.per_client_limit = per_client_limit
+        self._in_flight = {}
+        self._service_seconds = 0.05
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._work, name=f"scoring-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _estimated_wait(self, priority_class):
+        """Seconds until a newly queued job of this class would start (rough, from its share of workers)"""
+        share = priority_class.weight / sum(c.weight for c in self.classes.values()
+                                            if c is priority_class or c.queue or c.running)
+        ahead = len(priority_class.queue) + 1
+        return ahead * self._service_seconds / max(self.workers * share, 1e-9)
+
+    def _retry_after(self, priority_class):
+        return max(1, math.ceil(self._estimated_wait(priority_class)))
+
+    def submit(self, fn, priority="interactive", client_id=None):
+        """Queue fn() and return a Future, or raise Rejected"""
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+        with self._cond:
+            if self._closed:
+                raise Rejected(503, "Scoring service is shutting down", 5)
+            priority_class = self.classes[priority]
+            if client_id is not None and self._in_flight.get(client_id, 0) >= self.per_client_limit:
+                priority_class.shed["client_limit"] += 1
+                raise Rejected(429, f"Too many concurrent requests for client {client_id} "
+                                    f"(limit {self.per_client_limit})", self._retry_after(priority_class))
+            if len(priority_class.queue) >= priority_class.queue_limit:
+                priority_class.shed["queue_full"] += 1
+                raise Rejected(503, f"{priority} queue is full", self._retry_after(priority_class))
+            wait = self._estimated_wait(priority_class)
+            if priority_class.max_wait_seconds is not None and wait > priority_class.max_wait_seconds:
+                priority_class.shed["wait_too_long"] += 1
+                raise Rejected(503, f"Estimated {priority} wait {wait:.1f}s exceeds "
+                                    f"{priority_class.max_wait_seconds:g}s", math.ceil(wait))
+
+            if not priority_class.queue and not priority_class.running:
+                # A class returning from idle starts at the current virtual time, without banked credit
+                busy = [c.virtual_time for c in self.classes.values() if c.queue or c.running]
+                priority_class.virtual_time = max(priority_class.virtual_time, min(busy, default=0.0))
+            future = Future()
+            priority_class.queue.append((fn, future, client_id))
+            priority_class.admitted += 1
+            if client_id is not None:
+                self._in_flight[client_id] = self._in_flight.get(client_id, 0) + 1
+            self._cond.notify()
+            return future
+
+    def run(self, fn, priority="interactive", client_id=None):
+        """submit() and wait for the result (exceptions from fn propagate)"""
+        return self.submit(fn, priority, client_id).result()
+
+    def _next_job(self):
+        """Pop from the non-empty class with the smallest virtual time (caller holds the lock)"""
+        ready = [c for c in self.classes.values() if c.queue]
+        if not ready:
+            return None, None
+        priority_class = min(ready, key=lambda c: c.virtual_time)
+        priority_class.virtual_time += 1.0 / priority_class.weight
+        priority_class.running += 1
+        return priority_class, priority_class.queue.popleft()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                priority_class, job = self._next_job()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    priority_class, job = self._next_job()
+            fn, future, client_id = job
+            started = time.perf_counter()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn())
+                except BaseException as e:
+                    future.set_exception(e)
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                priority_class.running -= 1
+                priority_class.completed += 1
+                self._service_seconds += 0.1 * (elapsed - self._service_seconds)
+                if client_id is not None:
+                    self._in_flight[client_id] -= 1
+                    if not self._in_flight[client_id]:
+                        del self._in_flight[client_id]
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "per_client_limit": self.per_client_limit,
+                "avg_service_ms": round(self._service_seconds * 1000, 2),
+                "clients_in_flight": len(self._in_flight),
+                "classes": {name: c.stats() for name, c in self.classes.items()},
+            }
+
+    def close(self):
+        """Stop accepting work; workers exit once the queues are drained"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
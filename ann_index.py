@@ -0,0 +1,386 @@
+"""
+ANN Index - Memory-mapped IVF index over introduction embeddings
+
+Each introduction is embedded as the normalized mean of its sentence
+embeddings (the same MiniLM sentence vectors the engine already computes,
+so long introductions are not truncated at the model's token limit).
+
+The index is an inverted file (IVF): spherical k-means splits the vectors into
+`nlist` clusters and a query scans only the `nprobe` clusters whose centroids
+are closest, scoring those members exactly. On disk it is a directory:
+
+    index.json     dimensions, cluster count, row counts
+    vectors.f32    float32 rows, memory-mapped for queries
+    lists.i32      cluster of each row
+    ids.txt        one id per row
+    centroids.npy  cluster centroids
+
+train() clusters the stored vectors and rewrites the rows grouped by cluster,
+so each probed cluster is one contiguous slice of the memory map. Rows added
+afterwards are appended and assigned to their nearest centroid; they are
+grouped in memory until the next train(). Before the first train() search is
+an exact scan; add() starts it on a background thread once `train_size`
+vectors are stored.
+
+Searches and adds are not blocked while train() clusters: the rewritten files
+are written under *.tmp names and switched in at the end. A train.json
+journal written before the switch makes it crash-safe: reopening an index
+finishes a journaled switch, and discards the *.tmp files of a train() that
+never reached it.
+
+Run `python ann_index.py --benchmark 100000 1000000` for recall/latency numbers.
+"""
+import os
+import json
+import time
+import argparse
+import threading
+import numpy as np
+from analysis_context import AnalysisContext
+
+CHUNK_ROWS = 65536
+# Files rewritten by train(), switched in together under the train.json journal
+TRAIN_FILES = ("vectors.f32", "lists.i32", "ids.txt", "centroids.npy")
+
+
+def introduction_embedding(model, transcript):
+    """Normalized mean of the transcript's sentence embeddings (float32), or None without sentences"""
+    embeddings = AnalysisContext(transcript, model).embeddings
+    if len(embeddings) == 0:
+        return None
+    vector = embeddings.mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return (vector / norm).astype(np.float32) if norm else None
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, best first"""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """Unit-norm centroids maximizing cosine similarity to their members"""
+    rng = np.random.RandomState(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        clusters, starts = np.unique(assignments[order], return_index=True)
+        sums = np.zeros_like(centroids)
+        sums[clusters] = np.add.reduceat(vectors[order], starts)
+        empty = np.flatnonzero(np.bincount(assignments, minlength=n_clusters) == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def assign(vectors, centroids):
+    """Nearest centroid of every row, computed in chunks"""
+    result = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + CHUNK_ROWS], dtype=np.float32)
+        result[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return result
+
+
+class IVFIndex:
+    """Disk-backed, thread-safe IVF index; search() returns [(id, cosine similarity)] best first"""
+
+    def __init__(self, path, dim=384, nlist=1024, nprobe=16, train_size=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self._file("train.json")):
+            # A train() crashed after committing: its files are complete, finish the switch
+            with open(self._file("train.json"), encoding="utf-8") as f:
+                self._switch_trained_files(json.load(f))
+        for name in TRAIN_FILES + ("index.json", "train.json"):
+            if os.path.exists(self._file(name + ".tmp")):
+                os.remove(self._file(name + ".tmp"))
+        meta_path = os.path.join(path, "index.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        else:
+            meta = {"dim": dim, "nlist": nlist, "count": 0, "sorted": 0, "trained": False}
+        self.dim = meta["dim"]
+        self.nlist = meta["nlist"]
+        self.count = meta["count"]
+        self.sorted_count = meta["sorted"]
+        self.trained = meta["trained"]
+        self.nprobe = nprobe
+        self.train_size = train_size if train_size is not None else 40 * self.nlist
+
+        # Rows past `count` were written by an interrupted add(); drop them so appends stay aligned
+        with open(self._file("ids.txt"), "a+", encoding="utf-8") as f:
+            f.seek(0)
+            self.ids = [line.rstrip("\n") for _, line in zip(range(self.count), f)]
+            f.seek(0, os.SEEK_END)
+            if f.tell() > sum(len(i.encode("utf-8")) + 1 for i in self.ids):
+                f.truncate(sum(len(i.encode("utf-8")) + 1 for i in self.ids))
+        for name, row_bytes in (("vectors.f32", 4 * self.dim), ("lists.i32", 4)):
+            with open(self._file(name), "ab") as f:
+                if f.tell() > self.count * row_bytes:
+                    f.truncate(self.count * row_bytes)
+        self.centroids = np.load(self._file("centroids.npy")) if self.trained else None
+        self._vectors = None
+        self._tail = None
+        self._offsets = None
+        self._lock = threading.RLock()
+        self._train_lock = threading.Lock()
+        self._training = None
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def __len__(self):
+        return self.count
+
+    def _write_json(self, name, obj):
+        with open(self._file(name + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._file(name + ".tmp"), self._file(name))
+
+    def _save_meta(self):
+        self._write_json("index.json", {"dim": self.dim, "nlist": self.nlist, "count": self.count,
+                                        "sorted": self.sorted_count, "trained": self.trained})
+
+    def vectors(self):
+        """Read-only memory map of the stored rows"""
+        if self._vectors is None or len(self._vectors) != self.count:
+            self._vectors = (np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r",
+                                       shape=(self.count, self.dim))
+                             if self.count else np.zeros((0, self.dim), dtype=np.float32))
+        return self._vectors
+
+    def _lists(self):
+        """(offsets of the sorted clusters, {cluster: tail rows}) built from lists.i32"""
+        if self._offsets is None:
+            assignments = np.fromfile(self._file("lists.i32"), dtype=np.int32, count=self.count)
+            counts = np.bincount(assignments[:self.sorted_count], minlength=self.nlist)
+            self._offsets = np.concatenate([[0], np.cumsum(counts)])
+            self._tail = {}
+            for row, cluster in enumerate(assignments[self.sorted_count:].tolist(), start=self.sorted_count):
+                self._tail.setdefault(cluster, []).append(row)
+        return self._offsets, self._tail
+
+    def add(self, ids, vectors):
+        """Append vectors (normalized here) under ids; starts training in the background at train_size rows"""
+        vectors = _normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        ids = [str(i) for i in ids]
+        with self._lock:
+            self._add(ids, vectors)
+            if not self.trained and self.count >= self.train_size and self._training is None:
+                self._training = threading.Thread(target=self._train_in_background, name="ivf-train",
+                                                  daemon=True)
+                self._training.start()
+
+    def _train_in_background(self):
+        try:
+            self.train()
+        except Exception as e:
+            # Search stays exact; the next add() tries again
+            print(f"[ANNIndex] Training failed: {e}")
+        finally:
+            with self._lock:
+                self._training = None
+
+    def join_training(self, timeout=None):
+        """Wait for a background train() started by add(), if any"""
+        training = self._training
+        if training is not None:
+            training.join(timeout)
+
+    def _add(self, ids, vectors):
+        assignments = (assign(vectors, self.centroids) if self.trained
+                       else np.full(len(vectors), -1, dtype=np.int32))
+
+        with open(self._file("vectors.f32"), "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._file("lists.i32"), "ab") as f:
+            f.write(assignments.tobytes())
+        with open(self._file("ids.txt"), "a", encoding="utf-8") as f:
+            f.writelines(f"{i}\n" for i in ids)
+        if self._tail is not None:
+            for row, cluster in enumerate(assignments.tolist(), start=self.count):
+                self._tail.setdefault(cluster, []).append(row)
+        self.ids.extend(ids)
+        self.count += len(ids)
+        self._save_meta()
+
+    def train(self, sample_size=None, iterations=10):
+        """
+        Cluster the stored vectors and rewrite the rows grouped by cluster. Only the
+        final switch to the rewritten files holds the index lock.
+        """
+        with self._train_lock:
+            self._train(sample_size, iterations)
+
+    def _train(self, sample_size, iterations):
+        with self._lock:
+            # Rows [0, count) are append-only until the switch below, so they can be read unlocked
+            count = self.count
+            vectors = self.vectors()
+            ids = self.ids[:count]
+        if count < self.nlist:
+            raise ValueError(f"Need at least nlist={self.nlist} vectors to train, have {count}")
+        sample_size = sample_size or max(64 * self.nlist, 50000)
+        rng = np.random.RandomState(0)
+        sample = np.sort(rng.choice(count, min(sample_size, count), replace=False))
+        started = time.perf_counter()
+        centroids = spherical_kmeans(np.asarray(vectors[sample]), self.nlist, iterations)
+        assignments = assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+
+        # Rewrite rows in cluster order so every cluster is one contiguous slice
+        vectors_tmp = open(self._file("vectors.f32.tmp"), "wb")
+        with vectors_tmp:
+            for start in range(0, count, CHUNK_ROWS):
+                vectors_tmp.write(np.asarray(vectors[order[start:start + CHUNK_ROWS]]).tobytes())
+
+            with self._lock:
+                # Rows added while clustering follow as unsorted tail rows of the new layout
+                late = np.asarray(self.vectors()[count:self.count])
+                late_assignments = assign(late, centroids) if len(late) else np.zeros(0, dtype=np.int32)
+                vectors_tmp.write(late.tobytes())
+                vectors_tmp.flush()
+                os.fsync(vectors_tmp.fileno())
+                new_ids = [ids[row] for row in order.tolist()] + self.ids[count:]
+                with open(self._file("lists.i32.tmp"), "wb") as f:
+                    f.write(assignments[order].tobytes())
+                    f.write(late_assignments.tobytes())
+                    os.fsync(f.fileno())
+                with open(self._file("ids.txt.tmp"), "w", encoding="utf-8") as f:
+                    f.writelines(f"{i}\n" for i in new_ids)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._file("centroids.npy.tmp"), "wb") as f:
+                    np.save(f, centroids)
+                    os.fsync(f.fileno())
+
+                meta = {"dim": self.dim, "nlist": self.nlist, "count": self.count,
+                        "sorted": count, "trained": True}
+                # The commit point: from here on, reopening completes the switch
+                self._write_json("train.json", meta)
+                self._switch_trained_files(meta)
+
+                self.centroids = centroids
+                self.ids = new_ids
+                self.trained = True
+                self.sorted_count = count
+                self._vectors = None
+                self._offsets = None
+                self._tail = None
+        print(f"[ANNIndex] Trained {self.nlist} clusters over {count} vectors "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    def _switch_trained_files(self, meta):
+        """Move train()'s rewritten files into place, then the metadata, then drop the journal"""
+        for name in TRAIN_FILES:
+            if os.path.exists(self._file(name + ".tmp")):
+                os.replace(self._file(name + ".tmp"), self._file(name))
+        self._write_json("index.json", meta)
+        os.remove(self._file("train.json"))
+
+    def search(self, vector, k=10, nprobe=None):
+        """[(id, similarity)] of the k stored vectors most similar to `vector`"""
+        query = _normalize(vector)[0]
+        with self._lock:
+            return self._search(query, k, nprobe or self.nprobe)
+
+    def _search(self, query, k, nprobe):
+        vectors = self.vectors()
+        if not self.trained:
+            scores = np.concatenate([np.asarray(vectors[start:start + CHUNK_ROWS]) @ query
+                                     for start in range(0, self.count, CHUNK_ROWS)] or [np.zeros(0)])
+            rows = _top_k(scores, k)
+            return [(self.ids[row], round(float(scores[row]), 4)) for row in rows]
+
+        offsets, tail = self._lists()
+        probes = _top_k(self.centroids @ query, nprobe)
+        rows = []
+        scores = []
+        for cluster in probes.tolist():
+            start, end = offsets[cluster], offsets[cluster + 1]
+            if end > start:
+                rows.append(np.arange(start, end))
+                scores.append(vectors[start:end] @ query)
+            if cluster in tail:
+                members = np.array(tail[cluster])
+                rows.append(members)
+                scores.append(vectors[members] @ query)
+        if not rows:
+            return []
+        rows = np.concatenate(rows)
+        scores = np.concatenate(scores)
+        best = _top_k(scores, k)
+        return [(self.ids[row], round(float(scores[i]), 4)) for i, row in zip(best.tolist(), rows[best].tolist())]
+
+
+def _clustered_vectors(n, dim, rng, centers):
+    """Synthetic unit vectors around shared topic centres, like embeddings of similar introductions"""
+    labels = rng.randint(0, len(centers), n)
+    return _normalize(centers[labels] + rng.normal(scale=1.0 / np.sqrt(dim), size=(n, dim)).astype(np.float32))
+
+
+def benchmark(sizes, dim=384, queries=200, k=10, root="ann_benchmark"):
+    import shutil
+    rng = np.random.RandomState(0)
+    centers = _normalize(rng.normal(size=(2000, dim)))
+    print(f"{'vectors':>9} {'nlist':>6} {'nprobe':>6} {'recall@10':>9} {'p50 ms':>7} {'p95 ms':>7} {'exact ms':>8}")
+    for size in sizes:
+        path = os.path.join(root, str(size))
+        shutil.rmtree(path, ignore_errors=True)
+        nlist = max(64, int(np.sqrt(size)))
+        index = IVFIndex(path, dim=dim, nlist=nlist, train_size=size + 1)
+        for start in range(0, size, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, size - start)
+            index.add(range(start, start + n), _clustered_vectors(n, dim, rng, centers))
+        index.train()
+        probes = _clustered_vectors(queries, dim, rng, centers)
+
+        vectors = index.vectors()
+        truth = []
+        started = time.perf_counter()
+        for query in probes:
+            scores = np.concatenate([np.asarray(vectors[s:s + CHUNK_ROWS]) @ query
+                                     for s in range(0, size, CHUNK_ROWS)])
+            truth.append({index.ids[row] for row in _top_k(scores, k)})
+        exact_ms = (time.perf_counter() - started) / queries * 1000
+
+        for nprobe in (4, 16, 64):
+            latencies = []
+            hits = 0
+            for query, expected in zip(probes, truth):
+                started = time.perf_counter()
+                found = index.search(query, k, nprobe)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += len(expected & {doc_id for doc_id, _ in found})
+            print(f"{size:>9} {nlist:>6} {nprobe:>6} {hits / (k * queries):>9.3f} "
+                  f"{np.percentile(latencies, 50):>7.2f} {np.percentile(latencies, 95):>7.2f} {exact_ms:>8.1f}")
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="IVF index recall/latency benchmark")
+    arg_parser.add_argument("--benchmark", type=int, nargs="+", default=[100000, 1000000],
+                            help="Index sizes to benchmark")
+    arg_parser.add_argument("--dim", type=int, default=384)
+    args = arg_parser.parse_args()
+    benchmark(args.benchmark, args.dim)
@@ -1,22 +1,90 @@
 """
 Flask REST API for Communication Skills Scoring
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from rubric_parser import RubricParser
 from scoring_engine import ScoringEngine
+from batch_engine import BatchScoringEngine
+from model_registry import registry, acquire_rubric_parser
+from score_store import ScoreStore, rubric_version
+from near_duplicates import NearDuplicateIndex, ResultCache, text_digest
+from results import dumps
+from ann_index import IVFIndex, introduction_embedding
+from admission import AdmissionController, Rejected, PRIORITIES
+from video_jobs import VideoJobQueue, UploadTooLarge, PathJobsDisabled, ArtifactsMissing
+from werkzeug.exceptions import RequestEntityTooLarge
+from batch_stream import read_items, check_item, stream_results
+from chunked_scoring import ChunkedScorer, iter_decoded
+from itertools import chain
+import atexit
 import json
+import time
+import os
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
 
 # Initialize parser and scoring engine
 print("Initializing rubric parser...")
-parser = RubricParser()
+parser = acquire_rubric_parser().value
 rubrics = parser.get_rubrics()
 
 print("Initializing scoring engine...")
-scorer = ScoringEngine(rubrics)
+scorer = ScoringEngine(
+    rubrics,
+    semantic_keywords=os.environ.get("SCORING_SEMANTIC_KEYWORDS") == "1",
+    shared_embeddings=os.environ.get("SCORING_SHARED_EMBEDDINGS") == "1",
+    similarity_backend=os.environ.get("SCORING_SIMILARITY_BACKEND", "minilm")
+)
+batch_scorer = BatchScoringEngine(scorer)
+# Very long transcripts (hour-long sessions) are scored window by window in bounded memory
+chunked_scorer = ChunkedScorer(scorer, window_chars=int(os.environ.get("SCORING_CHUNK_CHARS", "32768")))
+CHUNKED_THRESHOLD_CHARS = int(os.environ.get("SCORING_CHUNKED_THRESHOLD", "100000"))
+rubrics_version = rubric_version(rubrics)
+
+# Cohort score history for rank/top-k/histogram queries
+score_store = ScoreStore(os.environ.get("SCORING_DB", "scores.db"))
+atexit.register(score_store.close)
+
+# Near-duplicate/template detection over the most recent transcripts scored by this
+# process (oldest evicted first), and result reuse for transcripts submitted again verbatim
+duplicate_index = NearDuplicateIndex(max_entries=int(os.environ.get("SCORING_DUPLICATE_ENTRIES", "20000")))
+result_cache = ResultCache()
+
+# Scoring runs on a worker pool behind per-priority queues (interactive before bulk) and
+# per-client limits; overload is answered early with 429/503 + Retry-After
+admission = AdmissionController(
+    workers=int(os.environ.get("SCORING_WORKERS", "2")),
+    queue_limits={"interactive": int(os.environ.get("SCORING_INTERACTIVE_QUEUE", "64")),
+                  "bulk": int(os.environ.get("SCORING_BULK_QUEUE", "16"))},
+    per_client_limit=int(os.environ.get("SCORING_CLIENT_LIMIT", "4"))
+)
+atexit.register(admission.close)
+
+# Video scoring jobs (queued in SQLite, run by workers holding the Whisper/MiniLM models)
+video_jobs = VideoJobQueue(
+    os.environ.get("SCORING_JOBS_DIR", "video_jobs"),
+    workers=int(os.environ.get("SCORING_VIDEO_WORKERS", "1")),
+    max_upload_bytes=int(os.environ.get("SCORING_MAX_UPLOAD_MB", "2048")) << 20,
+    video_root=os.environ.get("SCORING_VIDEO_ROOT")
+)
+# Werkzeug parses (and spools) a multipart body before the view runs: refuse oversized
+# bodies up front, leaving 1 MB for multipart headers and other fields
+app.config['MAX_CONTENT_LENGTH'] = video_jobs.max_upload_bytes + (1 << 20)
+# The debug reloader's parent process only watches files; jobs run in the serving process
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    video_jobs.start()
+atexit.register(video_jobs.close)
+
+# Optional "similar past introductions" index (SCORING_ANN_INDEX=<directory>); needs sentence embeddings
+ann_index = None
+if os.environ.get("SCORING_ANN_INDEX"):
+    if os.environ.get("SCORING_SIMILARITY_BACKEND") == "lite":
+        print("SCORING_ANN_INDEX needs sentence embeddings; ignored with the lite backend")
+    else:
+        ann_index = IVFIndex(os.environ["SCORING_ANN_INDEX"],
+                             dim=len(introduction_embedding(scorer.model, "Hello everyone.")))
+        print(f"Similar-introduction index: {len(ann_index)} vectors")
 print("API ready!")
 
 @app.route('/', methods=['GET'])
@@ -28,10 +96,33 @@ def home():
         "endpoints": {
             "/api/score": "POST - Score a transcript",
             "/api/rubrics": "GET - Get rubrics",
-            "/api/sample": "GET - Get sample transcript"
+            "/api/sample": "GET - Get sample transcript",
+            "/api/models": "GET - Loaded models and their memory",
+            "/api/score/batch": "POST - Score many transcripts, streamed back as NDJSON",
+            "/api/score/chunked": "POST - Score a very long plain-text transcript, read as a stream",
+            "/api/similar": "POST - Most similar past introductions (needs SCORING_ANN_INDEX)",
+            "/api/admission": "GET - Scoring queue depths, running jobs and shed counts",
+            "/api/jobs": "POST - Queue a video for scoring (multipart 'video', raw video body, or {\"path\": ...})",
+            "/api/jobs/<job_id>": "GET - Video job status",
+            "/api/jobs/<job_id>/results": "GET - Scores and transcript of a finished video job (?format=report)",
+            "/api/cohorts/<cohort>/rank/<student_id>": "GET - Rank and percentile within a cohort",
+            "/api/cohorts/<cohort>/top": "GET - Top scores in a cohort (?k=10)",
+            "/api/cohorts/<cohort>/histogram": "GET - Score distribution of a cohort (?bins=10)"
         }
     })
 
+def client_identity():
+    """Client key for per-client concurrency limits"""
+    return request.headers.get('X-Client-Id') or request.remote_addr or "anonymous"
+
+def request_priority(default="interactive"):
+    """Priority class from the X-Priority header or ?priority= (interactive or bulk)"""
+    priority = request.headers.get('X-Priority') or request.args.get('priority') or default
+    return priority if priority in PRIORITIES else default
+
+def rejected_response(rejection):
+    return jsonify({"error": rejection.reason}), rejection.status, {"Retry-After": str(rejection.retry_after)}
+
 @app.route('/api/score', methods=['POST'])
 def score_transcript():
     """
@@ -39,8 +130,19 @@ def score_transcript():
     Request body:
     {
         "transcript": "text to score",
-        "duration_seconds": 60 (optional)
+        "duration_seconds": 60 (optional),
+        "student_id": "s-123", "cohort": "2024-spring" (optional, records the score),
+        "transcript_id": "t-1" (optional, id reported to later near-duplicates),
+        "budget_ms": 100 (optional latency budget, also ?budget_ms=),
+        "chunked": true (optional, score window by window; see /api/score/chunked)
     }
+    Query: ?fields=scores returns only overall/criterion/metric scores
+    Under a budget, skipped or sampled metrics are listed in "degraded"
+    Transcripts over SCORING_CHUNKED_THRESHOLD characters are always chunked (no budget applies)
+    Headers: X-Priority: interactive (default) | bulk, X-Client-Id: per-client limit key
+    Overload: 429 (client limit) or 503 (queue full / wait too long) with Retry-After
+    Transcripts matching earlier ones get a "duplicates" key:
+    {"exact_match": id or null, "near_duplicates": [{"id", "similarity"}]}
     """
     try:
         data = request.get_json()
@@ -58,17 +160,234 @@ def score_transcript():
             }), 400
         
         duration_seconds = data.get('duration_seconds', None)
+        budget_ms = data.get('budget_ms', request.args.get('budget_ms', type=float))
+        chunked = bool(data.get('chunked')) or len(transcript) > CHUNKED_THRESHOLD_CHARS
         
-        # Score the transcript
-        results = scorer.calculate_score(transcript, duration_seconds)
-        
-        return jsonify(results), 200
+        # Score the transcript (verbatim resubmissions reuse the earlier result)
+        cache_variant = "chunked" if chunked else None
+        results = result_cache.get(transcript, duration_seconds, cache_variant)
+        embedding = None
+        if results is None:
+            admitted_at = time.perf_counter()
+
+            def score():
+                if chunked:
+                    # An hour-long session is not an introduction: no similar-introduction vector
+                    return chunked_scorer.score_text(transcript, duration_seconds, compact=True), None
+                # Time spent queued counts against the latency budget
+                remaining = None if budget_ms is None else \
+                    max(float(budget_ms) - (time.perf_counter() - admitted_at) * 1000, 0.0)
+                scored = scorer.calculate_score(transcript, duration_seconds, compact=True, budget_ms=remaining)
+                vector = introduction_embedding(scorer.model, transcript) if ann_index is not None else None
+                return scored, vector
+
+            try:
+                results, embedding = admission.run(score, request_priority(), client_identity())
+            except Rejected as rejection:
+                return rejected_response(rejection)
+            if not results.degraded:
+                result_cache.put(transcript, duration_seconds, results, cache_variant)
+
+        doc_id = data.get('transcript_id') or data.get('student_id') or text_digest(transcript)[:12]
+        duplicates = duplicate_index.check(str(doc_id), transcript)
+        if data.get('student_id') is not None and data.get('cohort') is not None:
+            score_store.record(data['student_id'], data['cohort'], rubrics_version, results)
+        if embedding is not None and duplicates["exact_match"] is None:
+            ann_index.add([doc_id], embedding)
+        projection = request.args.get('fields', 'full')
+
+        if duplicates["exact_match"] is None and not duplicates["near_duplicates"]:
+            return Response(results.to_json_bytes(projection), status=200, mimetype='application/json')
+        payload = results.scores_only() if projection == "scores" else dict(results)
+        payload["duplicates"] = duplicates
+        return Response(dumps(payload), status=200, mimetype='application/json')
     
     except Exception as e:
         return jsonify({
             "error": f"Error scoring transcript: {str(e)}"
         }), 500
 
+@app.route('/api/score/chunked', methods=['POST'])
+def score_chunked():
+    """
+    Score a very long transcript sent as the raw request body (text/plain, UTF-8).
+    The body is read and scored window by window, so memory does not grow with its length
+    and the transcript is never held whole (no duplicate check or result cache).
+    Query: ?duration_seconds=3600, ?fields=scores, ?student_id=&cohort= (records the score)
+    Runs at bulk priority unless X-Priority says otherwise
+    """
+    duration_seconds = request.args.get('duration_seconds', type=float)
+    stream = request.stream
+    try:
+        results = admission.run(lambda: chunked_scorer.score(iter_decoded(stream), duration_seconds, compact=True),
+                                request_priority("bulk"), client_identity())
+    except Rejected as rejection:
+        return rejected_response(rejection)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error scoring transcript: {str(e)}"}), 500
+    if request.args.get('student_id') and request.args.get('cohort'):
+        score_store.record(request.args['student_id'], request.args['cohort'], rubrics_version, results)
+    return Response(results.to_json_bytes(request.args.get('fields', 'full')), status=200,
+                    mimetype='application/json')
+
+@app.route('/api/score/batch', methods=['POST'])
+def score_batch():
+    """
+    Score many transcripts; results stream back as newline-delimited JSON, one line per
+    input in input order, each written as soon as its micro-batch is scored:
+    {"index": 0, "id": "t-1", "result": {...}} or {"index": 1, "id": null, "error": "..."}
+    Request body: NDJSON (Content-Type: application/x-ndjson), one
+    {"transcript", "duration_seconds", "id", "student_id", "cohort"} object per line
+    (read incrementally), or JSON {"transcripts": [...]} of the same objects
+    Query: ?fields=scores, ?batch_size=16 (transcripts per micro-batch, 1-256)
+    Runs at bulk priority unless X-Priority says otherwise; 429/503 are only returned
+    before the first line, after which overload slows the stream down instead
+    """
+    if request.mimetype == 'application/json':
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('transcripts'), list):
+            return jsonify({"error": "Expected {\"transcripts\": [...]} or an NDJSON body"}), 400
+        items = (check_item(item) for item in data['transcripts'])
+    else:
+        items = read_items(request.stream)
+    batch_size = min(max(request.args.get('batch_size', 16, type=int), 1), 256)
+    priority, client_id = request_priority("bulk"), client_identity()
+    streaming = []
+
+    def submit(batch):
+        def score():
+            texts = [item['transcript'].strip() for item in batch]
+            durations = [item.get('duration_seconds') for item in batch]
+            results = [result_cache.get(text, duration) for text, duration in zip(texts, durations)]
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                # A transcript that fails is reported on its own line; the rest of the batch still scores
+                scored = batch_scorer.calculate_scores_isolated([texts[i] for i in missing],
+                                                                [durations[i] for i in missing], compact=True)
+                # Not added to result_cache: a large batch would evict every interactive entry
+                for i, result in zip(missing, scored):
+                    results[i] = result
+            for item, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    continue
+                if item.get('student_id') is not None and item.get('cohort') is not None:
+                    score_store.record(item['student_id'], item['cohort'], rubrics_version, result)
+            return results
+
+        while True:
+            try:
+                return admission.submit(score, priority, client_id)
+            except Rejected as rejection:
+                if not streaming:
+                    raise
+                # Headers are already sent: apply backpressure instead of failing the rest
+                time.sleep(min(rejection.retry_after, 5))
+
+    lines = stream_results(items, submit, batch_size, projection=request.args.get('fields', 'full'))
+    try:
+        first = next(lines, None)
+    except Rejected as rejection:
+        return rejected_response(rejection)
+    streaming.append(True)
+    return Response(stream_with_context(chain([first] if first is not None else [], lines)),
+                    mimetype='application/x-ndjson', headers={"X-Accel-Buffering": "no"})
+
+@app.route('/api/similar', methods=['POST'])
+def similar_introductions():
+    """
+    Past introductions most similar to a transcript
+    Request body: {"transcript": "text", "k": 5 (optional, 1-100)}
+    """
+    if ann_index is None:
+        return jsonify({"error": "Similarity index disabled (set SCORING_ANN_INDEX)"}), 503
+    data = request.get_json()
+    if not data or not str(data.get('transcript', '')).strip():
+        return jsonify({"error": "Missing transcript in request body"}), 400
+    try:
+        k = min(max(int(str(data.get('k', 5))), 1), 100)
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    try:
+        embedding = admission.run(lambda: introduction_embedding(scorer.model, data['transcript']),
+                                  request_priority(), client_identity())
+    except Rejected as rejection:
+        return rejected_response(rejection)
+    if embedding is None:
+        return jsonify({"similar": []}), 200
+    matches = ann_index.search(embedding, k)
+    return jsonify({"similar": [{"id": doc_id, "similarity": score} for doc_id, score in matches]}), 200
+
+@app.route('/api/admission', methods=['GET'])
+def admission_stats():
+    """Queue depth, running jobs and admitted/completed/shed counts per priority class"""
+    return jsonify(admission.stats()), 200
+
+def job_response(job):
+    return {
+        **{key: value for key, value in job.items() if key != "video_path"},
+        "links": {"status": f"/api/jobs/{job['id']}", "results": f"/api/jobs/{job['id']}/results"},
+    }
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    return jsonify({"error": f"Request body exceeds {app.config['MAX_CONTENT_LENGTH']} bytes"}), 413
+
+@app.route('/api/jobs', methods=['POST'])
+def create_video_job():
+    """
+    Queue a video for scoring; returns 202 with the job at once.
+    Accepts a multipart upload (field 'video'), a raw body with Content-Type video/* or
+    application/octet-stream (?filename=talk.mp4), or JSON {"path": "/videos/talk.mp4"}
+    for a file on this host (only inside SCORING_VIDEO_ROOT; 403 when it is not set).
+    """
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('video')
+            if upload is None:
+                return jsonify({"error": "Missing 'video' file field"}), 400
+            job = video_jobs.submit_upload(upload.stream, upload.filename)
+        elif request.mimetype == 'application/json':
+            data = request.get_json(silent=True) or {}
+            if not data.get('path'):
+                return jsonify({"error": "Missing 'path' in request body"}), 400
+            job = video_jobs.submit_path(data['path'])
+        elif request.mimetype == 'application/octet-stream' or request.mimetype.startswith('video/'):
+            job = video_jobs.submit_upload(request.stream, request.args.get('filename', 'upload.mp4'))
+        else:
+            return jsonify({"error": "Send a multipart 'video' upload, a raw video body or JSON {\"path\": ...}"}), 415
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except PathJobsDisabled as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job_response(job)), 202, {"Location": f"/api/jobs/{job['id']}"}
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_video_job(job_id):
+    """Status of a video job: queued (with queue_position), running, complete or failed"""
+    job = video_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(job_response(job)), 200
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def get_video_job_results(job_id):
+    """Scores and transcript of a complete job; ?format=report returns the text report"""
+    try:
+        job, scores, transcript, report = video_jobs.results(job_id)
+    except ArtifactsMissing as e:
+        return jsonify({"error": str(e)}), 404
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    if job["status"] != "complete":
+        return jsonify({"error": f"Job is {job['status']}", **job_response(job)}), 409
+    if request.args.get('format') == 'report':
+        return Response(report, mimetype='text/plain')
+    return jsonify({"job_id": job_id, "transcript": transcript, "results": scores}), 200
+
 @app.route('/api/rubrics', methods=['GET'])
 def get_rubrics():
     """Get the rubrics structure"""
@@ -83,6 +402,31 @@ def get_sample():
         "description": "Sample self-introduction transcript"
     }), 200
 
+@app.route('/api/models', methods=['GET'])
+def get_models():
+    """Models loaded in this process, with reference counts and memory"""
+    return jsonify({"models": registry.stats()}), 200
+
+@app.route('/api/cohorts/<cohort>/rank/<student_id>', methods=['GET'])
+def cohort_rank(cohort, student_id):
+    """Rank and percentile of a student's latest score in a cohort"""
+    result = score_store.rank(student_id, cohort, rubrics_version)
+    if result is None:
+        return jsonify({"error": f"No score for {student_id} in cohort {cohort}"}), 404
+    return jsonify(result), 200
+
+@app.route('/api/cohorts/<cohort>/top', methods=['GET'])
+def cohort_top(cohort):
+    """Highest scores in a cohort"""
+    k = min(max(request.args.get('k', 10, type=int), 1), 1000)
+    return jsonify({"cohort": cohort, "top": score_store.top_k(cohort, rubrics_version, k)}), 200
+
+@app.route('/api/cohorts/<cohort>/histogram', methods=['GET'])
+def cohort_histogram(cohort):
+    """Overall score distribution of a cohort"""
+    bins = min(max(request.args.get('bins', 10, type=int), 1), 100)
+    return jsonify({"cohort": cohort, **score_store.histogram(cohort, rubrics_version, bins)}), 200
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
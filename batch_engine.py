@@ -0,0 +1,412 @@
+"""
+Batch Engine - Columnar, vectorized lexical scoring for a whole corpus of transcripts
+
+The corpus is tokenized once into a sparse document-term matrix (documents x
+vocabulary). Word counts, TTR and single-word keyword hits then become sparse
+column/row reductions, rubric bands are mapped with vectorized lookups, and
+the semantic checks share one encode call for the corpus. Sentiment and filler
+words are not vectorized: they need token order (negation, "you know"), so each
+transcript gets the analyzer's/detector's single token pass, as in ScoringEngine.
+Results have the same structure and values as ScoringEngine.calculate_score,
+which remains the reference implementation.
+"""
+import numpy as np
+from scipy import sparse
+from tracing import span, traced
+from filler_detector import get_detector
+from semantic_keywords import split_sentences
+from analysis_context import AnalysisContext
+
+
+def _string_array(texts):
+    """Variable-width string array where available (NumPy 2), fixed-width otherwise"""
+    string_dtype = getattr(getattr(np, "dtypes", None), "StringDType", None)
+    if string_dtype is not None:
+        return np.array(texts, dtype=string_dtype())
+    return np.array(texts, dtype=str)
+
+
+def _strings():
+    # np.strings (NumPy 2) is the ufunc-based successor of np.char
+    return getattr(np, "strings", np.char)
+
+
+def _ratio(value, word_count):
+    """A per-word ratio as ScoringEngine reports it: the int 0 for an empty transcript"""
+    return float(value) if word_count else 0
+
+
+def band_index(values, scoring):
+    """
+    Index of the first scoring range containing each value (-1 if none),
+    matching the first-match loops in ScoringEngine.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    index = np.full(values.shape, -1, dtype=np.int64)
+    for i in range(len(scoring) - 1, -1, -1):
+        low, high = scoring[i]["range"]
+        index = np.where((values >= low) & (values <= high), i, index)
+    return index
+
+
+def band_scores(values, scoring):
+    """Vectorized rubric band lookup returning plain Python scores per value"""
+    scores = [range_data["score"] for range_data in scoring]
+    return [scores[i] if i >= 0 else 0 for i in band_index(values, scoring).tolist()]
+
+
+class DocumentTermMatrix:
+    """Lowercased whitespace tokens of a corpus as a CSR count matrix"""
+
+    def __init__(self, transcripts_lower):
+        vocabulary = {}
+        indices = []
+        indptr = [0]
+        for text in transcripts_lower:
+            for token in text.split():
+                indices.append(vocabulary.setdefault(token, len(vocabulary)))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.int32)
+        matrix = sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(transcripts_lower), len(vocabulary)),
+        )
+        matrix.sum_duplicates()
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self.terms = _string_array(list(vocabulary)) if vocabulary else _string_array([""])[:0]
+
+    def columns(self, words):
+        """Column ids of the words that occur in the corpus"""
+        return [self.vocabulary[w] for w in words if w in self.vocabulary]
+
+    def count(self, words):
+        """Per-document total count of the given exact tokens"""
+        cols = self.columns(words)
+        if not cols:
+            return np.zeros(self.matrix.shape[0], dtype=np.int64)
+        return np.asarray(self.matrix[:, cols].sum(axis=1)).ravel()
+
+    def contains_substring(self, needle):
+        """Per-document flag: does any token contain needle (needle has no whitespace)"""
+        if len(self.terms) == 0:
+            return np.zeros(self.matrix.shape[0], dtype=bool)
+        cols = np.flatnonzero(_strings().find(self.terms, needle) >= 0)
+        if len(cols) == 0:
+            return np.zeros(self.matrix.shape[0], dtype=bool)
+        return np.asarray(self.matrix[:, cols].sum(axis=1)).ravel() > 0
+
+    def total_tokens(self):
+        return np.asarray(self.matrix.sum(axis=1)).ravel()
+
+    def unique_tokens(self):
+        return np.diff(self.matrix.indptr)
+
+
+class BatchScoringEngine:
+    """Scores N transcripts at once using an existing ScoringEngine's rubrics and model"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.rubrics = engine.rubrics
+        # Keyed by (criterion, metric): two criteria may each list a metric of the same name
+        self._metrics = {
+            (criterion["name"], metric["name"]): metric
+            for criterion in self.rubrics["criteria"]
+            for metric in criterion["metrics"]
+        }
+
+    def _named(self, name):
+        """Every rubric metric called name, in rubric order"""
+        return [metric for (_, metric_name), metric in self._metrics.items() if metric_name == name]
+
+    @traced("BatchScoringEngine.lexical_metrics", category="scoring")
+    def lexical_metrics(self, transcripts, durations=None):
+        """
+        Columnar lexical features for the corpus: one NumPy array per feature,
+        plus the intermediate matrices needed to build per-transcript results.
+        """
+        n = len(transcripts)
+        lower = [t.lower() for t in transcripts]
+        lower_array = _string_array(lower)
+        strings = _strings()
+
+        with span("batch.tokenize", category="scoring", documents=n):
+            dtm = DocumentTermMatrix(lower)
+
+        features = {"dtm": dtm}
+        word_count = dtm.total_tokens().astype(np.int64)
+        unique_words = dtm.unique_tokens().astype(np.int64)
+        features["word_count"] = word_count
+        features["unique_words"] = unique_words
+
+        # Vocabulary richness
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features["ttr"] = np.where(word_count > 0, unique_words / np.maximum(word_count, 1), 0.0)
+
+        # Speech rate
+        durations = list(durations) if durations is not None else [None] * n
+        has_duration = np.array([bool(d) for d in durations])
+        duration_values = np.array([d if d else 1 for d in durations], dtype=np.float64)
+        features["has_duration"] = has_duration
+        features["wpm"] = np.where(has_duration, (word_count / duration_values) * 60, np.nan)
+
+        # Sentiment (the lexicon analyzer's single token pass per transcript)
+        with span("batch.sentiment", category="scoring", documents=n):
+            polarities = self.engine.sentiment.polarity_scores_batch(transcripts)
+        compound = np.array([p["compound"] for p in polarities], dtype=np.float64)
+        features["compound"] = compound
+        features["positive_words"] = np.array([p["positive_words"] for p in polarities], dtype=np.int64)
+        features["negative_words"] = np.array([p["negative_words"] for p in polarities], dtype=np.int64)
+        features["sentiment_score"] = (compound + 1) / 2
+
+        # Filler words (the compiled detector's token pass, as in score_filler_words)
+        filler_metrics = self._named("Filler Word Rate")
+        if filler_metrics:
+            features.update(self.filler_features(transcripts, filler_metrics[0]["filler_words"], word_count))
+
+        # Keyword presence: single words via the vocabulary, phrases via the raw text
+        keyword_metrics = self._named("Keyword Presence")
+        if keyword_metrics:
+            keyword_hits = {}
+            for keyword_metric in keyword_metrics:
+                for item in keyword_metric["must_have"] + keyword_metric["good_to_have"]:
+                    for kw in item["keywords"]:
+                        needle = kw.lower()
+                        if needle in keyword_hits:
+                            continue
+                        if needle.split() == [needle]:
+                            keyword_hits[needle] = dtm.contains_substring(needle)
+                        else:
+                            keyword_hits[needle] = strings.find(lower_array, needle) >= 0
+            features["keyword_hits"] = keyword_hits
+
+        # Salutation keywords in the first 150 characters
+        salutation_metrics = self._named("Salutation Level")
+        if salutation_metrics:
+            openings = _string_array([t[:150] for t in lower])
+            salutation_hits = {}
+            for salutation_metric in salutation_metrics:
+                for level_data in salutation_metric["scoring"]:
+                    for keyword in level_data["keywords"]:
+                        if keyword not in salutation_hits:
+                            salutation_hits[keyword] = strings.find(openings, keyword.lower()) >= 0
+            features["salutation_hits"] = salutation_hits
+
+        return features
+
+    def filler_features(self, transcripts, filler_words, word_count):
+        """Per-filler counts, totals, rates and positions for one filler list"""
+        n = len(transcripts)
+        detector = get_detector(filler_words)
+        with span("batch.fillers", category="scoring", documents=n):
+            detections = [detector.detect(t) for t in transcripts]
+        filler_counts = np.array(
+            [[counts.get(filler, 0) for filler in filler_words] for _, counts in detections],
+            dtype=np.int64).reshape(n, len(filler_words))
+        filler_total = filler_counts.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            filler_rate = np.where(word_count > 0, (filler_total / np.maximum(word_count, 1)) * 100, 0.0)
+        return {
+            "filler_words": list(filler_words),
+            "filler_counts": filler_counts,
+            "filler_count": filler_total,
+            "filler_rate": filler_rate,
+            "filler_positions": [
+                [{"filler": m["filler"], "offset": m["offset"]} for m in matches]
+                for matches, _ in detections
+            ],
+        }
+
+    def _salutations(self, transcripts, features, metric, contexts=None):
+        """Rule-based levels for every transcript, then one batched semantic fallback"""
+        hits = features["salutation_hits"]
+        results = []
+        for i in range(len(transcripts)):
+            matched_level, score, keywords_found = "No Salutation", 0, []
+            for level_data in reversed(metric["scoring"]):
+                for keyword in level_data["keywords"]:
+                    if hits[keyword][i]:
+                        matched_level = level_data["level"]
+                        score = level_data["score"]
+                        keywords_found.append(keyword)
+                        break
+                if score > 0:
+                    break
+            results.append([score, matched_level, keywords_found])
+
+        fallback = [i for i, r in enumerate(results) if r[0] == 0]
+        if fallback:
+            max_similarity = self.greeting_similarities(transcripts, fallback, contexts)
+            for i, similarity in zip(fallback, max_similarity.tolist()):
+                if similarity > self.engine.salutation_threshold:
+                    results[i][0] = min(int(similarity * 5), 5)
+                    results[i][1] = "Semantic Match"
+
+        return [
+            self.engine.salutation_result(metric, score, level, keywords)
+            for score, level, keywords in results
+        ]
+
+    def greeting_similarities(self, transcripts, rows, contexts=None):
+        """Best similarity of each listed transcript's first sentence to the greeting prototypes"""
+        if self.engine.shared_embeddings:
+            # First rows of the corpus embeddings; transcripts without sentences score 0
+            return np.array([
+                self.engine.greeting_prototypes.similarities(contexts[i].embeddings[:1]).max(initial=0.0)
+                for i in rows
+            ], dtype=np.float32)
+        first_sentences = [
+            transcripts[i].split('.')[0] if '.' in transcripts[i] else transcripts[i][:100]
+            for i in rows
+        ]
+        if not first_sentences:
+            return np.zeros(0, dtype=np.float32)
+        with span("BatchScoringEngine.encode", category="model", sentences=len(first_sentences)):
+            sentence_embeddings = self.engine.model.encode(first_sentences)
+        return self.engine.greeting_prototypes.similarities(sentence_embeddings).max(axis=1)
+
+    def analysis_contexts(self, transcripts):
+        """One AnalysisContext per transcript, with every sentence of the corpus encoded in one call"""
+        sentences = [split_sentences(t) for t in transcripts]
+        flat = [s for doc in sentences for s in doc]
+        with span("BatchScoringEngine.encode", category="model", sentences=len(flat)):
+            embeddings = self.engine.model.encode(flat) if flat else np.zeros((0, 1), dtype=np.float32)
+        bounds = np.cumsum([0] + [len(doc) for doc in sentences])
+        return [
+            AnalysisContext(transcripts[i], self.engine.model, sentences[i], embeddings[bounds[i]:bounds[i + 1]])
+            for i in range(len(sentences))
+        ]
+
+    def _keywords(self, i, features, metric, context=None):
+        hits = features["keyword_hits"]
+        score = 0
+        keywords_found = {}
+        for item in metric["must_have"] + metric["good_to_have"]:
+            matched_keywords = [kw for kw in item["keywords"] if hits[kw.lower()][i]]
+            if matched_keywords:
+                score += item["score"]
+                keywords_found[item["keyword"]] = {
+                    "found": True,
+                    "keywords": matched_keywords,
+                    "score": item["score"]
+                }
+            else:
+                keywords_found[item["keyword"]] = {
+                    "found": False,
+                    "score": 0
+                }
+        if context is not None:
+            score += self.engine.apply_semantic_keywords(metric, keywords_found, context.sentences, context.embeddings)
+        return self.engine.keyword_result(metric, score, keywords_found)
+
+    @traced("BatchScoringEngine.calculate_scores", category="scoring")
+    def calculate_scores(self, transcripts, durations=None, compact=False):
+        """
+        Score a list of transcripts; returns one calculate_score-shaped dict per
+        transcript (compact=True: ScoreResult objects, see results.py). Lexical
+        metrics are computed for the whole corpus at once; Flow and Grammar are
+        sentence-level heuristics and run per transcript.
+        """
+        transcripts = list(transcripts)
+        n = len(transcripts)
+        durations = list(durations) if durations is not None else [None] * n
+        features = self.lexical_metrics(transcripts, durations)
+        engine = self.engine
+        contexts = None
+        if engine.concept_index is not None or engine.shared_embeddings:
+            contexts = self.analysis_contexts(transcripts)
+
+        # Per metric: list of n metric results, computed column-wise
+        metric_results = {}
+        for key, metric in self._metrics.items():
+            name = key[1]
+            if name == "Salutation Level":
+                metric_results[key] = self._salutations(transcripts, features, metric, contexts)
+            elif name == "Keyword Presence":
+                keyword_contexts = contexts if engine.concept_index is not None else [None] * n
+                metric_results[key] = [self._keywords(i, features, metric, keyword_contexts[i]) for i in range(n)]
+            elif name == "Words Per Minute":
+                wpm = features["wpm"]
+                index = band_index(np.nan_to_num(wpm, nan=-1.0), metric["scoring"]).tolist()
+                column = []
+                for i in range(n):
+                    if not features["has_duration"][i]:
+                        column.append(engine.score_wpm(None, metric))
+                        continue
+                    band = metric["scoring"][index[i]] if index[i] >= 0 else {"score": 0, "level": "Unknown"}
+                    column.append(engine.wpm_result(metric, band["score"], float(wpm[i]), band["level"]))
+                metric_results[key] = column
+            elif name == "Vocabulary Richness":
+                scores = band_scores(features["ttr"], metric["scoring"])
+                metric_results[key] = [
+                    engine.vocabulary_result(metric, scores[i], _ratio(features["ttr"][i], features["word_count"][i]),
+                                             int(features["unique_words"][i]), int(features["word_count"][i]))
+                    for i in range(n)
+                ]
+            elif name == "Filler Word Rate":
+                filler_words = metric["filler_words"]
+                fillers = features
+                if list(filler_words) != features["filler_words"]:
+                    fillers = self.filler_features(transcripts, filler_words, features["word_count"])
+                scores = band_scores(fillers["filler_rate"], metric["scoring"])
+                counts = fillers["filler_counts"]
+                column = []
+                for i in range(n):
+                    found = [f"{filler}({c})" for filler, c in zip(filler_words, counts[i].tolist()) if c > 0]
+                    column.append(engine.filler_result(metric, scores[i], int(fillers["filler_count"][i]),
+                                                       _ratio(fillers["filler_rate"][i], features["word_count"][i]),
+                                                       found,
+                                                       fillers["filler_positions"][i]))
+                metric_results[key] = column
+            elif name == "Sentiment/Positivity":
+                scores = band_scores(features["sentiment_score"], metric["scoring"])
+                metric_results[key] = [
+                    engine.sentiment_result(metric, scores[i], float(features["sentiment_score"][i]),
+                                            int(features["positive_words"][i]), int(features["negative_words"][i]),
+                                            float(features["compound"][i]))
+                    for i in range(n)
+                ]
+            elif name == "Grammar Score":
+                metric_results[key] = [
+                    engine.score_grammar(transcripts[i], metric, int(features["word_count"][i]))
+                    for i in range(n)
+                ]
+            else:
+                metric_results[key] = [
+                    engine.score_metric(transcripts[i], metric, None, None, int(features["word_count"][i]),
+                                        contexts[i] if contexts else None)
+                    for i in range(n)
+                ]
+
+        results = []
+        for i in range(n):
+            criteria_scores = [
+                engine.build_criterion_result(
+                    criterion, [metric_results[criterion["name"], m["name"]][i] for m in criterion["metrics"]])
+                for criterion in self.rubrics["criteria"]
+            ]
+            wpm = float(features["wpm"][i]) if features["has_duration"][i] else None
+            result = engine.build_results(int(features["word_count"][i]), wpm, durations[i], criteria_scores)
+            results.append(result if compact else result.to_dict())
+        return results
+
+    def calculate_scores_isolated(self, transcripts, durations=None, compact=False):
+        """
+        calculate_scores, except that a transcript that cannot be scored yields its
+        exception in place of a result instead of failing the others. The batch
+        runs once; only if it raises are its transcripts scored one at a time.
+        """
+        transcripts = list(transcripts)
+        durations = list(durations) if durations is not None else [None] * len(transcripts)
+        try:
+            return self.calculate_scores(transcripts, durations, compact)
+        except Exception:
+            results = []
+            for transcript, duration in zip(transcripts, durations):
+                try:
+                    results.append(self.calculate_scores([transcript], [duration], compact)[0])
+                except Exception as e:
+                    results.append(e)
+            return results
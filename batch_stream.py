@@ -0,0 +1,95 @@
+"""
+Batch Stream - Newline-delimited JSON scoring of arbitrarily large batches
+
+Request lines are read one at a time, grouped into micro-batches of
+`batch_size` transcripts and handed to `submit`, which starts scoring a
+micro-batch and returns a Future. At most `in_flight` micro-batches are
+outstanding: the next one is scored while the previous one's results are
+being written, and reading stops until the client has taken the output.
+The first line is written as soon as the first micro-batch finishes, and
+memory holds `in_flight * batch_size` transcripts whatever the batch size.
+
+Every input line produces exactly one output line, in input order:
+
+    {"index": 0, "id": "t-1", "result": {...}}
+    {"index": 1, "id": null, "error": "Missing transcript"}
+
+A failing micro-batch reports the error on each of its lines; a single
+transcript that fails (its result is an exception) only on its own line.
+"""
+import json
+from collections import deque
+from results import dumps
+
+
+def check_item(item):
+    """(item, error) for one request object; error is None for a scorable item"""
+    if not isinstance(item, dict):
+        return None, "Each item must be a JSON object"
+    if not isinstance(item.get("transcript"), str) or not item["transcript"].strip():
+        return item, "Missing transcript"
+    return item, None
+
+
+def read_items(lines):
+    """(item, error) per non-blank NDJSON line"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield None, f"Invalid JSON: {e}"
+            continue
+        yield check_item(item)
+
+
+def _line(payload):
+    return dumps(payload) + b"\n"
+
+
+def _result_lines(batch, future, projection):
+    """Output lines for one micro-batch once its Future resolves"""
+    try:
+        results = iter(future.result()) if future is not None else iter(())
+        error = None
+    except Exception as e:
+        results, error = None, f"Error scoring transcript: {e}"
+    for index, item, item_error in batch:
+        line = {"index": index, "id": item.get("id") if item else None}
+        if item_error is not None:
+            line["error"] = item_error
+        elif error is not None:
+            line["error"] = error
+        else:
+            result = next(results)
+            if isinstance(result, Exception):
+                line["error"] = f"Error scoring transcript: {result}"
+            else:
+                line["result"] = result.scores_only() if projection == "scores" else result
+        yield _line(line)
+
+
+def stream_results(items, submit, batch_size=16, in_flight=2, projection="full"):
+    """
+    Yield one NDJSON line (bytes) per (item, error) from read_items, in order.
+    submit(items) must return a Future of one result (or exception) per item, in order.
+    """
+    pending = deque()
+    batch = []
+
+    def dispatch():
+        scorable = [item for _, item, error in batch if error is None]
+        pending.append((list(batch), submit(scorable) if scorable else None))
+        batch.clear()
+
+    for index, (item, error) in enumerate(items):
+        batch.append((index, item, error))
+        if len(batch) >= batch_size:
+            dispatch()
+            while len(pending) >= in_flight:
+                yield from _result_lines(*pending.popleft(), projection)
+    if batch:
+        dispatch()
+    while pending:
+        yield from _result_lines(*pending.popleft(), projection)
@@ -0,0 +1,438 @@
+"""
+Chunked Scoring - Bounded-memory scoring of very long transcripts, window by window
+
+An hour-long session (20k+ words) is read as a stream of text pieces (a file,
+a request body, or slices of a string) and cut into windows of about
+`window_chars` characters. A window ends at a sentence boundary when it has
+one (preferably in its second half), otherwise at a word boundary, so words
+never span two windows; only a run of more than MAX_WORD_WINDOWS windows
+without whitespace is cut mid-word, to keep the buffer bounded. Each window carries a few whole words of the previous and next window
+as context, which is all the rule-based analyzers look at around a position.
+A window is lowercased, split and scanned once, and only its running totals
+are kept:
+
+    word count, TTR         running count and set of lowercased words
+    keyword presence        hits found so far, with the previous window's tail
+                            carried over for phrases spanning the boundary
+    grammar                 issue count and rule counts for issues starting in the
+                            window (the first MAX_REPORTED_ISSUES are kept)
+    filler words            counts and positions, with the detector's scan position
+                            carried over so a phrase is never counted twice
+    sentiment               the analyzer's running sums (SentimentAnalyzer.accumulate)
+    salutation, flow        the transcript's first characters, first two sentences
+                            and last sentence
+    semantic keywords       best sentence per concept so far (when enabled)
+
+The rule-based aggregates match ScoringEngine.calculate_score on the whole
+string for any window size, except that a single sentence longer than
+`max_sentence_chars` is truncated for the salutation and flow checks (and a
+word cut mid-word counts twice). Semantic keywords encode each window's own
+sentences, so they match only when no sentence is cut between two windows:
+ChunkedScorer requires at least MIN_SEMANTIC_WINDOW_CHARS per window when they
+are enabled, and a sentence longer than `window_chars` is still encoded in
+pieces. Working memory is a few windows plus the vocabulary set; the
+transcript itself is never held.
+"""
+import re
+import codecs
+from bisect import bisect_left
+import numpy as np
+from scipy import sparse
+from tracing import span, traced
+from filler_detector import get_detector
+from sentiment import TOKEN_PATTERN as SENTIMENT_TOKEN
+from semantic_keywords import SENTENCE_SPLIT, split_sentences, normalize_rows
+
+WORD = re.compile(r"\S+")
+WHITESPACE = re.compile(r"\s+")
+# Sentence ends as ScoringEngine.flow_sections splits them
+FLOW_SENTENCE_END = re.compile(r"[.!?]")
+# Whole words of context on each side of a window; no grammar rule, filler phrase
+# or sentiment look-back/look-ahead spans more
+CONTEXT_WORDS = 8
+SALUTATION_CHARS = 150
+# Semantic keyword matching needs whole sentences in a window (see the module docstring)
+MIN_SEMANTIC_WINDOW_CHARS = 4096
+# Text without whitespace is cut mid-word after this many windows instead of buffered
+MAX_WORD_WINDOWS = 4
+READ_BYTES = 1 << 16
+
+
+def iter_windows(pieces, window_chars=32768, context_words=CONTEXT_WORDS):
+    """
+    Yields (text, start, end, offset) per window: text[start:end] is the window's own
+    part of the transcript, the rest of text is context, and offset is the position of
+    text[0] in the transcript. Own parts are consecutive and cover the transcript.
+    """
+    pieces = iter(pieces)
+    buffer = ""
+    offset = 0
+    region_start = 0
+    exhausted = False
+    while True:
+        while not exhausted and len(buffer) - region_start < 2 * window_chars:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+            else:
+                buffer += piece
+        max_chars = MAX_WORD_WINDOWS * window_chars
+        cut = _find_cut(buffer, region_start, window_chars)
+        if cut is None and len(buffer) - region_start > max_chars:
+            # No whitespace to cut at (garbled or binary input): split the word rather than keep reading
+            cut = region_start + max_chars
+        after_end = _context_end(buffer, cut, context_words, exhausted, max_chars) if cut is not None else None
+        if after_end is None:
+            if not exhausted:
+                # A word or the look-ahead context is still incomplete
+                piece = next(pieces, None)
+                if piece is None:
+                    exhausted = True
+                else:
+                    buffer += piece
+                continue
+            if buffer[region_start:].strip():
+                yield buffer, region_start, len(buffer), offset
+            return
+
+        yield buffer[:after_end], region_start, cut, offset
+        starts = [match.start() for match in WORD.finditer(buffer, region_start, cut)]
+        keep = starts[-context_words] if len(starts) >= context_words else 0
+        keep = max(keep, cut - max_chars)
+        buffer = buffer[keep:]
+        offset += keep
+        region_start = cut - keep
+
+
+def _find_cut(buffer, region_start, window_chars):
+    """
+    Start of the first word after a sentence end in the window's second half, else
+    after the last sentence end in its first half, else after any space
+    """
+    low = region_start + window_chars
+    if len(buffer) <= low:
+        return None
+    match = SENTENCE_SPLIT.search(buffer, low, min(low + window_chars, len(buffer)))
+    if match is None:
+        for match in SENTENCE_SPLIT.finditer(buffer, region_start + 1, low):
+            pass
+    if match is None:
+        match = WHITESPACE.search(buffer, low)
+    if match is not None:
+        cut = WHITESPACE.match(buffer, match.start()).end()
+        if cut < len(buffer):
+            return cut
+    return None
+
+
+def _context_end(buffer, cut, context_words, exhausted, max_chars):
+    """
+    End of the `context_words` complete words after cut, or None until they have
+    arrived; at most max_chars after cut, so an endless word ends the context
+    """
+    end = cut
+    for count, match in enumerate(WORD.finditer(buffer, cut), start=1):
+        if match.end() > cut + max_chars:
+            return cut + max_chars
+        if match.end() == len(buffer) and not exhausted:
+            return None
+        end = match.end()
+        if count == context_words:
+            return end
+    return end if exhausted else None
+
+
+def iter_text(transcript, window_chars=32768):
+    """A string as pieces for ChunkedScorer.score"""
+    return (transcript[i:i + window_chars] for i in range(0, len(transcript), window_chars))
+
+
+def iter_decoded(stream, read_bytes=READ_BYTES, encoding="utf-8"):
+    """Text pieces from a binary stream (file or request body), decoded incrementally"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        data = stream.read(read_bytes)
+        if not data:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+class ChunkedScorer:
+    """Scores a transcript given as a stream of text pieces with an engine's rubric and analyzers"""
+
+    def __init__(self, engine, window_chars=32768, max_sentence_chars=8192):
+        if engine.concept_index is not None and window_chars < MIN_SEMANTIC_WINDOW_CHARS:
+            raise ValueError(f"Semantic keyword matching needs window_chars >= {MIN_SEMANTIC_WINDOW_CHARS}, "
+                             f"got {window_chars}")
+        self.engine = engine
+        self.window_chars = window_chars
+        self.max_sentence_chars = max_sentence_chars
+
+    def score_text(self, transcript, duration_seconds=None, compact=False):
+        return self.score(iter_text(transcript, self.window_chars), duration_seconds, compact)
+
+    def score_file(self, path, duration_seconds=None, compact=False):
+        with open(path, "rb") as f:
+            return self.score(iter_decoded(f), duration_seconds, compact)
+
+    @traced("ChunkedScorer.score", category="scoring")
+    def score(self, pieces, duration_seconds=None, compact=False):
+        """calculate_score-shaped result (compact=True: a ScoreResult) for the concatenated pieces"""
+        state = TranscriptState(self.engine, self.max_sentence_chars)
+        windows = 0
+        for window in iter_windows(pieces, self.window_chars):
+            with span("chunked.window", category="scoring", window=windows):
+                state.add(*window)
+            windows += 1
+        results = state.results(duration_seconds)
+        return results if compact else results.to_dict()
+
+
+class TranscriptState:
+    """Running aggregates of one transcript, fed one window at a time"""
+
+    def __init__(self, engine, max_sentence_chars=8192):
+        self.engine = engine
+        self.max_sentence_chars = max_sentence_chars
+        self.metrics = {metric["name"]: metric for criterion in engine.rubrics["criteria"]
+                        for metric in criterion["metrics"]}
+        self.word_count = 0
+        self.vocabulary = set()
+
+        keyword_metric = self.metrics.get("Keyword Presence")
+        items = keyword_metric["must_have"] + keyword_metric["good_to_have"] if keyword_metric else []
+        self.needles = {kw.lower() for item in items for kw in item["keywords"]}
+        self.keyword_hits = set()
+        self.keyword_carry = ""
+        self.keyword_overlap = max((len(needle) for needle in self.needles), default=1) - 1
+
+        # Salutation: the opening characters, and whether a '.' comes after them
+        self.lead = ""
+        self.dot_after_lead = False
+
+        # Flow: first two and last '[.!?]' sentences as (text, terminator)
+        self.sentence_count = 0
+        self.head_sentences = []
+        self.last_sentence = None
+        self.partial = ""
+
+        self.issue_count = 0
+        self.rule_counts = {}
+        self.issues = []
+
+        filler_metric = self.metrics.get("Filler Word Rate")
+        self.detector = get_detector(filler_metric["filler_words"]) if filler_metric else None
+        self.filler_counts = {}
+        self.filler_positions = []
+        self.filler_resume = None
+        self.after_filler = False
+
+        self.sentiment = engine.sentiment.new_state()
+
+        # Semantic keywords: best similarity, sentence and embedding row per concept
+        self.concept_best = None
+        if engine.concept_index is not None:
+            concepts = len(engine.concept_index.concepts)
+            self.concept_best = np.full(concepts, -np.inf, dtype=np.float32)
+            self.concept_sentences = [None] * concepts
+            self.concept_rows = [None] * concepts
+
+    def add(self, text, start, end, offset):
+        region = text[start:end]
+        lower = region.lower()
+        words = lower.split()
+        self.word_count += len(words)
+        self.vocabulary.update(words)
+
+        probe = self.keyword_carry + lower
+        for needle in self.needles - self.keyword_hits:
+            if needle in probe:
+                self.keyword_hits.add(needle)
+        self.keyword_carry = probe[len(probe) - self.keyword_overlap:] if self.keyword_overlap else ""
+
+        if len(self.lead) < self.max_sentence_chars:
+            self.lead += region[:self.max_sentence_chars - len(self.lead)]
+            if len(self.lead) == self.max_sentence_chars and '.' not in self.lead:
+                self.dot_after_lead = '.' in region
+        elif not self.dot_after_lead and '.' not in self.lead:
+            self.dot_after_lead = '.' in region
+
+        self._add_sentences(region)
+        self._add_grammar(text, start, end, offset)
+        self._add_fillers(text, start, end, offset)
+        self._add_sentiment(text, start, end)
+        if self.concept_best is not None:
+            self._add_concepts(region)
+
+    def _add_sentences(self, region):
+        position = 0
+        for match in FLOW_SENTENCE_END.finditer(region):
+            self._end_sentence(self.partial + region[position:match.start()], match.group())
+            self.partial = ""
+            position = match.end()
+        self.partial += region[position:]
+        if len(self.partial) > self.max_sentence_chars:
+            # A sentence that may still be one of the first two keeps its start, otherwise its end
+            self.partial = self.partial[:self.max_sentence_chars] if len(self.head_sentences) < 2 \
+                else self.partial[-self.max_sentence_chars:]
+
+    def _end_sentence(self, text, terminator):
+        text = text.strip()
+        if not text:
+            return
+        self.sentence_count += 1
+        if len(self.head_sentences) < 2:
+            self.head_sentences.append((text, terminator))
+        self.last_sentence = (text, terminator)
+
+    def _add_grammar(self, text, start, end, offset):
+        for issue in self.engine.grammar.check(text):
+            if not start <= issue["offset"] < end:
+                continue
+            self.issue_count += 1
+            self.rule_counts[issue["rule"]] = self.rule_counts.get(issue["rule"], 0) + 1
+            if len(self.issues) < self.engine.MAX_REPORTED_ISSUES:
+                issue["offset"] += offset
+                self.issues.append(issue)
+
+    def _add_fillers(self, text, start, end, offset):
+        if self.detector is None:
+            return
+        resume = None if self.filler_resume is None else self.filler_resume - offset
+        matches, counts, resume, self.after_filler = self.detector.detect_window(
+            text, start, end, resume, self.after_filler)
+        self.filler_resume = resume + offset
+        for filler, count in counts.items():
+            self.filler_counts[filler] = self.filler_counts.get(filler, 0) + count
+        self.filler_positions.extend({"filler": m["filler"], "offset": m["offset"] + offset} for m in matches)
+
+    def _add_sentiment(self, text, start, end):
+        lower = text.lower()
+        starts = []
+        tokens = []
+        for match in SENTIMENT_TOKEN.finditer(lower):
+            starts.append(match.start())
+            tokens.append(match.group())
+        self.engine.sentiment.accumulate(tokens, bisect_left(starts, start), bisect_left(starts, end),
+                                         self.sentiment)
+
+    def _add_concepts(self, region):
+        sentences = split_sentences(region)
+        if not sentences:
+            return
+        engine = self.engine
+        with span("ScoringEngine.encode", category="model", sentences=len(sentences)):
+            embeddings = normalize_rows(engine.model.encode(sentences))
+        best, best_sentence = engine.concept_index.coverage(embeddings)
+        for i in np.flatnonzero(best > self.concept_best):
+            self.concept_best[i] = best[i]
+            self.concept_sentences[i] = sentences[best_sentence[i]]
+            self.concept_rows[i] = embeddings[best_sentence[i]:best_sentence[i] + 1]
+
+    def results(self, duration_seconds=None):
+        if self.partial.strip():
+            self._end_sentence(self.partial, "")
+            self.partial = ""
+        if not self.word_count:
+            raise ValueError("Transcript is empty")
+        engine = self.engine
+        wpm = (self.word_count / duration_seconds) * 60 if duration_seconds else None
+        criteria_scores = []
+        for criterion in engine.rubrics["criteria"]:
+            metric_results = []
+            for metric in criterion["metrics"]:
+                with span(f"metric:{metric['name']}", category="scoring"):
+                    metric_results.append(self.metric_result(metric, wpm))
+            criteria_scores.append(engine.build_criterion_result(criterion, metric_results))
+        return engine.build_results(self.word_count, wpm, duration_seconds, criteria_scores)
+
+    def metric_result(self, metric, wpm):
+        engine = self.engine
+        name = metric["name"]
+        if name == "Salutation Level":
+            return engine.score_salutation(self.salutation_text(), metric)
+        if name == "Keyword Presence":
+            return self.keyword_result(metric)
+        if name == "Flow":
+            return engine.score_flow(self.flow_text(), metric)
+        if name == "Words Per Minute":
+            return engine.score_wpm(wpm, metric)
+        if name == "Grammar Score":
+            return engine.grammar_result(metric, self.issue_count, self.word_count, self.word_count,
+                                         self.rule_counts, self.issues)
+        if name == "Vocabulary Richness":
+            ttr = len(self.vocabulary) / self.word_count
+            return engine.vocabulary_result(metric, _band(metric, ttr), ttr, len(self.vocabulary), self.word_count)
+        if name == "Filler Word Rate":
+            filler_count = len(self.filler_positions)
+            filler_rate = (filler_count / self.word_count) * 100
+            found = [f"{filler}({self.filler_counts[filler]})" for filler in metric["filler_words"]
+                     if filler in self.filler_counts]
+            return engine.filler_result(metric, _band(metric, filler_rate), filler_count, filler_rate, found,
+                                        self.filler_positions)
+        if name == "Sentiment/Positivity":
+            polarity = engine.sentiment.finish(self.sentiment)
+            sentiment_score = engine.sentiment.positive_probability(polarity)
+            return engine.sentiment_result(metric, _band(metric, sentiment_score), sentiment_score,
+                                           polarity["positive_words"], polarity["negative_words"],
+                                           polarity["compound"])
+        return engine.score_metric("", metric, None, wpm, self.word_count)
+
+    def salutation_text(self):
+        """
+        The transcript's first sentence (split on '.') and first 150 characters,
+        which is everything score_salutation reads
+        """
+        dot = self.lead.find('.')
+        if dot >= 0:
+            return self.lead[:max(SALUTATION_CHARS, dot + 1)]
+        # First sentence longer than max_sentence_chars: score its beginning
+        return self.lead + '.' if self.dot_after_lead else self.lead
+
+    def flow_text(self):
+        """The first two and the last sentence, which is everything score_flow reads"""
+        sentences = list(self.head_sentences)
+        if self.sentence_count > 2:
+            sentences.append(self.last_sentence)
+        return " ".join(text + terminator for text, terminator in sentences)
+
+    def keyword_result(self, metric):
+        """As ScoringEngine.score_keyword_presence, from the hits collected across windows"""
+        score = 0
+        keywords_found = {}
+        for item in metric["must_have"] + metric["good_to_have"]:
+            matched_keywords = [kw for kw in item["keywords"] if kw.lower() in self.keyword_hits]
+            if matched_keywords:
+                score += item["score"]
+                keywords_found[item["keyword"]] = {
+                    "found": True,
+                    "keywords": matched_keywords,
+                    "score": item["score"]
+                }
+            else:
+                keywords_found[item["keyword"]] = {
+                    "found": False,
+                    "score": 0
+                }
+        if self.concept_best is not None:
+            # Each concept's best sentence over all windows; their embeddings stand in for the transcript's
+            covered = [i for i, row in enumerate(self.concept_rows) if row is not None]
+            if covered:
+                sentences = [self.concept_sentences[i] for i in covered]
+                rows = [self.concept_rows[i] for i in covered]
+                # Sparse rows come from the lite backend
+                embeddings = sparse.vstack(rows).tocsr() if sparse.issparse(rows[0]) else np.vstack(rows)
+                score += self.engine.apply_semantic_keywords(metric, keywords_found, sentences, embeddings)
+        return self.engine.keyword_result(metric, score, keywords_found)
+
+
+def _band(metric, value):
+    """Score of the first scoring range containing value, as in the engine's metric methods"""
+    for range_data in metric["scoring"]:
+        min_val, max_val = range_data["range"]
+        if min_val <= value <= max_val:
+            return range_data["score"]
+    return 0
@@ -0,0 +1,134 @@
+"""
+Columnar Writer - Flattens scoring results into fixed columns and streams them to Parquet
+
+Every result becomes one row: overall score, word count, WPM and duration, the
+weighted score of each rubric criterion, the raw score of each metric, and the
+raw values analysts filter on (TTR, filler rate, sentiment, grammar errors).
+The column set is derived from the rubric once, so every file written with the
+same rubric has the same schema. Rows are buffered per column and flushed as
+an Arrow record batch (one Parquet row group) every `batch_size` rows, so memory
+stays bounded by the batch size however many results are written.
+"""
+import re
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed when writing Parquet
+    pa = None
+    pq = None
+
+# (metric name, result key, column name, Arrow type name) for raw per-metric values
+RAW_VALUE_COLUMNS = [
+    ("Vocabulary Richness", "ttr", "ttr", "float64"),
+    ("Vocabulary Richness", "unique_words", "unique_words", "int64"),
+    ("Filler Word Rate", "filler_rate", "filler_rate", "float64"),
+    ("Filler Word Rate", "filler_count", "filler_count", "int64"),
+    ("Sentiment/Positivity", "sentiment_score", "sentiment_score", "float64"),
+    ("Sentiment/Positivity", "compound", "sentiment_compound", "float64"),
+    ("Grammar Score", "errors", "grammar_errors", "int64"),
+    ("Grammar Score", "errors_per_100", "grammar_errors_per_100", "float64"),
+    ("Salutation Level", "level", "salutation_level", "string"),
+]
+
+
+def column_name(text):
+    """'Content & Structure' -> 'content_structure'"""
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+class ResultColumns:
+    """The fixed column layout for one rubric, and result -> row flattening"""
+
+    def __init__(self, rubrics):
+        self.criteria = [c["name"] for c in rubrics["criteria"]]
+        self.metrics = [m["name"] for c in rubrics["criteria"] for m in c["metrics"]]
+        self.raw_values = [spec for spec in RAW_VALUE_COLUMNS if spec[0] in self.metrics]
+
+        self.fields = [
+            ("id", "string"),
+            ("overall_score", "float64"),
+            ("word_count", "int64"),
+            ("wpm", "float64"),
+            ("duration_seconds", "float64"),
+        ]
+        self.fields += [(f"{column_name(name)}_weighted", "float64") for name in self.criteria]
+        self.fields += [(f"{column_name(name)}_score", "float64") for name in self.metrics]
+        self.fields += [(column, type_name) for _, _, column, type_name in self.raw_values]
+        self.names = [name for name, _ in self.fields]
+
+    def flatten(self, result, transcript_id=None):
+        """One row as a list of values in column order (missing values are None)"""
+        metadata = result["metadata"]
+        weighted = {}
+        metric_results = {}
+        for criterion in result["criteria_scores"]:
+            weighted[criterion["criterion"]] = criterion["weighted_score"]
+            for metric in criterion["metrics"]:
+                metric_results[metric["metric"]] = metric
+
+        row = [transcript_id, result["overall_score"], result["word_count"],
+               metadata["wpm"], metadata["duration_seconds"]]
+        row += [weighted.get(name) for name in self.criteria]
+        row += [metric_results[name]["score"] if name in metric_results else None for name in self.metrics]
+        for metric_name, key, _, _ in self.raw_values:
+            metric = metric_results.get(metric_name)
+            row.append(metric.get(key) if metric is not None else None)
+        return row
+
+    def arrow_schema(self):
+        return pa.schema([(name, getattr(pa, type_name)()) for name, type_name in self.fields])
+
+
+class ParquetResultWriter:
+    """
+    Incremental Parquet writer for scoring results. Use as a context manager,
+    or call close() to flush the last partial batch and finish the file.
+    """
+
+    def __init__(self, path, rubrics, batch_size=1024, compression="zstd"):
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = ResultColumns(rubrics)
+        self.schema = self.columns.arrow_schema()
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self._buffer = [[] for _ in self.columns.names]
+        self.rows_written = 0
+
+    def write(self, result, transcript_id=None):
+        """Buffer one calculate_score result (dict or ScoreResult); flushes every batch_size rows"""
+        for column, value in zip(self._buffer, self.columns.flatten(result, transcript_id)):
+            column.append(value)
+        if len(self._buffer[0]) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, results, transcript_ids=None):
+        ids = transcript_ids if transcript_ids is not None else [None] * len(results)
+        for result, transcript_id in zip(results, ids):
+            self.write(result, transcript_id)
+
+    def flush(self):
+        """Write buffered rows as one record batch / row group"""
+        if not self._buffer[0]:
+            return
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(self._buffer, self.schema)],
+            schema=self.schema
+        )
+        self._writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+        self._buffer = [[] for _ in self.columns.names]
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,226 @@
+"""
+Excel Bulk - Score a workbook of transcripts row by row with flat memory
+
+Rows are streamed from the input sheet with openpyxl's read-only mode (no
+DataFrame, no full sheet in memory), scored BATCH_SIZE at a time through the
+BatchScoringEngine, and appended to a write-only output workbook next to the
+original columns. At any moment only one batch of transcripts and results is
+held, so memory does not grow with the number of rows.
+
+A cell holds at most 32,767 characters, so hour-long sessions are given as
+text files instead: with --transcript-files the transcript column holds paths
+(relative to the input workbook) and each file is scored window by window by
+the ChunkedScorer, never read whole.
+
+Usage:
+    python excel_bulk.py transcripts.xlsx scored.xlsx --transcript-column Transcript
+    python excel_bulk.py sessions.xlsx scored.xlsx --transcript-column File --transcript-files
+"""
+import os
+import time
+import argparse
+import openpyxl
+from batch_engine import BatchScoringEngine
+from chunked_scoring import ChunkedScorer
+from columnar_writer import ResultColumns
+from cohort_report import CohortAggregate
+from near_duplicates import NearDuplicateIndex, ResultCache
+
+BATCH_SIZE = 256
+TRANSCRIPT_HEADERS = ("transcript", "transcript text", "text")
+DURATION_HEADERS = ("duration_seconds", "duration", "duration (s)", "duration (seconds)")
+DUPLICATE_COLUMNS = ["duplicate_of", "duplicate_similarity"]
+ERROR_COLUMN = "scoring_error"
+# Rows kept in the --dedupe index (oldest evicted first; about 4 KB each)
+DEDUPE_MAX_ENTRIES = 50000
+
+
+def _find_column(header, requested, candidates):
+    """Index of the requested header (case-insensitive), else of the first known candidate"""
+    names = [str(h).strip().lower() if h is not None else "" for h in header]
+    for name in ([requested.lower()] if requested else list(candidates)):
+        if name in names:
+            return names.index(name)
+    return None
+
+
+def iter_rows(input_path, sheet=None, transcript_column=None, duration_column=None):
+    """
+    Yields (header, None, None) once, then (row values, transcript, duration)
+    per data row, streaming from a read-only workbook.
+    """
+    workbook = openpyxl.load_workbook(input_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        text_index = _find_column(header, transcript_column, TRANSCRIPT_HEADERS)
+        if text_index is None:
+            raise ValueError(f"No transcript column found in header {list(header)}")
+        duration_index = _find_column(header, duration_column, DURATION_HEADERS)
+        yield header, None, None
+
+        for row in rows:
+            if row is None or all(value is None for value in row):
+                continue
+            transcript = row[text_index] if text_index < len(row) else None
+            duration = row[duration_index] if duration_index is not None and duration_index < len(row) else None
+            yield row, str(transcript or ""), float(duration) if isinstance(duration, (int, float)) else None
+    finally:
+        workbook.close()
+
+
+def score_workbook(input_path, output_path, engine, sheet=None, transcript_column=None,
+                   duration_column=None, batch_size=BATCH_SIZE, aggregate=None, dedupe=None,
+                   transcript_files=False):
+    """
+    Stream input rows, score them in batches and write original columns + score
+    columns; returns rows scored. Results are also folded into `aggregate`
+    (a CohortAggregate) when one is given. With `dedupe` (a NearDuplicateIndex)
+    every row is checked against the earlier rows the index holds (all of them
+    unless it has max_entries, as with --dedupe), the best match is written to
+    duplicate_of / duplicate_similarity (data row numbers, 1 = first data row),
+    and transcripts seen before with the same duration reuse the earlier result.
+    A row that cannot be scored gets empty score cells and the reason in the
+    scoring_error column; the other rows are unaffected.
+    With `transcript_files` the transcript cells are paths of text files (relative
+    to the input workbook), scored one at a time with a ChunkedScorer; `dedupe`
+    then does not apply.
+    """
+    batch_engine = BatchScoringEngine(engine)
+    chunked_scorer = ChunkedScorer(engine) if transcript_files else None
+    base_dir = os.path.dirname(os.path.abspath(input_path))
+    columns = ResultColumns(engine.rubrics)
+    score_names = columns.names[1:]  # every column except the row id
+
+    output = openpyxl.Workbook(write_only=True)
+    output_sheet = output.create_sheet("Scores")
+    rows = iter_rows(input_path, sheet, transcript_column, duration_column)
+    header = next(rows, (None,))[0]
+    if header is None:
+        output.save(output_path)
+        return 0
+    if transcript_files:
+        dedupe = None
+    output_sheet.append(list(header) + score_names + (DUPLICATE_COLUMNS if dedupe is not None else []) +
+                        [ERROR_COLUMN])
+    cache = ResultCache() if dedupe is not None else None
+
+    scored = 0
+    batch = []
+
+    def flush():
+        texts = [transcript for _, _, transcript, _ in batch]
+        durations = [duration for _, _, _, duration in batch]
+        scorable = [i for i, text in enumerate(texts) if text.strip()]
+        by_row = {}
+        errors = {}
+        flags = {}
+        # Identical (text, duration) pairs are scored once per batch, and once per run with dedupe
+        pending = {}
+        for i in list(scorable):
+            if chunked_scorer is not None:
+                path = os.path.join(base_dir, texts[i].strip())
+                try:
+                    by_row[i] = chunked_scorer.score_file(path, durations[i], compact=True)
+                except Exception as e:
+                    errors[i] = f"{type(e).__name__}: {e}"
+                continue
+            if dedupe is not None:
+                flags[i] = dedupe.check(batch[i][0], texts[i])
+                cached = cache.get(texts[i], durations[i])
+                if cached is not None:
+                    by_row[i] = cached
+                    continue
+            pending.setdefault((texts[i], durations[i]), []).append(i)
+        keys = list(pending)
+        results = batch_engine.calculate_scores_isolated([text for text, _ in keys],
+                                                         [duration for _, duration in keys], compact=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                for i in pending[key]:
+                    errors[i] = f"{type(result).__name__}: {result}"
+                continue
+            for i in pending[key]:
+                by_row[i] = result
+            if cache is not None:
+                cache.put(key[0], key[1], result)
+        if aggregate is not None:
+            aggregate.add_many(by_row[i] for i in scorable if i in by_row)
+        for i, error in errors.items():
+            print(f"Row {batch[i][0]} not scored: {error}")
+
+        for i, (_, row, _, _) in enumerate(batch):
+            result = by_row.get(i)
+            values = columns.flatten(result)[1:] if result is not None else [None] * len(score_names)
+            if dedupe is not None:
+                values += _duplicate_values(flags.get(i))
+            output_sheet.append(list(row) + values + [errors.get(i)])
+        batch.clear()
+        return len(by_row)
+
+    for row_number, (row, transcript, duration) in enumerate(rows, start=1):
+        batch.append((row_number, row, transcript, duration))
+        if len(batch) >= batch_size:
+            scored += flush()
+    if batch:
+        scored += flush()
+
+    output.save(output_path)
+    return scored
+
+
+def _duplicate_values(flag):
+    """[duplicate_of, duplicate_similarity] for one row's NearDuplicateIndex.check() result"""
+    if flag is None:
+        return [None, None]
+    if flag["exact_match"] is not None:
+        return [flag["exact_match"], 1.0]
+    if flag["near_duplicates"]:
+        best = flag["near_duplicates"][0]
+        return [best["id"], best["similarity"]]
+    return [None, None]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Score every transcript in an Excel sheet")
+    arg_parser.add_argument("input", help="Workbook with one transcript per row")
+    arg_parser.add_argument("output", help="Workbook to write (original columns + scores)")
+    arg_parser.add_argument("--sheet", help="Sheet to read (default: the active sheet)")
+    arg_parser.add_argument("--transcript-column", help="Header of the transcript column")
+    arg_parser.add_argument("--duration-column", help="Header of the duration (seconds) column")
+    arg_parser.add_argument("--rubric-file", default="Case study for interns.xlsx",
+                            help="Workbook holding the rubric")
+    arg_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    arg_parser.add_argument("--aggregate", metavar="PATH",
+                            help="Also save a mergeable cohort aggregate (see cohort_report.py) to this JSON file")
+    arg_parser.add_argument("--dedupe", action="store_true",
+                            help="Flag near-duplicate/template rows and reuse results for repeated transcripts "
+                                 f"(compared with the last {DEDUPE_MAX_ENTRIES} rows)")
+    arg_parser.add_argument("--transcript-files", action="store_true",
+                            help="Transcript cells are paths of text files (for transcripts too long for a cell)")
+    args = arg_parser.parse_args()
+
+    from scoring_engine import ScoringEngine
+    from model_registry import acquire_rubric_parser
+
+    with acquire_rubric_parser(args.rubric_file) as parser_handle:
+        engine = ScoringEngine(parser_handle.value.get_rubrics())
+        aggregate = CohortAggregate(engine.rubrics) if args.aggregate else None
+        dedupe = NearDuplicateIndex(max_entries=DEDUPE_MAX_ENTRIES) if args.dedupe else None
+        started = time.perf_counter()
+        scored = score_workbook(args.input, args.output, engine, args.sheet, args.transcript_column,
+                                args.duration_column, args.batch_size, aggregate, dedupe,
+                                args.transcript_files)
+        elapsed = time.perf_counter() - started
+        engine.close()
+    print(f"Scored {scored} transcripts in {elapsed:.1f}s -> {args.output}")
+    if aggregate is not None:
+        aggregate.save(args.aggregate)
+        print(f"Cohort aggregate saved to {args.aggregate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Feature Store - Per-transcript extracted features for incremental rescoring
+
+Scoring a transcript is expensive (tokenizing, grammar rules, sentence
+embeddings); mapping the extracted values onto rubric bands and weights is
+not. The store keeps, for every scored transcript, the rubric-independent
+features each metric is computed from (WPM, TTR, per-filler counts, keyword
+and salutation hits, sentiment, grammar error count, greeting similarity,
+Flow sections) together with the criterion scores under the rubric it was
+scored with.
+
+When the rubric changes, rubric_diff() finds the criteria whose weight, bands
+or metric settings changed, and rescore() recomputes only those criteria as
+vectorized NumPy expressions over the stored columns; unchanged criteria reuse
+their stored weighted scores. No transcript is re-read and no model runs.
+Changes that need text the store does not hold (a new keyword, a different
+filler list) are reported instead of silently rescored.
+
+Layout: <store>/store.json (rubric, segment list) and one .npz segment per add().
+
+Usage:
+    python feature_store.py extract STORE transcripts.xlsx --transcript-column Transcript
+    python feature_store.py diff STORE new_rubric.xlsx
+    python feature_store.py rescore STORE new_rubric.xlsx --output rescored.csv [--commit]
+"""
+import os
+import csv
+import json
+import time
+import argparse
+import numpy as np
+from batch_engine import BatchScoringEngine, band_index
+from tracing import span
+
+STORE_VERSION = 1
+FLOW_POINTS = (1, 2, 2)   # opening, introduction, closing, as in ScoringEngine.score_flow
+
+
+def load_rubrics(path):
+    """Rubrics from a .json export or a rubric workbook"""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    from rubric_parser import RubricParser
+    return RubricParser(path).get_rubrics()
+
+
+def _metrics(rubrics):
+    """First metric of each name, the one BatchScoringEngine.lexical_metrics computes fillers for"""
+    metrics = {}
+    for c in rubrics["criteria"]:
+        for m in c["metrics"]:
+            metrics.setdefault(m["name"], m)
+    return metrics
+
+
+def extract_features(engine, transcripts, durations=None):
+    """
+    Rubric-independent features for a batch of transcripts, as a dict of
+    NumPy arrays (matrix columns are named by the matching *_columns entry).
+    """
+    batch = BatchScoringEngine(engine)
+    n = len(transcripts)
+    durations = list(durations) if durations is not None else [None] * n
+    lexical = batch.lexical_metrics(transcripts, durations)
+    metrics = _metrics(engine.rubrics)
+
+    features = {name: lexical[name] for name in (
+        "word_count", "unique_words", "ttr", "has_duration", "wpm",
+        "compound", "positive_words", "negative_words", "sentiment_score")}
+
+    contexts = None
+    if engine.concept_index is not None or engine.shared_embeddings:
+        contexts = batch.analysis_contexts(transcripts)
+
+    with span("features.grammar", category="scoring", documents=n):
+        features["grammar_errors"] = np.array([engine.grammar.count_errors(t) for t in transcripts],
+                                              dtype=np.int64)
+    with span("features.flow", category="scoring", documents=n):
+        sections = [engine.flow_sections(t, contexts[i] if contexts else None) for i, t in enumerate(transcripts)]
+    features["flow_sections"] = np.array(sections, dtype=bool).reshape(n, 3)
+    features["greeting_similarity"] = batch.greeting_similarities(transcripts, range(n), contexts)
+
+    if "Filler Word Rate" in metrics:
+        features["filler_columns"] = np.array(metrics["Filler Word Rate"]["filler_words"], dtype=str)
+        features["filler_counts"] = lexical["filler_counts"]
+    if "keyword_hits" in lexical:
+        needles = list(lexical["keyword_hits"])
+        features["keyword_columns"] = np.array(needles, dtype=str)
+        features["keyword_hits"] = np.stack([lexical["keyword_hits"][k] for k in needles], axis=1).reshape(n, -1)
+    if "salutation_hits" in lexical:
+        keywords = list(lexical["salutation_hits"])
+        features["salutation_columns"] = np.array(keywords, dtype=str)
+        features["salutation_hits"] = np.stack([lexical["salutation_hits"][k] for k in keywords],
+                                               axis=1).reshape(n, -1)
+    if engine.concept_index is not None:
+        concepts = engine.concept_index.concepts
+        matches = [engine.concept_index.matches(context.embeddings) for context in contexts]
+        features["concept_columns"] = np.array(concepts, dtype=str)
+        features["semantic_concepts"] = np.array(
+            [[concept in found for concept in concepts] for found in matches], dtype=bool).reshape(n, -1)
+    return features
+
+
+class UnscorableChange(ValueError):
+    """A rubric change that needs transcript text the feature store does not hold"""
+
+
+def _column(features, name, columns_key, key):
+    columns = list(features[columns_key]) if columns_key in features else []
+    if key not in columns:
+        raise UnscorableChange(f"{name} '{key}' was not extracted; rescore from transcripts")
+    return features[name][:, columns.index(key)]
+
+
+def metric_scores(metric, features, salutation_threshold):
+    """Vectorized score of one rubric metric for every row of a feature segment"""
+    name = metric["name"]
+    n = len(features["word_count"])
+
+    if name == "Salutation Level":
+        score = np.zeros(n)
+        matched = np.zeros(n, dtype=bool)
+        for level in reversed(metric["scoring"]):
+            hit = np.zeros(n, dtype=bool)
+            for keyword in level["keywords"]:
+                hit |= _column(features, "salutation_hits", "salutation_columns", keyword)
+            take = hit & ~matched
+            score[take] = level["score"]
+            if level["score"] > 0:
+                matched |= hit
+        similarity = features["greeting_similarity"]
+        semantic = (score == 0) & (similarity > salutation_threshold)
+        score[semantic] = np.minimum(np.floor(similarity[semantic].astype(np.float64) * 5), 5)
+        return score
+
+    if name == "Keyword Presence":
+        score = np.zeros(n)
+        for item in metric["must_have"] + metric["good_to_have"]:
+            found = np.zeros(n, dtype=bool)
+            for kw in item["keywords"]:
+                found |= _column(features, "keyword_hits", "keyword_columns", kw.lower())
+            if "semantic_concepts" in features and item["keyword"] in list(features["concept_columns"]):
+                found |= _column(features, "semantic_concepts", "concept_columns", item["keyword"])
+            score += np.where(found, item["score"], 0)
+        return score
+
+    if name == "Flow":
+        points = features["flow_sections"].astype(np.int64) @ np.array(FLOW_POINTS)
+        return np.minimum(points, metric["max_score"]).astype(np.float64)
+
+    if name == "Words Per Minute":
+        values = np.nan_to_num(features["wpm"], nan=-1.0)
+        return np.where(features["has_duration"], _band(values, metric), 0.0)
+
+    if name == "Grammar Score":
+        word_count = features["word_count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_100 = np.where(word_count > 0, features["grammar_errors"] / np.maximum(word_count, 1) * 100, 0.0)
+        return _band(np.maximum(0, 1 - np.minimum(per_100 / 10, 1)), metric)
+
+    if name == "Vocabulary Richness":
+        return _band(features["ttr"], metric)
+
+    if name == "Filler Word Rate":
+        if list(features.get("filler_columns", [])) != list(metric["filler_words"]):
+            # Multi-word fillers take precedence over their parts, so counts depend on the whole list
+            raise UnscorableChange("filler word list changed; rescore from transcripts")
+        word_count = features["word_count"]
+        total = features["filler_counts"].sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(word_count > 0, total / np.maximum(word_count, 1) * 100, 0.0)
+        return _band(rate, metric)
+
+    if name == "Sentiment/Positivity":
+        return _band(features["sentiment_score"], metric)
+
+    return np.zeros(n)
+
+
+def round2(values):
+    """round(v, 2) for an array: NumPy rounding, with rows near a .xx5 tie redone by Python's exact round"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    ties = np.flatnonzero(np.abs(np.abs(values * 100) % 1 - 0.5) < 1e-6)
+    rounded[ties] = [round(v, 2) for v in values[ties].tolist()]
+    return rounded
+
+
+def _band(values, metric):
+    scores = np.array([r["score"] for r in metric["scoring"]] + [0], dtype=np.float64)
+    return scores[band_index(values, metric["scoring"])]
+
+
+def criterion_scores(criterion, features, salutation_threshold):
+    """Weighted score of one criterion for every row, rounded like build_criterion_result"""
+    total = sum(metric_scores(m, features, salutation_threshold) for m in criterion["metrics"])
+    max_possible = sum(m["max_score"] for m in criterion["metrics"])
+    if not max_possible:
+        return np.zeros(len(features["word_count"]))
+    return round2(total / max_possible * criterion["weight"])
+
+
+def rubric_diff(old, new):
+    """
+    Criteria of `new` that must be recomputed: added, or with a changed weight
+    or metric definition. Removed criteria are listed separately.
+    """
+    old_criteria = {c["name"]: c for c in old["criteria"]}
+    new_names = [c["name"] for c in new["criteria"]]
+    changed = []
+    for criterion in new["criteria"]:
+        previous = old_criteria.get(criterion["name"])
+        if previous is None or json.dumps(previous, sort_keys=True) != json.dumps(criterion, sort_keys=True):
+            changed.append(criterion["name"])
+    removed = [name for name in old_criteria if name not in new_names]
+    return {"changed": changed, "removed": removed,
+            "unchanged": [name for name in new_names if name not in changed]}
+
+
+class FeatureStore:
+    """Directory of feature segments plus the rubric their stored scores were computed with"""
+
+    def __init__(self, path, rubrics=None):
+        self.path = path
+        self.meta_path = os.path.join(path, "store.json")
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+        else:
+            if rubrics is None:
+                raise ValueError(f"{path} is not a feature store; pass rubrics to create one")
+            os.makedirs(path, exist_ok=True)
+            self.meta = {"version": STORE_VERSION, "rubrics": rubrics, "segments": [],
+                         "salutation_threshold": None, "rows": 0}
+        self._index = None
+
+    @property
+    def rubrics(self):
+        return self.meta["rubrics"]
+
+    @property
+    def criteria(self):
+        return [c["name"] for c in self.rubrics["criteria"]]
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def add(self, engine, ids, transcripts, durations=None):
+        """Extract features for a batch, score it under the store rubric and write one segment"""
+        if json.dumps(engine.rubrics, sort_keys=True) != json.dumps(self.rubrics, sort_keys=True):
+            raise ValueError("engine rubric differs from the store rubric; rescore the store first")
+        threshold = self.meta["salutation_threshold"]
+        if threshold is None:
+            threshold = self.meta["salutation_threshold"] = engine.salutation_threshold
+        elif threshold != engine.salutation_threshold:
+            raise ValueError("engine similarity backend differs from the one this store was built with")
+
+        with span("FeatureStore.add", category="scoring", documents=len(transcripts)):
+            features = extract_features(engine, transcripts, durations)
+            weighted = np.stack([criterion_scores(c, features, threshold) for c in self.rubrics["criteria"]],
+                                axis=1)
+        name = f"segment-{len(self.meta['segments']):05d}.npz"
+        np.savez_compressed(os.path.join(self.path, name), ids=np.array(ids, dtype=str), weighted=weighted, **features)
+        self.meta["segments"].append(name)
+        self.meta["rows"] += len(ids)
+        self._save_meta()
+        self._index = None
+        return weighted
+
+    def segments(self):
+        """Yields (segment name, dict of arrays) one segment at a time"""
+        for name in self.meta["segments"]:
+            with np.load(os.path.join(self.path, name)) as data:
+                yield name, {key: data[key] for key in data.files}
+
+    def lookup(self, transcript_id):
+        """Stored features and weighted scores of one transcript, or None"""
+        if self._index is None:
+            self._index = {}
+            for name, data in self.segments():
+                for row, stored_id in enumerate(data["ids"].tolist()):
+                    self._index[stored_id] = (name, row)
+        location = self._index.get(transcript_id)
+        if location is None:
+            return None
+        name, row = location
+        with np.load(os.path.join(self.path, name)) as data:
+            return {key: data[key][row] for key in data.files if not key.endswith("_columns")}
+
+    def rescore(self, new_rubrics):
+        """
+        Yields (ids, criterion names, weighted matrix, overall) per segment under
+        new_rubrics, recomputing only the criteria rubric_diff reports as changed.
+        """
+        diff = rubric_diff(self.rubrics, new_rubrics)
+        old_names = self.criteria
+        threshold = self.meta["salutation_threshold"]
+        names = [c["name"] for c in new_rubrics["criteria"]]
+        for _, data in self.segments():
+            columns = []
+            for criterion in new_rubrics["criteria"]:
+                if criterion["name"] in diff["changed"]:
+                    columns.append(criterion_scores(criterion, data, threshold))
+                else:
+                    columns.append(data["weighted"][:, old_names.index(criterion["name"])])
+            weighted = np.stack(columns, axis=1) if columns else np.zeros((len(data["ids"]), 0))
+            overall = round2(weighted.sum(axis=1))
+            yield data["ids"], names, weighted, overall
+
+    def commit_rubric(self, new_rubrics):
+        """Rescore every segment in place and make new_rubrics the store rubric"""
+        rescored = self.rescore(new_rubrics)
+        for name, (_, _, weighted, _) in zip(list(self.meta["segments"]), rescored):
+            path = os.path.join(self.path, name)
+            with np.load(path) as data:
+                arrays = {key: data[key] for key in data.files}
+            arrays["weighted"] = weighted
+            tmp = path + ".tmp.npz"
+            np.savez_compressed(tmp, **arrays)
+            os.replace(tmp, path)
+        self.meta["rubrics"] = new_rubrics
+        self._save_meta()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Feature store for incremental rescoring")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="Score a transcript workbook into the store")
+    extract.add_argument("store")
+    extract.add_argument("workbook")
+    extract.add_argument("--rubric-file", default="Case study for interns.xlsx")
+    extract.add_argument("--id-column", help="Header of the student/transcript id column (default: row number)")
+    extract.add_argument("--transcript-column")
+    extract.add_argument("--duration-column")
+    extract.add_argument("--batch-size", type=int, default=1024)
+
+    diff = commands.add_parser("diff", help="Criteria a new rubric would recompute")
+    diff.add_argument("store")
+    diff.add_argument("rubric", help="New rubric (.xlsx or .json)")
+
+    rescore = commands.add_parser("rescore", help="Recompute changed criteria from stored features")
+    rescore.add_argument("store")
+    rescore.add_argument("rubric", help="New rubric (.xlsx or .json)")
+    rescore.add_argument("--output", help="CSV of id, overall and weighted criterion scores")
+    rescore.add_argument("--commit", action="store_true", help="Make the new rubric the store rubric")
+    args = arg_parser.parse_args()
+
+    if args.command == "extract":
+        from scoring_engine import ScoringEngine
+        from excel_bulk import iter_rows
+
+        rubrics = load_rubrics(args.rubric_file)
+        store = FeatureStore(args.store, rubrics)
+        engine = ScoringEngine(rubrics)
+        rows = iter_rows(args.workbook, transcript_column=args.transcript_column,
+                         duration_column=args.duration_column)
+        header = next(rows)[0]
+        id_index = [str(h).strip().lower() for h in header].index(args.id_column.lower()) if args.id_column else None
+        batch = []
+        for number, (row, transcript, duration) in enumerate(rows, start=1):
+            batch.append((str(row[id_index]) if id_index is not None else str(number), transcript, duration))
+            if len(batch) >= args.batch_size:
+                store.add(engine, *zip(*batch))
+                batch = []
+        if batch:
+            store.add(engine, *zip(*batch))
+        engine.close()
+        print(f"{store.meta['rows']} transcripts in {args.store}")
+        return
+
+    store = FeatureStore(args.store)
+    new_rubrics = load_rubrics(args.rubric)
+    result = rubric_diff(store.rubrics, new_rubrics)
+    print(f"Changed criteria: {result['changed'] or 'none'}; removed: {result['removed'] or 'none'}")
+    if args.command == "diff":
+        return
+
+    started = time.perf_counter()
+    rows = 0
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else None
+    try:
+        writer = csv.writer(output) if output else None
+        for ids, names, weighted, overall in store.rescore(new_rubrics):
+            if writer is not None:
+                if rows == 0:
+                    writer.writerow(["id", "overall_score"] + names)
+                for row in zip(ids.tolist(), overall.tolist(), *weighted.T.tolist()):
+                    writer.writerow(row)
+            rows += len(ids)
+    finally:
+        if output:
+            output.close()
+    print(f"Rescored {rows} transcripts in {time.perf_counter() - started:.2f}s")
+    if args.commit:
+        store.commit_rubric(new_rubrics)
+        print("Store rubric updated")
+
+
+if __name__ == "__main__":
+    main()
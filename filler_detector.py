@@ -0,0 +1,159 @@
+"""
+Filler Detector - One-pass filler word/phrase detection over the token stream
+
+The filler list is compiled into a token trie ("you" -> "know"), so each token
+costs one dict lookup plus a short walk for multi-word fillers, independent of
+how many fillers the rubric lists. Ambiguous words ("like", "so", "well",
+"right") only count when the surrounding context marks them as fillers.
+"""
+import re
+from bisect import bisect_left
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+CLAUSE_BREAK = re.compile(r"[,.;:!?\-—]")
+
+# Context rules for fillers that are also ordinary words
+VERB_LIKE_SUBJECTS = frozenset([
+    "i", "you", "we", "they", "would", "don't", "didn't", "dont", "didnt", "also",
+    "really", "not", "to", "i'd", "feel", "look", "looks", "looked", "just", "what",
+    "he", "she", "people", "friends", "students", "things", "who",
+])
+
+
+class FillerDetector:
+    """Compiled detector for one filler list"""
+
+    _END = object()
+
+    def __init__(self, filler_words):
+        self.filler_words = list(filler_words)
+        self.trie = {}
+        for filler in self.filler_words:
+            node = self.trie
+            for token in filler.lower().split():
+                node = node.setdefault(token, {})
+            node[self._END] = filler
+
+    @staticmethod
+    def tokenize(text):
+        """
+        Lowercased tokens with their character offsets and whether a clause
+        break (comma, full stop, ...) comes before/after each one.
+        """
+        lower = text.lower()
+        tokens, offsets, break_before, break_after = [], [], [], []
+        previous_end = 0
+        for match in TOKEN_PATTERN.finditer(lower):
+            start = match.start()
+            gap_break = bool(CLAUSE_BREAK.search(lower, previous_end, start)) or not tokens
+            if tokens:
+                break_after[-1] = gap_break
+            tokens.append(match.group())
+            offsets.append(start)
+            break_before.append(gap_break)
+            break_after.append(True)
+            previous_end = match.end()
+        return tokens, offsets, break_before, break_after
+
+    def _is_filler_use(self, word, i, tokens, break_before, break_after, previous_was_filler):
+        """Context check for single words that are fillers only in some uses"""
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+        previous = tokens[i - 1] if i > 0 and not break_before[i] else None
+        if word == "like":
+            # "I like cricket", "would like to": the verb
+            if previous in VERB_LIKE_SUBJECTS or next_token == "to":
+                return False
+            # "um like ...", "it was, like, huge", "like I said": chained or pause-marked
+            return previous_was_filler or break_before[i] or break_after[i]
+        if word == "so":
+            # Discourse "so" opens a clause; "so happy" and "I think so" are not fillers
+            return break_before[i]
+        if word == "well":
+            # "Well, ..." opens a clause; "as well", "do well" are ordinary uses
+            return break_before[i]
+        if word == "right":
+            # Tag question "..., right?" or "Right, ..." rather than "right hand"
+            return break_after[i]
+        return True
+
+    def detect(self, text):
+        """
+        Returns (matches, counts): matches are dicts with filler, token index
+        and character offset; counts maps filler -> occurrences.
+        """
+        tokens, offsets, break_before, break_after = self.tokenize(text)
+        matches, counts, _, _ = self._scan(tokens, offsets, break_before, break_after, 0, len(tokens), -1)
+        return matches, counts
+
+    def detect_window(self, text, start, end, resume=None, after_filler=False):
+        """
+        Detection for the part of `text` in [start, end) when text is one window
+        of a longer transcript: the words around that range are context only.
+        Scanning starts at the first token at or after `resume` (default start;
+        where the previous window's scan stopped), with `after_filler` telling
+        whether a filler ended right there. Returns (matches, counts, resume,
+        after_filler) for the next window, offsets relative to `text`.
+        """
+        tokens, offsets, break_before, break_after = self.tokenize(text)
+        resume = start if resume is None else resume
+        first = bisect_left(offsets, resume)
+        stop = bisect_left(offsets, end)
+        matches, counts, i, previous_filler_end = self._scan(
+            tokens, offsets, break_before, break_after, first, stop, first if after_filler else -1)
+        next_offset = offsets[i] if i < len(offsets) else len(text)
+        return matches, counts, next_offset, previous_filler_end == i
+
+    def _scan(self, tokens, offsets, break_before, break_after, i, stop, previous_filler_end):
+        """Greedy longest-match scan of fillers starting at tokens[i:stop]; phrases may run past stop"""
+        trie = self.trie
+        end_key = self._END
+        matches = []
+        counts = {}
+        n = len(tokens)
+        while i < stop:
+            node = trie.get(tokens[i])
+            if node is None:
+                i += 1
+                continue
+            # Longest filler starting at token i; phrases must not span a clause break
+            best = node.get(end_key)
+            best_end = i + 1
+            j = i + 1
+            while j < n and not break_before[j]:
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if end_key in node:
+                    best = node[end_key]
+                    best_end = j
+            if best is not None and (best_end - i > 1 or self._is_filler_use(
+                    tokens[i], i, tokens, break_before, break_after, previous_filler_end == i)):
+                matches.append({"filler": best, "token_index": i, "offset": offsets[i]})
+                counts[best] = counts.get(best, 0) + 1
+                previous_filler_end = best_end
+                i = best_end
+            else:
+                i += 1
+        return matches, counts, i, previous_filler_end
+
+    def count(self, text):
+        """Per-filler counts in filler-list order"""
+        counts = self.detect(text)[1]
+        return [counts.get(filler, 0) for filler in self.filler_words]
+
+    def count_batch(self, texts):
+        """count() for a list of texts"""
+        return [self.count(text) for text in texts]
+
+
+_detectors = {}
+
+
+def get_detector(filler_words):
+    """Detector for a filler list, compiled once per distinct list"""
+    key = tuple(filler_words)
+    detector = _detectors.get(key)
+    if detector is None:
+        detector = _detectors[key] = FillerDetector(filler_words)
+    return detector
@@ -0,0 +1,156 @@
+"""
+Model Registry - Process-wide, reference-counted cache of loaded models and parsed resources
+"""
+import os
+import time
+import threading
+from tracing import span
+
+
+def _rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _param_bytes(obj):
+    """Bytes held by a torch module's parameters and buffers (None for non-modules)"""
+    if not hasattr(obj, "parameters"):
+        return None
+    total = 0
+    for tensor in list(obj.parameters()) + list(obj.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelHandle:
+    """A counted reference to a shared resource; call release() (or use as a context manager) when done"""
+
+    def __init__(self, registry, key, entry):
+        self._registry = registry
+        self.key = key
+        self.value = entry["value"]
+        # Callers whose model is not safe for concurrent use (e.g. Whisper) serialize on this
+        self.lock = entry["call_lock"]
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._registry.release(self.key)
+
+    def __enter__(self):
+        return self.value
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class ModelRegistry:
+    """
+    Loads each keyed resource at most once per process. Concurrent acquires of
+    the same key wait for the first load instead of loading in parallel, and a
+    resource is dropped when its last handle is released (unless pinned).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def acquire(self, key, loader, pin=False):
+        """Return a handle to the resource for key, calling loader() only if it is not loaded yet"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "value": None,
+                    "refs": 0,
+                    "pinned": pin,
+                    "load_lock": threading.Lock(),
+                    "call_lock": threading.RLock(),
+                    "loaded": False,
+                }
+                self._entries[key] = entry
+            entry["refs"] += 1
+            entry["pinned"] = entry["pinned"] or pin
+
+        with entry["load_lock"]:
+            if not entry["loaded"]:
+                try:
+                    rss_before = _rss_bytes()
+                    started = time.perf_counter()
+                    with span(f"registry.load:{key[0]}", category="model", key=str(key)):
+                        entry["value"] = loader()
+                    entry["load_seconds"] = round(time.perf_counter() - started, 3)
+                    rss_after = _rss_bytes()
+                    entry["rss_delta_bytes"] = (rss_after - rss_before) if rss_before is not None and rss_after is not None else None
+                    entry["param_bytes"] = _param_bytes(entry["value"])
+                    entry["loaded"] = True
+                except Exception:
+                    self.release(key)
+                    raise
+
+        return ModelHandle(self, key, entry)
+
+    def release(self, key):
+        """Drop one reference; the resource is freed when none remain"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["refs"] -= 1
+            if entry["refs"] <= 0 and not entry["pinned"]:
+                del self._entries[key]
+
+    def stats(self):
+        """Reference counts, load time and memory footprint per loaded resource"""
+        with self._lock:
+            items = list(self._entries.items())
+        report = []
+        for key, entry in items:
+            if not entry["loaded"]:
+                continue
+            memory = entry["param_bytes"] if entry["param_bytes"] is not None else entry["rss_delta_bytes"]
+            report.append({
+                "kind": key[0],
+                "name": str(key[1]),
+                "refs": entry["refs"],
+                "pinned": entry["pinned"],
+                "load_seconds": entry["load_seconds"],
+                "param_bytes": entry["param_bytes"],
+                "rss_delta_bytes": entry["rss_delta_bytes"],
+                "memory_mb": round(memory / (1024 * 1024), 1) if memory is not None else None,
+            })
+        return report
+
+
+# The one registry for this process
+registry = ModelRegistry()
+
+
+def acquire_sentence_transformer(model_name="all-MiniLM-L6-v2"):
+    """Shared SentenceTransformer handle"""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    return registry.acquire(("sentence-transformer", model_name), load)
+
+
+def acquire_whisper(model_size="base"):
+    """Shared Whisper model handle"""
+    def load():
+        import whisper
+        return whisper.load_model(model_size)
+    return registry.acquire(("whisper", model_size), load)
+
+
+def acquire_rubric_parser(excel_file="Case study for interns.xlsx"):
+    """Shared RubricParser handle, so the Excel workbook is parsed once per process"""
+    def load():
+        from rubric_parser import RubricParser
+        return RubricParser(excel_file)
+    return registry.acquire(("rubrics", os.path.abspath(excel_file)), load)
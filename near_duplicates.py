@@ -0,0 +1,193 @@
+"""
+Near Duplicates - MinHash/LSH index for copied and templated transcripts
+
+Each transcript is reduced to its set of word 3-gram shingles and then to a
+128-value MinHash signature, whose agreement with another signature estimates
+the two shingle sets' Jaccard similarity. Signatures are split into 16 bands
+of 8 rows and each band is hashed into a bucket, so a lookup only compares
+against transcripts sharing at least one bucket (pairs at Jaccard 0.8 collide
+with probability > 0.99, pairs at 0.3 with < 0.001). Adding a transcript is
+O(bands), so the index is maintained incrementally as text is ingested.
+With `max_entries` the oldest transcripts are evicted first, which bounds the
+memory of a long-running process (about 4 KB per indexed transcript).
+
+A template copy with only the name changed is a near duplicate, not an exact
+one: its word count, TTR and grammar counts can differ, so it is still scored.
+Byte-identical transcripts (same text and duration) reuse the cached result
+via ResultCache instead of being scored again.
+
+Run `python near_duplicates.py` for ingest/lookup timings.
+"""
+import re
+import time
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+EMPTY_HASH = 0xFFFFFFFF
+
+
+def shingles(text, size=3):
+    """Set of hashed word n-grams (32-bit), on lowercased words without punctuation"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        words = words and [" ".join(words)]
+        size = 1
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def text_digest(text):
+    return hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+
+
+class NearDuplicateIndex:
+    """Thread-safe MinHash/LSH index; check() is the ingest call (query, then add)"""
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, shingle_size=3, seed=1, max_entries=None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        rng = np.random.RandomState(seed)
+        # Multiply-shift hashing: h(x) = ((a * x + b) mod 2**64) >> 32 with odd a, no modulo needed
+        self._a = rng.randint(0, 2 ** 63, size=(num_perm, 1), dtype=np.int64).astype(np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size=(num_perm, 1), dtype=np.int64).astype(np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        # doc_id -> (signature, text digest), oldest first
+        self._signatures = OrderedDict()
+        self._exact = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signature(self, text):
+        """MinHash signature (num_perm uint32 values); all-max for text without words"""
+        values = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        if values.size == 0:
+            return np.full(self.num_perm, EMPTY_HASH, dtype=np.uint32)
+        return ((self._a * values + self._b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _query_locked(self, signature, keys):
+        candidates = set()
+        for buckets, key in zip(self._buckets, keys):
+            candidates.update(buckets.get(key, ()))
+        matches = []
+        for doc_id in candidates:
+            similarity = float(np.count_nonzero(self._signatures[doc_id][0] == signature)) / self.num_perm
+            if similarity >= self.threshold:
+                matches.append((doc_id, round(similarity, 3)))
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+    def query(self, text):
+        """[(doc_id, estimated Jaccard)] of indexed transcripts at or above the threshold, best first"""
+        signature = self.signature(text)
+        with self._lock:
+            return self._query_locked(signature, self._band_keys(signature))
+
+    def add(self, doc_id, text):
+        signature = self.signature(text)
+        with self._lock:
+            self._add_locked(doc_id, text, signature, self._band_keys(signature))
+
+    def _add_locked(self, doc_id, text, signature, keys):
+        if doc_id in self._signatures:
+            return
+        digest = text_digest(text)
+        self._signatures[doc_id] = (signature, digest)
+        for buckets, key in zip(self._buckets, keys):
+            buckets.setdefault(key, []).append(doc_id)
+        self._exact.setdefault(digest, doc_id)
+        if self.max_entries is not None and len(self._signatures) > self.max_entries:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """Remove the oldest transcript from the buckets and the exact-match table"""
+        doc_id, (signature, digest) = self._signatures.popitem(last=False)
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets[key]
+            bucket.remove(doc_id)
+            if not bucket:
+                del buckets[key]
+        if self._exact.get(digest) == doc_id:
+            del self._exact[digest]
+
+    def check(self, doc_id, text):
+        """
+        Look up `text`, then index it under `doc_id`. Returns
+        {"exact_match": first doc_id with identical text or None,
+         "near_duplicates": [{"id", "similarity"}, ...]}
+        """
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        with self._lock:
+            exact = self._exact.get(text_digest(text))
+            matches = [match for match in self._query_locked(signature, keys) if match[0] != doc_id]
+            self._add_locked(doc_id, text, signature, keys)
+        return {
+            "exact_match": exact if exact != doc_id else None,
+            "near_duplicates": [{"id": match_id, "similarity": similarity} for match_id, similarity in matches],
+        }
+
+
+class ResultCache:
+    """
+    Bounded LRU of scoring results keyed by (text digest, duration, variant);
+    variant names a scoring mode whose result may differ (e.g. "chunked")
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, text, duration_seconds=None, variant=None):
+        key = (text_digest(text), duration_seconds, variant)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+            return result
+
+    def put(self, text, duration_seconds, result, variant=None):
+        with self._lock:
+            self._results[(text_digest(text), duration_seconds, variant)] = result
+            if len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    templates = [" ".join(rng.choice(vocabulary) for _ in range(150)) for _ in range(1000)]
+    index = NearDuplicateIndex()
+
+    # One in ten transcripts is a template copy with a different name
+    texts = [(f"my name is n{i} " + templates[i % 1000]) if i % 10 == 0 else
+             " ".join(rng.choice(vocabulary) for _ in range(150)) for i in range(100000)]
+    started = time.perf_counter()
+    for i, text in enumerate(texts):
+        index.add(i, text)
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {len(index)} transcripts in {elapsed:.1f}s ({elapsed / len(index) * 1e6:.0f} us each)")
+
+    probes = [f"hello my name is someone {templates[i]}" for i in range(0, 1000, 10)]
+    started = time.perf_counter()
+    found = sum(bool(index.query(text)) for text in probes)
+    elapsed = time.perf_counter() - started
+    print(f"Lookup: {elapsed / len(probes) * 1e3:.3f} ms per transcript, {found}/{len(probes)} template copies flagged")
@@ -0,0 +1,153 @@
+"""
+Score Store - Persistent cohort scores in SQLite for ranking, top-k and histogram queries
+
+Scores are keyed by (student, cohort, rubric version); rescoring a student
+under the same rubric replaces the earlier row. The database runs in WAL mode
+so API readers never block the writer, inserts are buffered and written in
+one transaction per batch, and a (cohort, rubric_version, overall_score) index
+makes every cohort query an index range scan:
+
+    rank/percentile  cohort size and median come from cohort_stats (refreshed
+                     per flush); one COUNT over the smaller side of the median
+                     plus an equality seek for ties
+    top-k            ORDER BY overall_score DESC LIMIT k, read from the index
+    histogram        one range COUNT per bucket over the cohort's index range
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    student_id TEXT NOT NULL,
+    cohort TEXT NOT NULL,
+    rubric_version TEXT NOT NULL,
+    overall_score REAL NOT NULL,
+    criteria TEXT,
+    scored_at REAL NOT NULL,
+    PRIMARY KEY (cohort, rubric_version, student_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scores_cohort_score ON scores (cohort, rubric_version, overall_score);
+CREATE TABLE IF NOT EXISTS cohort_stats (
+    cohort TEXT NOT NULL,
+    rubric_version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    median REAL,
+    PRIMARY KEY (cohort, rubric_version)
+) WITHOUT ROWID;
+"""
+
+
+def rubric_version(rubrics):
+    """Short stable id of a rubric, so scores under different rubrics are never ranked together"""
+    return hashlib.sha1(json.dumps(rubrics, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class ScoreStore:
+    """Thread-safe store; writes are buffered until batch_size rows, a query, or flush()"""
+
+    def __init__(self, path="scores.db", batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = []
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def record(self, student_id, cohort, version, result):
+        """Queue one calculate_score result (dict or ScoreResult)"""
+        criteria = {c["criterion"]: c["weighted_score"] for c in result["criteria_scores"]}
+        row = (str(student_id), str(cohort), version, float(result["overall_score"]),
+               json.dumps(criteria), time.time())
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        cohorts = {(row[1], row[2]) for row in self._pending}
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+            for cohort, version in cohorts:
+                size = self._db.execute("SELECT COUNT(*) FROM scores WHERE cohort = ? AND rubric_version = ?",
+                                        (cohort, version)).fetchone()[0]
+                median = self._db.execute(
+                    "SELECT overall_score FROM scores WHERE cohort = ? AND rubric_version = ? "
+                    "ORDER BY overall_score LIMIT 1 OFFSET ?", (cohort, version, size // 2)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO cohort_stats VALUES (?, ?, ?, ?)",
+                                 (cohort, version, size, median[0] if median else None))
+        self._pending = []
+
+    def _query(self, sql, params):
+        with self._lock:
+            self._flush_locked()
+            return self._db.execute(sql, params).fetchall()
+
+    def rank(self, student_id, cohort, version):
+        """Rank (1 = best), cohort size and percentile (share of the cohort scoring below), or None"""
+        row = self._query(
+            "SELECT overall_score FROM scores WHERE cohort = ? AND rubric_version = ? AND student_id = ?",
+            (cohort, version, str(student_id)))
+        if not row:
+            return None
+        score = row[0][0]
+        total, median = self._query(
+            "SELECT size, median FROM cohort_stats WHERE cohort = ? AND rubric_version = ?", (cohort, version))[0]
+        # Count whichever side of the median is smaller; the other side follows from the size
+        side = ">" if score >= median else "<"
+        counted, ties = self._query(
+            "SELECT "
+            f"(SELECT COUNT(*) FROM scores WHERE cohort = ?1 AND rubric_version = ?2 AND overall_score {side} ?3), "
+            "(SELECT COUNT(*) FROM scores WHERE cohort = ?1 AND rubric_version = ?2 AND overall_score = ?3)",
+            (cohort, version, score))[0]
+        if side == ">":
+            above, below = counted, total - counted - ties
+        else:
+            above, below = total - counted - ties, counted
+        return {
+            "student_id": str(student_id),
+            "overall_score": score,
+            "rank": above + 1,
+            "cohort_size": total,
+            # Ties count half, so a cohort of equal scores sits at the 50th percentile
+            "percentile": round((below + 0.5 * ties) / total * 100, 2),
+        }
+
+    def top_k(self, cohort, version, k=10):
+        rows = self._query(
+            "SELECT student_id, overall_score FROM scores WHERE cohort = ? AND rubric_version = ? "
+            "ORDER BY overall_score DESC LIMIT ?", (cohort, version, int(k)))
+        return [{"student_id": student, "overall_score": score} for student, score in rows]
+
+    def histogram(self, cohort, version, bins=10, low=0.0, high=100.0):
+        """Counts of overall scores in `bins` equal-width buckets over [low, high]"""
+        width = (high - low) / bins
+        edges = [low + i * width for i in range(bins + 1)]
+        # Scores outside [low, high] fall into the first/last bucket; the last bucket includes high
+        bounds = [(float("-inf") if i == 0 else edges[i], float("inf") if i == bins - 1 else edges[i + 1])
+                  for i in range(bins)]
+        sql = " UNION ALL ".join(
+            "SELECT COUNT(*) FROM scores WHERE cohort = ?1 AND rubric_version = ?2 "
+            f"AND overall_score >= ?{3 + 2 * i} AND overall_score < ?{4 + 2 * i}"
+            for i in range(bins))
+        params = [cohort, version] + [bound for pair in bounds for bound in pair]
+        counts = [count for (count,) in self._query(sql, params)]
+        return {
+            "edges": [round(edge, 6) for edge in edges],
+            "counts": counts,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._db.close()
@@ -1,23 +1,115 @@
 """
 Scoring Engine - Combines rule-based, NLP-based, and rubric-driven scoring
 """
+import os
 import re
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from tracing import span, traced
+from model_registry import acquire_sentence_transformer
+from model_server import RemoteSentenceEncoder
+from sentiment import get_analyzer
+from grammar_checker import get_checker
+from filler_detector import get_detector
+from semantic_keywords import ConceptIndex, PrototypeMatrix
+from analysis_context import AnalysisContext
+from deadline import CostModel, Deadline
+from results import MetricResult, CriterionResult, ScoreResult
+from lite_similarity import HashedNgramEncoder, LITE_GREETING_PATTERNS, LITE_SALUTATION_THRESHOLD
 
 class ScoringEngine:
-    def __init__(self, rubrics):
+    # Reference greetings for the semantic salutation fallback
+    GREETING_PATTERNS = [
+        "Hello everyone, I am happy to introduce myself",
+        "Good morning, I am excited to be here",
+        "Hi, my name is"
+    ]
+    SALUTATION_THRESHOLD = 0.5
+    
+    # Reference sentences for the semantic Flow checks (shared embeddings mode)
+    FLOW_PROTOTYPES = {
+        "opening": ["Hello everyone", "Good morning to all of you", "Greetings, respected teachers"],
+        "introduction": ["My name is Rahul", "I am Priya", "Let me introduce myself"],
+        "closing": ["Thank you for listening", "That is all about me", "Thanks for your time"]
+    }
+    FLOW_THRESHOLD = 0.5
+    
+    # Grammar issues listed in a result (all are counted)
+    MAX_REPORTED_ISSUES = 20
+    
+    # Prior costs (ms) of the steps a latency budget may skip or sample, refined from observed
+    # timings: "encode" per call, "grammar"/"sentiment" per 1,000 words
+    COST_PRIORS_MS = {"encode": 25.0, "grammar": 2.0, "sentiment": 0.4}
+    # Rule-based metrics always run; this is their rough cost per 1,000 words, for ordering only
+    RULE_COST_MS = 0.5
+    # Shortest prefix grammar/sentiment are sampled on when the full transcript does not fit
+    MIN_SAMPLE_WORDS = 200
+    
+    def __init__(self, rubrics, model_socket=None, semantic_keywords=False, semantic_threshold=0.55,
+                 shared_embeddings=False, similarity_backend="minilm"):
         self.rubrics = rubrics
-        # Load sentence transformer model for semantic similarity
-        print("Loading sentence transformer model...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("Model loaded successfully!")
+        self.sentiment = get_analyzer()
+        self.grammar = get_checker()
+        model_socket = model_socket or os.environ.get("SCORING_MODEL_SOCKET")
+        greeting_patterns = self.GREETING_PATTERNS
+        self.salutation_threshold = self.SALUTATION_THRESHOLD
+        if similarity_backend == "lite":
+            # Hashed character n-grams: no torch, no model download (lite_similarity.py)
+            print("Using lite n-gram similarity backend")
+            self._model_handle = None
+            self.model = HashedNgramEncoder()
+            greeting_patterns = LITE_GREETING_PATTERNS
+            self.salutation_threshold = LITE_SALUTATION_THRESHOLD
+        elif model_socket:
+            # Embeddings come from the host's model server (model_server.py)
+            print(f"Using model server at {model_socket}")
+            self._model_handle = None
+            self.model = RemoteSentenceEncoder(model_socket)
+        else:
+            # Sentence transformer model for semantic similarity, shared across engines in this process
+            print("Loading sentence transformer model...")
+            self._model_handle = acquire_sentence_transformer('all-MiniLM-L6-v2')
+            self.model = self._model_handle.value
+            print("Model loaded successfully!")
+        
+        # Prototype matrices are embedded once here, never per transcript
+        self.shared_embeddings = shared_embeddings
+        with span("ScoringEngine.compile_prototypes", category="model"):
+            self.greeting_prototypes = PrototypeMatrix({"greeting": greeting_patterns}, self.model)
+            self.flow_prototypes = PrototypeMatrix(self.FLOW_PROTOTYPES, self.model) if shared_embeddings else None
+        
+        # Learned step costs for deadline-aware scoring (calculate_score(..., budget_ms=...))
+        self.costs = CostModel(self.COST_PRIORS_MS)
+        
+        # Optional semantic keyword mode: concept prototypes are embedded once, here
+        self.concept_index = None
+        if semantic_keywords:
+            keyword_metric = self.find_metric("Keyword Presence")
+            if keyword_metric is not None:
+                with span("ScoringEngine.compile_concepts", category="model"):
+                    self.concept_index = ConceptIndex(keyword_metric, self.model, semantic_threshold)
     
-    def calculate_score(self, transcript, duration_seconds=None):
+    def find_metric(self, metric_name):
+        """First rubric metric with the given name, or None"""
+        for criterion in self.rubrics["criteria"]:
+            for metric in criterion["metrics"]:
+                if metric["name"] == metric_name:
+                    return metric
+        return None
+    
+    def close(self):
+        """Release this engine's reference to the shared model"""
+        if self._model_handle is not None:
+            self._model_handle.release()
+            self._model_handle = None
+    
+    @traced("ScoringEngine.calculate_score", category="scoring")
+    def calculate_score(self, transcript, duration_seconds=None, compact=False, budget_ms=None):
         """
         Main scoring function
         Returns: dict with overall score and per-criterion scores
+        (compact=True: a ScoreResult, see results.py)
+        With budget_ms, metrics run cheapest first and expensive steps are skipped
+        or sampled once they no longer fit; the result then lists them under "degraded".
         """
         words = transcript.split()
         word_count = len(words)
@@ -27,43 +119,108 @@ class ScoringEngine:
         if duration_seconds:
             wpm = (word_count / duration_seconds) * 60
         
-        results = {
-            "overall_score": 0,
-            "word_count": word_count,
-            "criteria_scores": [],
-            "metadata": {
-                "wpm": wpm,
-                "duration_seconds": duration_seconds
-            }
-        }
-        
-        total_weighted_score = 0
-        total_weight = 0
+        # Sentences are split and (if a semantic check needs them) encoded once for all metrics
+        context = AnalysisContext(transcript, self.model)
         
-        # Process each criterion
-        for criterion in self.rubrics["criteria"]:
-            criterion_result = self.score_criterion(transcript, criterion, wpm, word_count)
-            results["criteria_scores"].append(criterion_result)
-            
-            total_weighted_score += criterion_result["weighted_score"]
-            total_weight += criterion["weight"]
-        
-        # Calculate overall score (0-100)
-        results["overall_score"] = round(total_weighted_score, 2)
+        if budget_ms is None:
+            # Process each criterion
+            criteria_scores = [
+                self.score_criterion(transcript, criterion, wpm, word_count, context)
+                for criterion in self.rubrics["criteria"]
+            ]
+            results = self.build_results(word_count, wpm, duration_seconds, criteria_scores)
+        else:
+            deadline = Deadline(budget_ms)
+            criteria_scores = self.score_within_deadline(transcript, wpm, word_count, context, deadline)
+            results = self.build_results(word_count, wpm, duration_seconds, criteria_scores)
+            results.degraded = deadline.summary()
+        if context.encode_calls:
+            self.costs.observe("encode", context.encode_ms, context.encode_calls)
+        return results if compact else results.to_dict()
+    
+    def score_within_deadline(self, transcript, wpm, word_count, context, deadline):
+        """Criterion results in rubric order, with metrics scored cheapest first"""
+        jobs = [(c, m) for c, criterion in enumerate(self.rubrics["criteria"])
+                for m in range(len(criterion["metrics"]))]
+        jobs.sort(key=lambda job: self.metric_cost(self.rubrics["criteria"][job[0]]["metrics"][job[1]]["name"],
+                                                   word_count))
+        scored = {}
+        for c, m in jobs:
+            criterion = self.rubrics["criteria"][c]
+            metric = criterion["metrics"][m]
+            with span(f"metric:{metric['name']}", category="scoring"):
+                result = self.score_metric(transcript, metric, criterion["name"], wpm, word_count, context, deadline)
+            reason = deadline.degraded.get(metric["name"])
+            if reason is not None:
+                result.fields = {**(result.fields or {}), "degraded": reason}
+            scored[c, m] = result
+        return [
+            self.build_criterion_result(criterion, [scored[c, m] for m in range(len(criterion["metrics"]))])
+            for c, criterion in enumerate(self.rubrics["criteria"])
+        ]
+    
+    def metric_cost(self, metric_name, word_count):
+        """Estimated cost (ms) of a metric, used to run cheap metrics before expensive ones"""
+        thousands = word_count / 1000
+        if metric_name == "Words Per Minute":
+            return 0.0
+        if metric_name == "Grammar Score":
+            return self.costs.estimate("grammar", thousands)
+        if metric_name == "Sentiment/Positivity":
+            return self.costs.estimate("sentiment", thousands)
+        semantic = (metric_name == "Salutation Level"
+                    or (metric_name == "Flow" and self.shared_embeddings)
+                    or (metric_name == "Keyword Presence" and self.concept_index is not None))
+        return self.RULE_COST_MS * thousands + (self.costs.estimate("encode") if semantic else 0.0)
+    
+    def semantic_allowed(self, metric_name, context, deadline, reason):
+        """Whether a semantic step may run: no deadline, embeddings already encoded, or the encode fits"""
+        if deadline is None or (context is not None and context.encoded):
+            return True
+        if deadline.allows(self.costs.estimate("encode")):
+            return True
+        deadline.degrade(metric_name, reason)
+        return False
+    
+    def budget_sample(self, transcript, word_count, metric_name, cost_key, deadline):
+        """
+        (text, words) to analyze: the whole transcript, or under a deadline that
+        cannot fit it, the longest prefix that can (at least MIN_SAMPLE_WORDS)
+        """
+        if deadline is None or word_count <= self.MIN_SAMPLE_WORDS or \
+                deadline.allows(self.costs.estimate(cost_key, word_count / 1000)):
+            return transcript, word_count
+        per_word = self.costs.estimate(cost_key, 0.001) or 1e-6
+        words = int(max(self.MIN_SAMPLE_WORDS, min(word_count, deadline.remaining_ms() / per_word)))
+        if words >= word_count:
+            return transcript, word_count
+        deadline.degrade(metric_name, f"estimated from the first {words} of {word_count} words")
+        return " ".join(transcript.split()[:words]), words
+    
+    def build_results(self, word_count, wpm, duration_seconds, criteria_scores):
+        """Assemble the top-level ScoreResult from per-criterion results"""
+        total_weighted_score = sum(c.weighted_score for c in criteria_scores)
         
-        return results
+        # Overall score (0-100)
+        return ScoreResult(round(total_weighted_score, 2), word_count, criteria_scores, wpm, duration_seconds)
     
-    def score_criterion(self, transcript, criterion, wpm, word_count):
+    def score_criterion(self, transcript, criterion, wpm, word_count, context=None):
         """Score a single criterion"""
-        criterion_name = criterion["name"]
         metrics_scores = []
-        total_metric_score = 0
-        max_possible_score = 0
         
         for metric in criterion["metrics"]:
-            metric_score = self.score_metric(transcript, metric, criterion_name, wpm, word_count)
+            with span(f"metric:{metric['name']}", category="scoring"):
+                metric_score = self.score_metric(transcript, metric, criterion["name"], wpm, word_count, context)
             metrics_scores.append(metric_score)
-            total_metric_score += metric_score["score"]
+        
+        return self.build_criterion_result(criterion, metrics_scores)
+    
+    def build_criterion_result(self, criterion, metrics_scores):
+        """Combine metric results into a weighted criterion result"""
+        total_metric_score = 0
+        max_possible_score = 0
+        for metric, metric_score in zip(criterion["metrics"], metrics_scores):
+            total_metric_score += metric_score.score
             max_possible_score += metric["max_score"]
         
         # Calculate normalized score for this criterion
@@ -72,39 +229,33 @@ class ScoringEngine:
         else:
             normalized_score = 0
         
-        return {
-            "criterion": criterion_name,
-            "weight": criterion["weight"],
-            "score": round(total_metric_score, 2),
-            "max_score": max_possible_score,
-            "weighted_score": round(normalized_score, 2),
-            "metrics": metrics_scores
-        }
+        return CriterionResult(criterion["name"], criterion["weight"], round(total_metric_score, 2),
+                               max_possible_score, round(normalized_score, 2), metrics_scores)
     
-    def score_metric(self, transcript, metric, criterion_name, wpm, word_count):
+    def score_metric(self, transcript, metric, criterion_name, wpm, word_count, context=None, deadline=None):
         """Score a single metric"""
         metric_name = metric["name"]
         
         if metric_name == "Salutation Level":
-            return self.score_salutation(transcript, metric)
+            return self.score_salutation(transcript, metric, context, deadline)
         elif metric_name == "Keyword Presence":
-            return self.score_keyword_presence(transcript, metric)
+            return self.score_keyword_presence(transcript, metric, context, deadline)
         elif metric_name == "Flow":
-            return self.score_flow(transcript, metric)
+            return self.score_flow(transcript, metric, context, deadline)
         elif metric_name == "Words Per Minute":
             return self.score_wpm(wpm, metric)
         elif metric_name == "Grammar Score":
-            return self.score_grammar(transcript, metric, word_count)
+            return self.score_grammar(transcript, metric, word_count, deadline)
         elif metric_name == "Vocabulary Richness":
             return self.score_vocabulary(transcript, metric)
         elif metric_name == "Filler Word Rate":
             return self.score_filler_words(transcript, metric, word_count)
         elif metric_name == "Sentiment/Positivity":
-            return self.score_sentiment(transcript, metric)
+            return self.score_sentiment(transcript, metric, word_count, deadline)
         else:
-            return {"metric": metric_name, "score": 0, "feedback": "Unknown metric"}
+            return MetricResult(metric_name, 0, None, feedback="Unknown metric")
     
-    def score_salutation(self, transcript, metric):
+    def score_salutation(self, transcript, metric, context=None, deadline=None):
         """Rule-based + NLP: Score salutation level"""
         transcript_lower = transcript.lower()
         first_sentence = transcript.split('.')[0] if '.' in transcript else transcript[:100]
@@ -125,32 +276,29 @@ class ScoringEngine:
                 break
         
         # NLP-based: Semantic similarity with greeting patterns
-        if score == 0:
-            greeting_patterns = [
-                "Hello everyone, I am happy to introduce myself",
-                "Good morning, I am excited to be here",
-                "Hi, my name is"
-            ]
-            
-            first_sent_embedding = self.model.encode([first_sentence])
-            pattern_embeddings = self.model.encode(greeting_patterns)
-            similarities = cosine_similarity(first_sent_embedding, pattern_embeddings)[0]
-            max_similarity = max(similarities)
+        if score == 0 and self.semantic_allowed("Salutation Level", context if self.shared_embeddings else None,
+                                                deadline, "semantic greeting fallback skipped"):
+            if self.shared_embeddings:
+                context = context or AnalysisContext(transcript, self.model)
+                first_sent_embedding = context.embeddings[:1]
+            else:
+                with span("ScoringEngine.encode", category="model", sentences=1), self.costs.measure("encode"):
+                    first_sent_embedding = self.model.encode([first_sentence])
+            max_similarity = self.greeting_prototypes.similarities(first_sent_embedding).max(initial=0.0)
             
-            if max_similarity > 0.5:
+            if max_similarity > self.salutation_threshold:
                 score = min(int(max_similarity * 5), 5)
                 matched_level = "Semantic Match"
         
-        return {
-            "metric": "Salutation Level",
-            "score": score,
-            "max_score": metric["max_score"],
+        return self.salutation_result(metric, score, matched_level, keywords_found)
+    
+    def salutation_result(self, metric, score, matched_level, keywords_found):
+        return MetricResult("Salutation Level", score, metric["max_score"], {
             "level": matched_level,
-            "keywords_found": keywords_found,
-            "feedback": f"Salutation: {matched_level} (Score: {score}/{metric['max_score']})"
-        }
+            "keywords_found": keywords_found
+        }, ("Salutation: {} (Score: {}/{})", (matched_level, score, metric["max_score"])))
     
-    def score_keyword_presence(self, transcript, metric):
+    def score_keyword_presence(self, transcript, metric, context=None, deadline=None):
         """Rule-based + NLP: Score keyword presence"""
         transcript_lower = transcript.lower()
         score = 0
@@ -200,60 +348,108 @@ class ScoringEngine:
                     "score": 0
                 }
         
-        return {
-            "metric": "Keyword Presence",
-            "score": score,
-            "max_score": metric["max_score"],
-            "keywords_found": keywords_found,
-            "feedback": f"Found {sum(1 for k in keywords_found.values() if k['found'])}/{len(keywords_found)} required elements"
-        }
+        # NLP-based: concepts expressed without any listed keyword
+        if self.concept_index is not None and self.semantic_allowed("Keyword Presence", context, deadline,
+                                                                    "semantic concept matching skipped"):
+            context = context or AnalysisContext(transcript, self.model)
+            score += self.apply_semantic_keywords(metric, keywords_found, context.sentences, context.embeddings)
+        
+        return self.keyword_result(metric, score, keywords_found)
     
-    def score_flow(self, transcript, metric):
+    def apply_semantic_keywords(self, metric, keywords_found, sentences, sentence_embeddings):
+        """Mark concepts missed by keyword matching but covered semantically; returns the added score"""
+        added = 0
+        matches = self.concept_index.matches(sentence_embeddings)
+        for item in metric["must_have"] + metric["good_to_have"]:
+            match = matches.get(item["keyword"])
+            if match is None or keywords_found[item["keyword"]]["found"]:
+                continue
+            similarity, sentence_index = match
+            added += item["score"]
+            keywords_found[item["keyword"]] = {
+                "found": True,
+                "keywords": [],
+                "semantic_match": {
+                    "sentence": sentences[sentence_index],
+                    "similarity": round(similarity, 3)
+                },
+                "score": item["score"]
+            }
+        return added
+    
+    def keyword_result(self, metric, score, keywords_found):
+        found = sum(1 for k in keywords_found.values() if k["found"])
+        return MetricResult("Keyword Presence", score, metric["max_score"], {
+            "keywords_found": keywords_found
+        }, ("Found {}/{} required elements", (found, len(keywords_found))))
+    
+    def score_flow(self, transcript, metric, context=None, deadline=None):
         """NLP-based: Score flow/structure"""
-        # Simple heuristic: check if transcript follows logical order
-        # Salutation → Name → Details → Closing
-        
-        sentences = [s.strip() for s in re.split('[.!?]', transcript) if s.strip()]
+        opening, introduction, closing = self.flow_sections(transcript, context, deadline)
         
         flow_score = 0
         feedback = []
         
         # Check salutation in first sentence
-        if any(word in sentences[0].lower() for word in ['hello', 'hi', 'good', 'greetings']):
+        if opening:
             flow_score += 1
             feedback.append("Good opening salutation")
         
         # Check name in first 2 sentences
-        first_two = ' '.join(sentences[:2]).lower()
-        if any(word in first_two for word in ['name', 'myself', 'i am', "i'm"]):
+        if introduction:
             flow_score += 2
             feedback.append("Name introduced early")
         
         # Check closing in last sentence
-        if any(word in sentences[-1].lower() for word in ['thank', 'thanks', 'pleasure', 'nice']):
+        if closing:
             flow_score += 2
             feedback.append("Has proper closing")
         
         # Normalize to metric's max score
         score = min(flow_score, metric["max_score"])
         
-        return {
-            "metric": "Flow",
-            "score": score,
-            "max_score": metric["max_score"],
-            "feedback": "; ".join(feedback) if feedback else "Structure could be improved"
-        }
+        return MetricResult("Flow", score, metric["max_score"],
+                            feedback=("; ".join(feedback) if feedback else "Structure could be improved"))
+    
+    def flow_sections(self, transcript, context=None, deadline=None):
+        """(opening, introduction, closing) flags in the expected order"""
+        # Simple heuristic: check if transcript follows logical order
+        # Salutation → Name → Details → Closing
+        
+        sentences = [s.strip() for s in re.split('[.!?]', transcript) if s.strip()]
+        if not sentences:
+            # Punctuation only (e.g. "..."): there is no opening, introduction or closing
+            return False, False, False
+        
+        # Keyword checks first; in shared embeddings mode a missed section can
+        # still be recognized semantically at its expected position
+        opening = any(word in sentences[0].lower() for word in ['hello', 'hi', 'good', 'greetings'])
+        first_two = ' '.join(sentences[:2]).lower()
+        introduction = any(word in first_two for word in ['name', 'myself', 'i am', "i'm"])
+        closing = any(word in sentences[-1].lower() for word in ['thank', 'thanks', 'pleasure', 'nice'])
+        if self.shared_embeddings and not (opening and introduction and closing) and \
+                self.semantic_allowed("Flow", context, deadline, "semantic section checks skipped"):
+            context = context or AnalysisContext(transcript, self.model)
+            opening, introduction, closing = self.semantic_flow_sections(context, opening, introduction, closing)
+        return opening, introduction, closing
+    
+    def semantic_flow_sections(self, context, opening, introduction, closing):
+        """Opening/introduction/closing found by similarity to the Flow prototypes, in order"""
+        similarities = self.flow_prototypes.similarities(context.embeddings)
+        if similarities.shape[0] == 0:
+            return opening, introduction, closing
+        detected = similarities >= self.FLOW_THRESHOLD
+        names = self.flow_prototypes.names
+        opening = opening or bool(detected[0, names.index("opening")])
+        introduction = introduction or bool(detected[:2, names.index("introduction")].any())
+        closing = closing or bool(detected[-1, names.index("closing")])
+        return opening, introduction, closing
     
     def score_wpm(self, wpm, metric):
         """Rule-based: Score words per minute"""
         if wpm is None:
-            return {
-                "metric": "Words Per Minute",
-                "score": 0,
-                "max_score": metric["max_score"],
-                "wpm": None,
-                "feedback": "Duration not provided, cannot calculate WPM"
-            }
+            return MetricResult("Words Per Minute", 0, metric["max_score"], {"wpm": None},
+                                "Duration not provided, cannot calculate WPM")
         
         score = 0
         level = "Unknown"
@@ -265,34 +461,31 @@ class ScoringEngine:
                 level = range_data["level"]
                 break
         
-        return {
-            "metric": "Words Per Minute",
-            "score": score,
-            "max_score": metric["max_score"],
-            "wpm": round(wpm, 2),
-            "level": level,
-            "feedback": f"Speech rate: {round(wpm, 2)} WPM ({level})"
-        }
-    
-    def score_grammar(self, transcript, metric, word_count):
-        """Rule-based: Score grammar using simple heuristics"""
-        # Simple grammar checks (in real implementation, use language_tool_python)
-        errors = 0
-        
-        # Basic checks
-        sentences = [s.strip() for s in re.split('[.!?]', transcript) if s.strip()]
+        return self.wpm_result(metric, score, wpm, level)
+    
+    def wpm_result(self, metric, score, wpm, level):
+        wpm = round(wpm, 2)
+        return MetricResult("Words Per Minute", score, metric["max_score"], {
+            "wpm": wpm,
+            "level": level
+        }, ("Speech rate: {} WPM ({})", (wpm, level)))
+    
+    def score_grammar(self, transcript, metric, word_count, deadline=None):
+        """Rule-based: Score grammar with the offline rule checker (grammar_checker.py)"""
+        text, checked_words = self.budget_sample(transcript, word_count, "Grammar Score", "grammar", deadline)
+        with self.costs.measure("grammar", checked_words / 1000):
+            issues = self.grammar.check(text)
         
-        for sentence in sentences:
-            # Check if sentence starts with capital letter
-            if sentence and not sentence[0].isupper():
-                errors += 1
-            
-            # Check for common errors (simple heuristics)
-            if ' i ' in sentence.lower() and ' I ' not in sentence:
-                errors += 1
+        rule_counts = {}
+        for issue in issues:
+            rule_counts[issue["rule"]] = rule_counts.get(issue["rule"], 0) + 1
         
-        # Calculate grammar score
-        errors_per_100 = (errors / word_count) * 100 if word_count > 0 else 0
+        return self.grammar_result(metric, len(issues), checked_words, word_count, rule_counts, issues)
+    
+    def grammar_result(self, metric, issue_count, checked_words, word_count, rule_counts, issues):
+        # Calculate grammar score (a sampled prefix's error rate stands for the whole transcript)
+        errors_per_100 = (issue_count / checked_words) * 100 if checked_words > 0 else 0
+        errors = issue_count if checked_words == word_count else round(errors_per_100 * word_count / 100)
         grammar_score_value = max(0, 1 - min(errors_per_100 / 10, 1))
         
         # Map to score range
@@ -303,15 +496,13 @@ class ScoringEngine:
                 score = range_data["score"]
                 break
         
-        return {
-            "metric": "Grammar Score",
-            "score": score,
-            "max_score": metric["max_score"],
+        return MetricResult("Grammar Score", score, metric["max_score"], {
             "errors": errors,
             "errors_per_100": round(errors_per_100, 2),
             "grammar_score_value": round(grammar_score_value, 3),
-            "feedback": f"Grammar quality: {round(grammar_score_value * 100, 1)}% ({errors} errors detected)"
-        }
+            "rule_counts": rule_counts,
+            "issues": issues[:self.MAX_REPORTED_ISSUES]
+        }, ("Grammar quality: {}% ({} errors detected)", (round(grammar_score_value * 100, 1), errors)))
     
     def score_vocabulary(self, transcript, metric):
         """Rule-based: Score vocabulary richness using TTR"""
@@ -327,32 +518,23 @@ class ScoringEngine:
                 score = range_data["score"]
                 break
         
-        return {
-            "metric": "Vocabulary Richness",
-            "score": score,
-            "max_score": metric["max_score"],
-            "ttr": round(ttr, 3),
-            "unique_words": len(unique_words),
-            "total_words": len(words),
-            "feedback": f"Vocabulary diversity: TTR = {round(ttr, 3)} ({len(unique_words)} unique words)"
-        }
+        return self.vocabulary_result(metric, score, ttr, len(unique_words), len(words))
+    
+    def vocabulary_result(self, metric, score, ttr, unique_count, total_count):
+        ttr = round(ttr, 3)
+        return MetricResult("Vocabulary Richness", score, metric["max_score"], {
+            "ttr": ttr,
+            "unique_words": unique_count,
+            "total_words": total_count
+        }, ("Vocabulary diversity: TTR = {} ({} unique words)", (ttr, unique_count)))
     
     def score_filler_words(self, transcript, metric, word_count):
-        """Rule-based: Score filler word rate"""
-        transcript_lower = transcript.lower()
+        """Rule-based: Score filler word rate (one pass over tokens, see filler_detector.py)"""
         filler_words = metric["filler_words"]
+        matches, counts = get_detector(filler_words).detect(transcript)
         
-        filler_count = 0
-        found_fillers = []
-        
-        for filler in filler_words:
-            # Count occurrences
-            count = transcript_lower.count(f" {filler} ") + transcript_lower.count(f" {filler},")
-            if transcript_lower.startswith(f"{filler} "):
-                count += 1
-            if count > 0:
-                filler_count += count
-                found_fillers.append(f"{filler}({count})")
+        filler_count = len(matches)
+        found_fillers = [f"{filler}({counts[filler]})" for filler in filler_words if filler in counts]
         
         filler_rate = (filler_count / word_count) * 100 if word_count > 0 else 0
         
@@ -363,44 +545,28 @@ class ScoringEngine:
                 score = range_data["score"]
                 break
         
-        return {
-            "metric": "Filler Word Rate",
-            "score": score,
-            "max_score": metric["max_score"],
+        positions = [{"filler": m["filler"], "offset": m["offset"]} for m in matches]
+        return self.filler_result(metric, score, filler_count, filler_rate, found_fillers, positions)
+    
+    def filler_result(self, metric, score, filler_count, filler_rate, found_fillers, positions):
+        filler_rate = round(filler_rate, 2)
+        return MetricResult("Filler Word Rate", score, metric["max_score"], {
             "filler_count": filler_count,
-            "filler_rate": round(filler_rate, 2),
+            "filler_rate": filler_rate,
             "found_fillers": found_fillers,
-            "feedback": f"Filler word rate: {round(filler_rate, 2)}% ({filler_count} fillers found)"
-        }
-    
-    def score_sentiment(self, transcript, metric):
-        """NLP-based: Score sentiment/positivity"""
-        # Using simple word-based sentiment (in production, use VADER)
-        positive_words = [
-            'good', 'great', 'excellent', 'wonderful', 'amazing', 'love', 'enjoy',
-            'excited', 'happy', 'blessed', 'grateful', 'fortunate', 'delighted',
-            'passionate', 'enthusiastic', 'interested', 'fascinating', 'beautiful'
-        ]
-        
-        negative_words = [
-            'bad', 'terrible', 'awful', 'hate', 'dislike', 'boring', 'sad',
-            'difficult', 'hard', 'struggle', 'problem', 'unfortunately'
-        ]
-        
-        words = transcript.lower().split()
-        positive_count = sum(1 for word in words if word in positive_words)
-        negative_count = sum(1 for word in words if word in negative_words)
-        
-        # Calculate sentiment score (0-1)
-        total_sentiment_words = positive_count + negative_count
-        if total_sentiment_words > 0:
-            sentiment_score = positive_count / total_sentiment_words
-        else:
-            sentiment_score = 0.5  # Neutral
+            "positions": positions
+        }, ("Filler word rate: {}% ({} fillers found)", (filler_rate, filler_count)))
+    
+    def score_sentiment(self, transcript, metric, word_count=None, deadline=None):
+        """NLP-based: Score sentiment/positivity with the VADER-style lexicon analyzer"""
+        if word_count is None:
+            word_count = len(transcript.split())
+        text, checked_words = self.budget_sample(transcript, word_count, "Sentiment/Positivity", "sentiment", deadline)
+        with self.costs.measure("sentiment", checked_words / 1000):
+            polarity = self.sentiment.polarity_scores(text)
         
-        # Adjust based on overall tone
-        if positive_count > 0:
-            sentiment_score = min(sentiment_score + 0.2, 1.0)
+        # Positive probability (0-1); neutral text sits at 0.5
+        sentiment_score = self.sentiment.positive_probability(polarity)
         
         score = 0
         for range_data in metric["scoring"]:
@@ -409,12 +575,13 @@ class ScoringEngine:
                 score = range_data["score"]
                 break
         
-        return {
-            "metric": "Sentiment/Positivity",
-            "score": score,
-            "max_score": metric["max_score"],
+        return self.sentiment_result(metric, score, sentiment_score, polarity["positive_words"],
+                                     polarity["negative_words"], polarity["compound"])
+    
+    def sentiment_result(self, metric, score, sentiment_score, positive_count, negative_count, compound):
+        return MetricResult("Sentiment/Positivity", score, metric["max_score"], {
             "sentiment_score": round(sentiment_score, 3),
+            "compound": round(compound, 3),
             "positive_words": positive_count,
-            "negative_words": negative_count,
-            "feedback": f"Sentiment: {round(sentiment_score * 100, 1)}% positive ({positive_count} positive words)"
-        }
+            "negative_words": negative_count
+        }, ("Sentiment: {}% positive ({} positive words)", (round(sentiment_score * 100, 1), positive_count)))
@@ -0,0 +1,279 @@
+"""
+Sentiment - Offline VADER-style lexicon sentiment with intensifiers and negation
+"""
+import re
+import math
+from filler_detector import VERB_LIKE_SUBJECTS
+
+# Valence on VADER's -4..+4 scale. Kept to vocabulary that shows up in student
+# self-introductions; unknown words are neutral.
+VALENCE_LEXICON = {
+    # positive
+    "good": 1.9, "great": 3.1, "excellent": 2.7, "wonderful": 2.7, "amazing": 2.8,
+    "awesome": 3.1, "fantastic": 2.6, "brilliant": 2.8, "best": 3.2, "better": 1.9,
+    "nice": 1.8, "fine": 0.8, "cool": 1.3, "fun": 2.3, "funny": 1.9, "glad": 2.0,
+    "love": 3.2, "loved": 2.9, "loves": 2.7, "loving": 2.9, "lovely": 2.8,
+    "like": 1.5, "likes": 1.5, "liked": 1.8, "enjoy": 2.2, "enjoys": 2.2,
+    "enjoyed": 2.3, "enjoying": 2.4, "excited": 1.4, "exciting": 2.2,
+    "happy": 2.7, "happily": 2.2, "happiness": 2.6, "blessed": 2.9, "grateful": 2.0,
+    "thankful": 2.7, "thank": 1.5, "thanks": 1.9, "fortunate": 1.9, "lucky": 1.8,
+    "delighted": 2.0, "pleasure": 2.0, "pleased": 1.9, "passionate": 2.4,
+    "enthusiastic": 1.9, "interested": 1.7, "interesting": 1.7, "fascinating": 2.5,
+    "beautiful": 2.9, "kind": 2.4, "caring": 2.2, "supportive": 1.9, "helpful": 1.8,
+    "friendly": 2.2, "proud": 2.1, "confident": 2.2, "hopeful": 1.9, "hope": 1.9,
+    "dream": 1.0, "dreams": 1.2, "inspire": 2.2, "inspired": 2.3, "inspiring": 2.0,
+    "favorite": 2.0, "favourite": 2.0, "special": 1.7, "success": 2.7,
+    "successful": 2.8, "win": 2.8, "won": 2.7, "winning": 2.4, "achieve": 1.9,
+    "achievement": 2.1, "achievements": 2.1, "strength": 1.7, "strong": 2.3,
+    "smart": 1.7, "talented": 2.3, "creative": 1.9, "curious": 1.3, "eager": 1.5,
+    "motivated": 1.9, "determined": 1.4, "cheerful": 2.5, "joy": 2.8,
+    "peaceful": 2.2, "positive": 2.6, "welcome": 2.0, "improve": 1.9, "improving": 1.8,
+    "explore": 1.3, "discovery": 1.3, "discoveries": 1.3, "honest": 2.3,
+    "respect": 2.1, "care": 2.2, "wow": 2.8, "perfect": 2.7,
+    # negative
+    "bad": -2.5, "worse": -2.1, "worst": -3.1, "terrible": -2.1, "awful": -2.0,
+    "horrible": -2.5, "hate": -2.7, "hated": -3.2, "hates": -1.9, "dislike": -1.6,
+    "boring": -1.3, "bored": -1.1, "sad": -2.1, "sadly": -1.8, "unhappy": -1.8,
+    "difficult": -1.5, "hard": -0.4, "struggle": -1.5, "struggling": -1.5,
+    "problem": -1.7, "problems": -1.7, "unfortunately": -1.6, "angry": -2.3,
+    "afraid": -2.2, "scared": -1.9, "fear": -2.2, "worried": -1.2, "worry": -1.9,
+    "nervous": -1.1, "shy": -1.0, "lonely": -1.5, "tired": -1.9, "upset": -1.6,
+    "fail": -2.5, "failed": -2.3, "failure": -2.3, "lose": -1.3, "lost": -1.3,
+    "weak": -1.9, "wrong": -2.1, "poor": -2.1, "pain": -2.3, "hurt": -2.4,
+    "cry": -2.1, "stole": -2.2, "steal": -2.2, "annoying": -1.7, "annoyed": -1.6,
+    "confused": -1.3, "mistake": -1.4, "mistakes": -1.5, "sorry": -0.3,
+}
+
+# Intensifiers scale the next sentiment word up (or down); VADER's B_INCR / B_DECR.
+# "super" is only a booster: in these transcripts it is "super excited", not "it was super".
+BOOSTER_INCREMENT = 0.293
+BOOSTERS = {
+    "very": BOOSTER_INCREMENT, "really": BOOSTER_INCREMENT, "so": BOOSTER_INCREMENT,
+    "extremely": BOOSTER_INCREMENT, "absolutely": BOOSTER_INCREMENT,
+    "completely": BOOSTER_INCREMENT, "totally": BOOSTER_INCREMENT,
+    "truly": BOOSTER_INCREMENT, "incredibly": BOOSTER_INCREMENT,
+    "highly": BOOSTER_INCREMENT, "most": BOOSTER_INCREMENT, "more": BOOSTER_INCREMENT,
+    "super": BOOSTER_INCREMENT, "deeply": BOOSTER_INCREMENT, "especially": BOOSTER_INCREMENT,
+    "quite": BOOSTER_INCREMENT,
+    "slightly": -BOOSTER_INCREMENT, "somewhat": -BOOSTER_INCREMENT,
+    "barely": -BOOSTER_INCREMENT, "hardly": -BOOSTER_INCREMENT,
+    "little": -BOOSTER_INCREMENT, "kinda": -BOOSTER_INCREMENT,
+}
+
+NEGATIONS = frozenset([
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "nowhere",
+    "cannot", "cant", "can't", "dont", "don't", "doesnt", "doesn't", "didnt", "didn't",
+    "isnt", "isn't", "arent", "aren't", "wasnt", "wasn't", "werent", "weren't",
+    "wont", "won't", "wouldnt", "wouldn't", "shouldnt", "shouldn't", "couldnt",
+    "couldn't", "havent", "haven't", "hasnt", "hasn't", "hadnt", "hadn't",
+    "aint", "ain't", "without",
+])
+
+NEGATION_SCALAR = -0.74     # VADER's N_SCALAR
+NEGATION_WINDOW = 3         # tokens looked back for negations and boosters
+BOOSTER_DECAY = (1.0, 0.95, 0.9)
+CONTRAST_WORD = "but"       # sentiment before "but" is damped, after it emphasized
+HEDGE_WORDS = frozenset(["kind", "sort"])   # "kind of"/"sort of" soften the next word like "kinda"
+NORMALIZATION_ALPHA = 15
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class SentimentAnalyzer:
+    """
+    Scores text in a single pass over its tokens. The lexicon, boosters and
+    negations are plain dicts/frozensets, so each token costs one or two hash
+    lookups; the window checks only touch the four preceding tokens and the next one.
+    """
+
+    def __init__(self, lexicon=None, boosters=None, negations=None):
+        self.lexicon = dict(VALENCE_LEXICON if lexicon is None else lexicon)
+        self.boosters = dict(BOOSTERS if boosters is None else boosters)
+        self.negations = frozenset(NEGATIONS if negations is None else negations)
+
+    def polarity_scores(self, text):
+        """
+        Returns compound (-1..1), pos/neg/neu proportions and the number of
+        positive and negative sentiment words after negation.
+        """
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        state = self.new_state()
+        self.accumulate(tokens, 0, len(tokens), state)
+        return self.finish(state)
+
+    @staticmethod
+    def new_state():
+        """Running sums for accumulate(); a text can be fed in consecutive token ranges"""
+        return {"total": 0.0, "pos_sum": 0.0, "neg_sum": 0.0, "neutral": 0,
+                "positive_words": 0, "negative_words": 0, "contrast_scale": 1.0}
+
+    def accumulate(self, tokens, begin, end, state):
+        """
+        Add tokens[begin:end] to state. Tokens before begin and the one after end
+        are only looked at as context (negations, boosters), so a long text can be
+        scored window by window with the same result as in one pass.
+        """
+        lexicon = self.lexicon
+        boosters = self.boosters
+        negations = self.negations
+        n = len(tokens)
+
+        total = state["total"]
+        pos_sum = state["pos_sum"]
+        neg_sum = state["neg_sum"]
+        neutral = state["neutral"]
+        positive_words = state["positive_words"]
+        negative_words = state["negative_words"]
+        contrast_scale = state["contrast_scale"]
+
+        for i in range(begin, end):
+            token = tokens[i]
+            if token == CONTRAST_WORD:
+                # Everything said so far counts half, everything after counts 1.5x
+                total *= 0.5
+                pos_sum *= 0.5
+                neg_sum *= 0.5
+                contrast_scale = 1.5
+                neutral += 1
+                continue
+
+            valence = lexicon.get(token)
+            if valence is None or token in boosters and i + 1 < n and tokens[i + 1] in lexicon:
+                # Unknown words, and boosters modifying the next word, carry no valence themselves
+                neutral += 1
+                continue
+            following = tokens[i + 1] if i + 1 < n else None
+            if token == "like" and following != "to" and (i == 0 or tokens[i - 1] not in VERB_LIKE_SUBJECTS):
+                # Filler or preposition ("like, um", "a sport like cricket"); the same
+                # rule FillerDetector uses to tell them from the verb ("I like cricket")
+                neutral += 1
+                continue
+            if token in HEDGE_WORDS and following == "of":
+                # "kind of nervous" is a hedge, not kindness
+                neutral += 1
+                continue
+
+            negated = False
+            for distance in range(1, NEGATION_WINDOW + 1):
+                j = i - distance
+                if j < 0:
+                    break
+                previous = tokens[j]
+                boost = boosters.get(previous)
+                if previous == "of" and j > 0 and tokens[j - 1] in HEDGE_WORDS:
+                    boost = -BOOSTER_INCREMENT
+                if boost is not None:
+                    scaled = boost * BOOSTER_DECAY[distance - 1]
+                    valence += scaled if valence > 0 else -scaled
+                if previous in negations or previous.endswith("n't"):
+                    negated = True
+            if negated:
+                valence *= NEGATION_SCALAR
+
+            valence *= contrast_scale
+            total += valence
+            if valence > 0:
+                pos_sum += valence + 1
+                positive_words += 1
+            elif valence < 0:
+                neg_sum += valence - 1
+                negative_words += 1
+            else:
+                neutral += 1
+
+        state.update(total=total, pos_sum=pos_sum, neg_sum=neg_sum, neutral=neutral,
+                     positive_words=positive_words, negative_words=negative_words,
+                     contrast_scale=contrast_scale)
+        return state
+
+    @staticmethod
+    def finish(state):
+        """polarity_scores() output from accumulated state"""
+        total = state["total"]
+        pos_sum = state["pos_sum"]
+        neg_sum = state["neg_sum"]
+        neutral = state["neutral"]
+
+        compound = total / math.sqrt(total * total + NORMALIZATION_ALPHA) if total else 0.0
+        compound = max(-1.0, min(1.0, compound))
+
+        denominator = pos_sum + abs(neg_sum) + neutral
+        if denominator:
+            pos, neg, neu = pos_sum / denominator, abs(neg_sum) / denominator, neutral / denominator
+        else:
+            pos, neg, neu = 0.0, 0.0, 1.0
+
+        return {
+            "compound": compound,
+            "pos": pos,
+            "neg": neg,
+            "neu": neu,
+            "positive_words": state["positive_words"],
+            "negative_words": state["negative_words"],
+        }
+
+    def polarity_scores_batch(self, texts):
+        """polarity_scores for a list of texts"""
+        return [self.polarity_scores(text) for text in texts]
+
+    @staticmethod
+    def positive_probability(scores):
+        """Map compound (-1..1) onto the rubric's 0-1 positivity scale; neutral text is 0.5"""
+        return (scores["compound"] + 1) / 2
+
+
+_default_analyzer = None
+
+
+def get_analyzer():
+    """Process-wide analyzer, so the lexicon is built once"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = SentimentAnalyzer()
+    return _default_analyzer
+
+
+def _legacy_sentiment(transcript):
+    """The word-list heuristic that score_sentiment used before this module (benchmark baseline)"""
+    positive_words = [
+        'good', 'great', 'excellent', 'wonderful', 'amazing', 'love', 'enjoy',
+        'excited', 'happy', 'blessed', 'grateful', 'fortunate', 'delighted',
+        'passionate', 'enthusiastic', 'interested', 'fascinating', 'beautiful'
+    ]
+    negative_words = [
+        'bad', 'terrible', 'awful', 'hate', 'dislike', 'boring', 'sad',
+        'difficult', 'hard', 'struggle', 'problem', 'unfortunately'
+    ]
+    words = transcript.lower().split()
+    positive_count = sum(1 for word in words if word in positive_words)
+    negative_count = sum(1 for word in words if word in negative_words)
+    total = positive_count + negative_count
+    score = positive_count / total if total else 0.5
+    return min(score + 0.2, 1.0) if positive_count else score
+
+
+if __name__ == "__main__":
+    import time
+
+    sample = open("Sample text for case study.txt", encoding="utf-8").read()
+    analyzer = get_analyzer()
+
+    print("Sample transcript:", analyzer.polarity_scores(sample))
+    for text in ["I am not happy here", "I am very happy here", "School is hard but I really love it"]:
+        print(f"{text!r}: {analyzer.polarity_scores(text)['compound']:.3f}")
+
+    print("\nThroughput on long transcripts:")
+    for repeat in (10, 100, 1000):
+        long_text = " ".join([sample] * repeat)
+        words = len(long_text.split())
+
+        started = time.perf_counter()
+        _legacy_sentiment(long_text)
+        legacy = time.perf_counter() - started
+
+        started = time.perf_counter()
+        analyzer.polarity_scores(long_text)
+        lexicon = time.perf_counter() - started
+
+        print(f"  {words:>8} words: legacy {legacy * 1000:8.2f} ms ({words / legacy:,.0f} words/s), "
+              f"lexicon {lexicon * 1000:8.2f} ms ({words / lexicon:,.0f} words/s)")
@@ -0,0 +1,57 @@
+"""
+Tests for priority admission, weighted fair scheduling and load shedding
+"""
+import threading
+import pytest
+from admission import AdmissionController, Rejected
+
+
+def _blocked(controller, priority="interactive"):
+    """Occupy the single worker until the returned event is set"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+    future = controller.submit(hold, priority)
+    started.wait(5)
+    return release, future
+
+
+def test_interactive_gets_its_weighted_share_under_contention():
+    controller = AdmissionController(workers=1, weights={"interactive": 3, "bulk": 1},
+                                     max_wait_seconds={"interactive": None})
+    release, first = _blocked(controller, "bulk")
+    order = []
+    futures = [controller.submit(lambda i=i: order.append(f"b{i}"), "bulk") for i in range(4)]
+    futures += [controller.submit(lambda i=i: order.append(f"i{i}"), "interactive") for i in range(6)]
+    release.set()
+    for future in [first] + futures:
+        future.result(5)
+    # 3:1 while both classes are queued, then bulk drains alone
+    assert [name[0] for name in order] == list("ibiiibiibb")
+    assert sorted(order) == sorted(f"b{i}" for i in range(4)) + sorted(f"i{i}" for i in range(6))
+    controller.close()
+
+
+def test_overload_is_shed_with_retry_after():
+    controller = AdmissionController(workers=1, queue_limits={"bulk": 1}, per_client_limit=2)
+    release, first = _blocked(controller)
+    controller.submit(lambda: None, "bulk", client_id="c1")
+    with pytest.raises(Rejected) as full:
+        controller.submit(lambda: None, "bulk")
+    assert full.value.status == 503 and full.value.retry_after >= 1
+
+    controller.submit(lambda: None, "interactive", client_id="c1")
+    with pytest.raises(Rejected) as limited:
+        controller.submit(lambda: None, "interactive", client_id="c1")
+    assert limited.value.status == 429
+
+    release.set()
+    first.result(5)
+    assert controller.run(lambda: 42, client_id="c2") == 42
+    stats = controller.stats()["classes"]
+    assert stats["bulk"]["shed"]["queue_full"] == 1
+    assert stats["interactive"]["shed"]["client_limit"] == 1
+    controller.close()
@@ -0,0 +1,44 @@
+"""
+Tests for the per-transcript analysis context and prototype matrices
+"""
+import numpy as np
+from analysis_context import AnalysisContext
+from semantic_keywords import PrototypeMatrix
+
+VOCABULARY = ["hello", "name", "thank", "cricket"]
+
+
+class CountingModel:
+    """Bag-of-words stand-in for the sentence transformer that counts encode calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, sentences):
+        self.calls += 1
+        return np.array([[float(word in s.lower()) for word in VOCABULARY] for s in sentences])
+
+
+def test_sentences_are_encoded_once():
+    model = CountingModel()
+    context = AnalysisContext("Hello all. My name is Ram. Thank you.", model)
+    first = context.embeddings
+    assert context.embeddings is first
+    assert model.calls == 1
+    assert first.shape == (3, 4) and first.dtype == np.float32
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+
+def test_empty_transcript_needs_no_encode():
+    model = CountingModel()
+    context = AnalysisContext("   ", model)
+    assert context.embeddings.shape[0] == 0
+    assert model.calls == 0
+
+
+def test_prototype_groups_take_best_row():
+    model = CountingModel()
+    prototypes = PrototypeMatrix({"opening": ["hello", "hello cricket"], "closing": ["thank"]}, model)
+    similarities = prototypes.similarities(model.encode(["Hello cricket", "Thank you"]))
+    assert prototypes.names == ["opening", "closing"]
+    assert np.allclose(similarities, [[1.0, 0.0], [0.0, 1.0]])
@@ -0,0 +1,81 @@
+"""
+Tests for the memory-mapped IVF index over introduction embeddings
+"""
+import os
+import numpy as np
+import pytest
+from ann_index import IVFIndex
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.RandomState(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def _exact_ids(vectors, query, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [str(i) for i in np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:k]]
+
+
+def test_exact_before_training_and_full_probe_after(tmp_path):
+    vectors = _vectors(200)
+    index = IVFIndex(str(tmp_path), dim=8, nlist=4, train_size=150)
+    index.add(range(100), vectors[:100])
+    assert not index.trained
+    assert [doc_id for doc_id, _ in index.search(vectors[7], 3)] == _exact_ids(vectors[:100], vectors[7], 3)
+
+    index.add(range(100, 200), vectors[100:])
+    index.join_training()
+    assert index.trained and index.sorted_count == 200
+    index.add(["late"], vectors[3] * 2)
+    found = index.search(vectors[3], 2, nprobe=4)
+    assert {doc_id for doc_id, _ in found} == {"3", "late"}
+    assert found[0][1] == 1.0
+
+
+def test_reopen_keeps_rows_and_drops_partial_writes(tmp_path):
+    vectors = _vectors(60)
+    index = IVFIndex(str(tmp_path), dim=8, nlist=4, train_size=50)
+    index.add(range(60), vectors)
+    index.join_training()
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\0" * 12)  # an interrupted append
+
+    reopened = IVFIndex(str(tmp_path))
+    reopened.add(["new"], vectors[0])
+    assert len(reopened) == 61 and reopened.trained
+    assert reopened.search(vectors[0], 2, nprobe=4)[0][1] == 1.0
+    assert [doc_id for doc_id, _ in reopened.search(vectors[5], 1, nprobe=4)] == ["5"]
+
+
+def _nearest(index, query):
+    return index.search(query, 1, nprobe=4)[0][0]
+
+
+def test_a_train_that_crashed_before_its_switch_is_discarded(tmp_path):
+    vectors = _vectors(60)
+    index = IVFIndex(str(tmp_path), dim=8, nlist=4, train_size=1000)
+    index.add(range(60), vectors)
+    for name in ("vectors.f32.tmp", "lists.i32.tmp"):
+        (tmp_path / name).write_bytes(b"\1" * 64)
+
+    reopened = IVFIndex(str(tmp_path))
+    assert not reopened.trained and not list(tmp_path.glob("*.tmp"))
+    assert [_nearest(reopened, vectors[i]) for i in range(60)] == [str(i) for i in range(60)]
+
+
+def test_a_train_that_crashed_mid_switch_is_finished_on_reopen(tmp_path, monkeypatch):
+    vectors = _vectors(60)
+    index = IVFIndex(str(tmp_path), dim=8, nlist=4, train_size=1000)
+    index.add(range(60), vectors)
+
+    def crash(meta):
+        # Vectors already reordered, ids and metadata not yet
+        os.replace(tmp_path / "vectors.f32.tmp", tmp_path / "vectors.f32")
+        raise RuntimeError("killed")
+    monkeypatch.setattr(index, "_switch_trained_files", crash)
+    with pytest.raises(RuntimeError):
+        index.train()
+
+    reopened = IVFIndex(str(tmp_path))
+    assert reopened.trained and not (tmp_path / "train.json").exists()
+    assert [_nearest(reopened, vectors[i]) for i in range(60)] == [str(i) for i in range(60)]
@@ -0,0 +1,145 @@
+"""
+Tests for the video pipeline's artifact store: manifest, atomic writes, invalidation and resume
+"""
+import os
+import sys
+import json
+import pytest
+from video_jobs import VIDEO_AGENT_DIR, PIPELINE_MODULE, load_pipeline
+
+
+@pytest.fixture(autouse=True)
+def video_agent_modules(monkeypatch):
+    # artifacts.py lives with the video pipeline
+    monkeypatch.syspath_prepend(VIDEO_AGENT_DIR)
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "talk.mp4"
+    path.write_bytes(b"\x00" * 10)
+    return str(path)
+
+
+def _store(video, tmp_path):
+    from artifacts import ArtifactStore
+    return ArtifactStore(video, root_dir=str(tmp_path / "jobs"))
+
+
+def test_manifest_survives_a_restart_and_a_replaced_video_is_a_new_job(video, tmp_path):
+    store = _store(video, tmp_path)
+    assert store.next_stage() == "extract" and store.manifest["status"] == "pending"
+    store.write_text("transcript.txt", "Hello")
+    store.complete("extract", data={"duration": 3.0})
+    store.complete("transcribe", data={"characters": 5}, files=["transcript.txt"])
+
+    reopened = _store(video, tmp_path)
+    assert reopened.job_id == store.job_id and reopened.manifest["status"] == "running"
+    assert reopened.load("extract") == {"duration": 3.0} and reopened.next_stage() == "score"
+
+    os.utime(video, (0, 0))
+    assert _store(video, tmp_path).job_id != store.job_id
+
+
+def test_writes_are_atomic(video, tmp_path, monkeypatch):
+    store = _store(video, tmp_path)
+    store.write_json("scores.json", {"overall_score": 42.0})
+    assert not [name for name in os.listdir(store.job_dir) if name.endswith(".tmp")]
+
+    def crash(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        store.write_json("scores.json", {"overall_score": 0.0})
+    assert store.read_json("scores.json") == {"overall_score": 42.0}
+
+
+def test_completing_a_stage_invalidates_later_ones(video, tmp_path):
+    store = _store(video, tmp_path)
+    for stage, filename in (("transcribe", "transcript.txt"), ("score", "scores.json"), ("report", "report.txt")):
+        store.write_text(filename, "x")
+        store.complete(stage, files=[filename])
+    assert store.manifest["status"] == "complete" and store.next_stage() is None
+
+    store.complete("transcribe", files=["transcript.txt"])
+    assert sorted(store.manifest["stages"]) == ["transcribe"] and store.next_stage() == "score"
+
+    os.remove(store.path("transcript.txt"))
+    assert not store.is_done("transcribe") and store.next_stage() == "extract"
+
+
+def test_a_torn_manifest_starts_over(video, tmp_path):
+    store = _store(video, tmp_path)
+    store.complete("extract")
+    with open(store.manifest_path, "w", encoding="utf-8") as f:
+        f.write('{"stages": {"extr')
+    assert _store(video, tmp_path).next_stage() == "extract"
+
+
+class StubVideo:
+    def __init__(self):
+        self.calls = 0
+
+    def extract_audio(self, video_path, output_audio_path):
+        self.calls += 1
+        with open(output_audio_path, "wb") as f:
+            f.write(b"audio")
+        return output_audio_path, 60.0
+
+
+class StubTranscriber:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio_path):
+        self.calls += 1
+        return "Hello everyone, my name is Ram."
+
+
+class StubScorer:
+    def __init__(self, fail):
+        self.fail = fail
+
+    def score_transcript(self, transcript, duration):
+        if self.fail:
+            raise RuntimeError("scorer crashed")
+        return {"overall_score": 61.5, "criteria_scores": []}
+
+
+class StubReporter:
+    def generate_report(self, results, transcript, output_path):
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(f"OVERALL SCORE: {results['overall_score']}")
+
+
+class StubAgents:
+    def __init__(self, fail_scoring=False):
+        self.video, self.transcriber = StubVideo(), StubTranscriber()
+        self.scorer, self.reporter = StubScorer(fail_scoring), StubReporter()
+
+
+def test_a_failed_run_resumes_from_the_last_completed_stage(video, tmp_path):
+    process_video, _ = load_pipeline()
+    jobs = str(tmp_path / "jobs")
+    store = process_video(video, StubAgents(fail_scoring=True), jobs)
+    assert store.manifest["status"] == "failed" and store.manifest["error"]["stage"] == "score"
+    assert store.next_stage() == "score" and not os.path.exists(store.path("audio.mp3"))
+
+    agents = StubAgents()
+    store = process_video(video, agents, jobs)
+    assert store.manifest["status"] == "complete" and "error" not in store.manifest
+    assert (agents.video.calls, agents.transcriber.calls) == (0, 0)
+    assert store.read_text("report.txt") == "OVERALL SCORE: 61.5"
+    with open(store.manifest_path, "r", encoding="utf-8") as f:
+        assert list(json.load(f)["stages"]) == ["extract", "transcribe", "score", "report"]
+
+    agents = StubAgents()
+    process_video(video, agents, jobs, fresh=True)
+    assert (agents.video.calls, agents.transcriber.calls) == (1, 1)
+
+
+def test_cli_reports_an_empty_directory(tmp_path, monkeypatch, capsys):
+    load_pipeline()
+    monkeypatch.setattr(sys, "argv", ["main.py", str(tmp_path)])
+    sys.modules[PIPELINE_MODULE].main()
+    assert f"No videos found in: {tmp_path}" in capsys.readouterr().out
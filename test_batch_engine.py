@@ -0,0 +1,40 @@
+"""
+Tests that corpus scoring (batch_engine.py) matches ScoringEngine.calculate_score (lite backend)
+"""
+import copy
+import pytest
+from rubric_parser import RubricParser
+from scoring_engine import ScoringEngine
+from batch_engine import BatchScoringEngine
+
+
+@pytest.fixture(scope="module")
+def sample():
+    with open("Sample text for case study.txt", "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("semantic", [False, True])
+def test_matches_calculate_score(sample, semantic):
+    engine = ScoringEngine(RubricParser().get_rubrics(), similarity_backend="lite", semantic_keywords=semantic)
+    transcripts = [sample, "", "hello everyone um like my name is ram I like cricket so thank you"]
+    durations = [52, None, 20]
+    expected = [engine.calculate_score(t, d) for t, d in zip(transcripts, durations)]
+    assert BatchScoringEngine(engine).calculate_scores(transcripts, durations) == expected
+
+
+def test_metrics_with_the_same_name_in_two_criteria_stay_apart():
+    rubrics = RubricParser().get_rubrics()
+    clarity = next(c for c in rubrics["criteria"] if c["name"] == "Clarity")
+    repeated = copy.deepcopy(clarity)
+    repeated["name"] = "Fluency"
+    repeated["metrics"][0]["filler_words"] = ["actually", "basically"]
+    rubrics["criteria"].append(repeated)
+    engine = ScoringEngine(rubrics, similarity_backend="lite")
+
+    text = "Um, hello everyone. Actually, I basically like, um, cricket. Actually, thank you."
+    result = BatchScoringEngine(engine).calculate_scores([text], [20])[0]
+    assert result == engine.calculate_score(text, 20)
+    clarity, fluency = (c["metrics"][0] for c in result["criteria_scores"] if c["criterion"] in ("Clarity", "Fluency"))
+    assert clarity["metric"] == fluency["metric"] == "Filler Word Rate"
+    assert "(3 fillers found)" in fluency["feedback"] and clarity["feedback"] != fluency["feedback"]
@@ -0,0 +1,70 @@
+"""
+Tests for NDJSON batch streaming: ordering, per-line errors and bounded read-ahead
+"""
+import json
+from concurrent.futures import Future
+from batch_stream import read_items, stream_results
+
+
+class FakeResult(dict):
+    def scores_only(self):
+        return {"overall_score": self["overall_score"]}
+
+
+def _done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _lines(transcripts):
+    return [json.dumps({"id": f"t{i}", "transcript": text}) + "\n" for i, text in enumerate(transcripts)]
+
+
+def test_one_line_per_input_in_order_with_errors_inline():
+    lines = _lines(["a b", "", "c d e"]) + ["\n", "{not json\n", "[1]\n"]
+    submit = lambda batch: _done([FakeResult(overall_score=len(item["transcript"].split())) for item in batch])
+    output = [json.loads(line) for line in stream_results(read_items(lines), submit, batch_size=2)]
+    assert [line["index"] for line in output] == [0, 1, 2, 3, 4]
+    assert output[0] == {"index": 0, "id": "t0", "result": {"overall_score": 2}}
+    assert output[1] == {"index": 1, "id": "t1", "error": "Missing transcript"}
+    assert output[2]["result"]["overall_score"] == 3
+    assert output[3]["error"].startswith("Invalid JSON") and output[4]["id"] is None
+
+
+def test_failed_batch_reports_each_item_and_stream_continues():
+    def submit(batch):
+        future = Future()
+        if batch[0]["transcript"] == "boom":
+            future.set_exception(RuntimeError("model crashed"))
+        else:
+            future.set_result([FakeResult(overall_score=1) for _ in batch])
+        return future
+    lines = _lines(["boom", "x", "y"])
+    output = [json.loads(line) for line in stream_results(read_items(lines), submit, batch_size=2,
+                                                         projection="scores")]
+    assert output[0]["error"] == output[1]["error"] == "Error scoring transcript: model crashed"
+    assert output[2] == {"index": 2, "id": "t2", "result": {"overall_score": 1}}
+
+
+def test_first_line_arrives_after_in_flight_batches_not_the_whole_input():
+    consumed = []
+
+    def lines():
+        for i in range(10000):
+            consumed.append(i)
+            yield json.dumps({"transcript": f"word {i}"})
+
+    submit = lambda batch: _done([FakeResult(overall_score=0) for _ in batch])
+    stream = stream_results(read_items(lines()), submit, batch_size=4, in_flight=2)
+    first = json.loads(next(stream))
+    assert first["index"] == 0
+    assert len(consumed) == 8
+
+
+def test_one_failing_transcript_only_fails_its_own_line():
+    def submit(batch):
+        return _done([ValueError("no sentences") if item["transcript"] == "..." else FakeResult(overall_score=1)
+                      for item in batch])
+    output = [json.loads(line) for line in stream_results(read_items(_lines(["a", "...", "b"])), submit)]
+    assert [line.get("error") for line in output] == [None, "Error scoring transcript: no sentences", None]
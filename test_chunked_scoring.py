@@ -0,0 +1,71 @@
+"""
+Tests for chunked scoring of long transcripts (lite backend, small windows)
+"""
+import io
+import pytest
+from rubric_parser import RubricParser
+from scoring_engine import ScoringEngine
+from chunked_scoring import ChunkedScorer, iter_windows, iter_decoded, MIN_SEMANTIC_WINDOW_CHARS, MAX_WORD_WINDOWS
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ScoringEngine(RubricParser().get_rubrics(), similarity_backend="lite", semantic_keywords=True)
+
+
+@pytest.fixture(scope="module")
+def plain_engine():
+    return ScoringEngine(RubricParser().get_rubrics(), similarity_backend="lite")
+
+
+@pytest.fixture(scope="module")
+def sample():
+    with open("Sample text for case study.txt", "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _pieces(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def test_windows_cover_the_transcript_and_never_split_words():
+    text = "Hello there. " + "um so I like cricket a lot and " * 200 + "Thank you."
+    windows = list(iter_windows(_pieces(text, 7), window_chars=100))
+    assert len(windows) > 20
+    assert "".join(window[start:end] for window, start, end, _ in windows) == text
+    for window, start, end, offset in windows:
+        assert start == 0 or window[start - 1].isspace()
+        assert window[start:end] == text[offset + start:offset + end]
+
+
+def test_windows_of_text_without_whitespace_stay_bounded():
+    text = "x" * 20000 + " Thank you."
+    windows = list(iter_windows(_pieces(text, 37), window_chars=100))
+    assert "".join(window[start:end] for window, start, end, _ in windows) == text
+    assert max(len(window) for window, _, _, _ in windows) <= 3 * MAX_WORD_WINDOWS * 100 + 37
+
+
+def test_matches_whole_transcript_scoring(engine, plain_engine, sample):
+    long_text = "Um, so, like. " + sample * 30 + " I mean, this is really great. Thank you."
+    for scoring_engine, window_chars, piece in ((plain_engine, 120, 13), (plain_engine, 2000, 4096),
+                                                (engine, MIN_SEMANTIC_WINDOW_CHARS, 4096)):
+        expected = scoring_engine.calculate_score(long_text, 1800)
+        result = ChunkedScorer(scoring_engine, window_chars=window_chars).score(_pieces(long_text, piece), 1800)
+        assert result == expected
+
+
+def test_semantic_keywords_need_whole_sentence_windows(engine):
+    with pytest.raises(ValueError, match="window_chars"):
+        ChunkedScorer(engine, window_chars=120)
+
+
+def test_short_transcript_and_empty_input(engine):
+    text = "Hello everyone, my name is Ram. Thank you."
+    assert ChunkedScorer(engine).score_text(text, 10) == engine.calculate_score(text, 10)
+    with pytest.raises(ValueError):
+        ChunkedScorer(engine).score_text("  \n ")
+
+
+def test_decoding_survives_characters_split_across_reads():
+    data = "namaste नमस्ते café ".encode("utf-8") * 50
+    assert "".join(iter_decoded(io.BytesIO(data), read_bytes=5)) == data.decode("utf-8")
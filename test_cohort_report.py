@@ -0,0 +1,81 @@
+"""
+Tests for mergeable cohort aggregates: running stats, KLL sketches and band counts
+"""
+import random
+import statistics
+from cohort_report import CohortAggregate, KLLSketch, RunningStats
+
+RUBRICS = {"criteria": [{"name": "Speech Rate", "weight": 10, "metrics": [{
+    "name": "Words Per Minute", "max_score": 10,
+    "scoring": [{"range": [141, 999], "level": "Fast", "score": 6}, {"range": [111, 140], "level": "Ideal", "score": 10},
+                {"range": [0, 110], "level": "Slow", "score": 6}],
+}]}]}
+
+
+def _result(score, wpm=None):
+    return {"overall_score": score * 10, "criteria_scores": [{
+        "criterion": "Speech Rate", "weighted_score": score,
+        "metrics": [{"metric": "Words Per Minute", "score": score, "wpm": wpm}],
+    }]}
+
+
+def test_merged_running_stats_match_one_pass():
+    rng = random.Random(1)
+    values = [rng.uniform(0, 100) for _ in range(10)] + [3.5, 7.25, 99.0]
+    left, right = RunningStats(), RunningStats()
+    for i, value in enumerate(values):
+        (left if i % 3 else right).add(value)
+    left.merge(right)
+    assert left.count == len(values)
+    assert abs(left.mean - statistics.mean(values)) < 1e-9
+    assert abs(left.variance - statistics.variance(values)) < 1e-9
+    assert (left.min, left.max) == (min(values), max(values))
+
+
+def test_sketch_quantiles_stay_within_rank_error_after_merge():
+    rng = random.Random(7)
+    values = [rng.random() for _ in range(50000)]
+    parts = [KLLSketch(seed=i) for i in range(4)]
+    for i, value in enumerate(values):
+        parts[i % 4].update(value)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.n == len(values)
+    assert sum(len(items) for items in merged.levels) < 3 * merged.k
+    ordered = sorted(values)
+    for q in (0.1, 0.5, 0.9):
+        rank = ordered.index(merged.quantile(q)) / len(values)
+        assert abs(rank - q) < 0.02
+    assert merged.quantile(0) == ordered[0] and merged.quantile(1) == ordered[-1]
+
+
+def test_aggregates_merge_through_json(tmp_path):
+    first, second = CohortAggregate(RUBRICS), CohortAggregate(RUBRICS)
+    first.add_many([_result(10), _result(6)])
+    second.add_many([_result(6), _result(2)])
+    second.save(str(tmp_path / "part.json"))
+    first.merge(CohortAggregate.load(str(tmp_path / "part.json")))
+
+    assert first.count == 4
+    assert first.bands["Words Per Minute"] == {10: 1, 6: 2, 2: 1}
+    assert first.criteria["Speech Rate"].mean == 6
+    report = first.format_report()
+    assert "Fast/Slow (6): 2 (50.0%)" in report
+    assert "score 2: 1 (25.0%)" in report
+
+
+def test_metric_quantiles_are_over_raw_values_and_scores_are_band_counts(tmp_path):
+    aggregate = CohortAggregate(RUBRICS)
+    for wpm in range(100, 200):
+        aggregate.add(_result(10 if 111 <= wpm <= 140 else 6, wpm=wpm))
+    aggregate.add(_result(0))  # no duration: scored, but no WPM to sketch
+    assert aggregate.bands["Words Per Minute"] == {10: 30, 6: 70, 0: 1}
+    sketch = aggregate.value_sketches["Words Per Minute"]
+    assert sketch.n == 100 and (sketch.quantile(0), sketch.quantile(1)) == (100, 199)
+    assert abs(sketch.quantile(0.5) - 150) <= 2
+    assert "Words Per Minute (wpm)" in aggregate.format_report()
+
+    data = aggregate.to_dict()
+    data["metric_sketches"] = data.pop("value_sketches")  # a file written before raw values were sketched
+    assert CohortAggregate.from_dict(data).value_sketches == {}
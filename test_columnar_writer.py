@@ -0,0 +1,48 @@
+"""
+Tests for the Parquet result writer
+"""
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from columnar_writer import ParquetResultWriter, column_name
+
+RUBRICS = {"criteria": [
+    {"name": "Speech Rate", "weight": 10, "metrics": [{"name": "Words Per Minute", "max_score": 10}]},
+    {"name": "Clarity", "weight": 15, "metrics": [{"name": "Filler Word Rate", "max_score": 15}]},
+]}
+
+
+def make_result(overall, wpm):
+    return {
+        "overall_score": overall,
+        "word_count": 100,
+        "criteria_scores": [
+            {"criterion": "Speech Rate", "weighted_score": 10.0,
+             "metrics": [{"metric": "Words Per Minute", "score": 10, "wpm": wpm}]},
+            {"criterion": "Clarity", "weighted_score": 12.0,
+             "metrics": [{"metric": "Filler Word Rate", "score": 12, "filler_rate": 4.5, "filler_count": 5}]},
+        ],
+        "metadata": {"wpm": wpm, "duration_seconds": 50},
+    }
+
+
+def test_rows_are_flushed_in_batches(tmp_path):
+    path = tmp_path / "scores.parquet"
+    with ParquetResultWriter(str(path), RUBRICS, batch_size=2) as writer:
+        for i in range(5):
+            writer.write(make_result(20.0 + i, 120.0), transcript_id=f"t{i}")
+    parquet = pq.ParquetFile(str(path))
+    assert parquet.metadata.num_rows == 5
+    assert parquet.metadata.num_row_groups == 3
+
+    rows = parquet.read().to_pylist()
+    assert rows[4]["id"] == "t4" and rows[4]["overall_score"] == 24.0
+    assert rows[0]["speech_rate_weighted"] == 10.0
+    assert rows[0]["filler_rate"] == 4.5 and rows[0]["filler_count"] == 5
+    assert "ttr" not in rows[0]
+
+
+def test_column_names():
+    assert column_name("Content & Structure") == "content_structure"
+    assert column_name("Sentiment/Positivity") == "sentiment_positivity"
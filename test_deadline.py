@@ -0,0 +1,24 @@
+"""
+Tests for latency budgets and learned step costs
+"""
+from deadline import CostModel, Deadline
+
+
+def test_cost_model_moves_towards_observed_timings():
+    costs = CostModel({"grammar": 2.0}, smoothing=0.5)
+    assert costs.estimate("grammar", 3) == 6.0
+    costs.observe("grammar", 12.0, units=3)  # 4 ms per unit
+    assert costs.estimate("grammar") == 3.0
+    costs.observe("encode", 40.0)
+    assert costs.estimate("encode") == 40.0
+    assert costs.estimate("unknown") == 0.0
+
+
+def test_deadline_allows_only_what_fits_and_records_first_reason():
+    deadline = Deadline(budget_ms=50, reserve_ms=5)
+    assert deadline.allows(10)
+    assert not deadline.allows(60)
+    deadline.degrade("Grammar Score", "sampled")
+    deadline.degrade("Grammar Score", "skipped")
+    assert deadline.summary() == [{"metric": "Grammar Score", "reason": "sampled"}]
+    assert not Deadline(budget_ms=0).allows(0.5)
@@ -0,0 +1,72 @@
+"""
+Tests for streaming Excel transcript ingestion
+"""
+import openpyxl
+from excel_bulk import iter_rows
+
+
+def test_rows_stream_with_detected_columns(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Student", "Transcript", "Duration"])
+    sheet.append(["S1", "Hello everyone", 30])
+    sheet.append([None, None, None])
+    sheet.append(["S2", None, "n/a"])
+    workbook.save(path)
+
+    rows = list(iter_rows(path))
+    assert rows[0][0] == ("Student", "Transcript", "Duration")
+    assert [(row[0], text, duration) for row, text, duration in rows[1:]] == [
+        ("S1", "Hello everyone", 30.0),
+        ("S2", "", None),
+    ]
+
+
+def test_transcript_files_are_scored_in_chunks(tmp_path):
+    from rubric_parser import RubricParser
+    from scoring_engine import ScoringEngine
+    from excel_bulk import score_workbook
+    engine = ScoringEngine(RubricParser().get_rubrics(), similarity_backend="lite")
+    text = "Hello everyone, my name is Ram. " + "I like cricket and reading books. " * 3000 + "Thank you."
+    (tmp_path / "session.txt").write_text(text, encoding="utf-8")
+    path = str(tmp_path / "in.xlsx")
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["Student", "File", "Duration"])
+    workbook.active.append(["S1", "session.txt", 3600])
+    workbook.active.append(["S2", "missing.txt", 60])
+    workbook.save(path)
+
+    assert score_workbook(path, str(tmp_path / "out.xlsx"), engine, transcript_column="File",
+                          transcript_files=True) == 1
+    rows = list(openpyxl.load_workbook(str(tmp_path / "out.xlsx")).active.values)
+    overall = rows[0].index("overall_score")
+    assert rows[1][overall] == engine.calculate_score(text, 3600)["overall_score"]
+    assert rows[2][overall] is None
+
+
+def test_a_row_that_fails_to_score_does_not_stop_the_run(tmp_path, monkeypatch):
+    from rubric_parser import RubricParser
+    from scoring_engine import ScoringEngine
+    from excel_bulk import score_workbook
+    engine = ScoringEngine(RubricParser().get_rubrics(), similarity_backend="lite")
+    original = engine.score_grammar
+
+    def fragile_grammar(transcript, *args, **kwargs):
+        if "boom" in transcript:
+            raise RuntimeError("checker crashed")
+        return original(transcript, *args, **kwargs)
+
+    monkeypatch.setattr(engine, "score_grammar", fragile_grammar)
+    path = str(tmp_path / "in.xlsx")
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["Transcript"])
+    for text in ["Hello everyone, I am Ram. Thank you.", "boom boom", "...", "?!"]:
+        workbook.active.append([text])
+    workbook.save(path)
+
+    assert score_workbook(path, str(tmp_path / "out.xlsx"), engine) == 3
+    rows = list(openpyxl.load_workbook(str(tmp_path / "out.xlsx")).active.values)
+    overall, error = rows[0].index("overall_score"), rows[0].index("scoring_error")
+    assert [row[overall] is not None for row in rows[1:]] == [True, False, True, True]
+    assert rows[2][error] == "RuntimeError: checker crashed" and rows[1][error] is None
@@ -0,0 +1,44 @@
+"""
+Tests for rubric diffs and vectorized rescoring from stored features
+"""
+import copy
+import numpy as np
+import pytest
+from feature_store import UnscorableChange, criterion_scores, round2, rubric_diff
+
+CRITERION = {"name": "Clarity", "weight": 15, "metrics": [{
+    "name": "Filler Word Rate", "max_score": 15, "filler_words": ["um", "uh"],
+    "scoring": [{"range": [0, 3], "score": 15}, {"range": [3.01, 100], "score": 5}],
+}]}
+RUBRICS = {"criteria": [CRITERION, {"name": "Speech Rate", "weight": 10, "metrics": []}]}
+
+FEATURES = {
+    "word_count": np.array([100, 50, 0]),
+    "filler_columns": np.array(["um", "uh"]),
+    "filler_counts": np.array([[1, 1], [3, 0], [0, 0]]),
+}
+
+
+def test_diff_reports_only_changed_criteria():
+    new = copy.deepcopy(RUBRICS)
+    new["criteria"][0]["weight"] = 20
+    assert rubric_diff(RUBRICS, new) == {"changed": ["Clarity"], "removed": [], "unchanged": ["Speech Rate"]}
+
+
+def test_band_change_is_rescored_from_features():
+    assert criterion_scores(CRITERION, FEATURES, 0.5).tolist() == [15.0, 5.0, 15.0]
+    stricter = copy.deepcopy(CRITERION)
+    stricter["metrics"][0]["scoring"] = [{"range": [0, 1], "score": 15}, {"range": [1.01, 100], "score": 0}]
+    assert criterion_scores(stricter, FEATURES, 0.5).tolist() == [0.0, 0.0, 15.0]
+
+
+def test_filler_list_change_needs_transcripts():
+    changed = copy.deepcopy(CRITERION)
+    changed["metrics"][0]["filler_words"] = ["um", "uh", "like"]
+    with pytest.raises(UnscorableChange):
+        criterion_scores(changed, FEATURES, 0.5)
+
+
+def test_round2_matches_python_round():
+    values = [0.285, 1.005, 2.675, 0.125, 33.335, 12.3456]
+    assert round2(values).tolist() == [round(v, 2) for v in values]
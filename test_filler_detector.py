@@ -0,0 +1,30 @@
+"""
+Tests for the token-based filler detector
+"""
+from filler_detector import FillerDetector
+
+FILLERS = ["um", "uh", "like", "you know", "so", "actually", "basically", "right",
+           "i mean", "well", "kinda", "sort of", "okay", "hmm", "ah"]
+
+
+def counts(text):
+    return FillerDetector(FILLERS).detect(text)[1]
+
+
+def test_fillers_before_any_punctuation_and_at_the_end():
+    assert counts("Um. I was there, uh; and then hmm") == {"um": 1, "uh": 1, "hmm": 1}
+
+
+def test_multi_word_fillers():
+    assert counts("You know, I mean it is sort of fine") == {"you know": 1, "i mean": 1, "sort of": 1}
+
+
+def test_like_as_a_verb_is_not_a_filler():
+    assert counts("I like cricket and I would like to play") == {}
+    assert counts("It was, like, huge") == {"like": 1}
+
+
+def test_positions_point_at_the_filler():
+    text = "Hello, um, my name is Ram"
+    matches, _ = FillerDetector(FILLERS).detect(text)
+    assert [text[m["offset"]:m["offset"] + 2] for m in matches] == ["um"]
@@ -0,0 +1,42 @@
+"""
+Tests for the offline grammar checker
+"""
+from grammar_checker import get_checker
+
+
+def rules(text):
+    return [issue["rule"] for issue in get_checker().check(text)]
+
+
+def test_detects_common_errors():
+    assert rules("He go to school.") == ["THIRD_PERSON_AGREEMENT"]
+    assert rules("They was late.") == ["PLURAL_AGREEMENT"]
+    assert rules("I saw the the cat.") == ["REPEATED_WORD"]
+    assert rules("I ate a apple.") == ["A_BEFORE_VOWEL"]
+    assert rules("It was an big day.") == ["AN_BEFORE_CONSONANT"]
+    assert rules("I did not went there.") == ["PAST_AFTER_DID"]
+    assert rules("Maths is more better.") == ["DOUBLE_COMPARATIVE"]
+    assert rules("Hello. my name is Ram.") == ["SENTENCE_CASE"]
+    assert rules("Today i am happy.") == ["LOWERCASE_I"]
+
+
+def test_clean_text_has_no_issues():
+    text = ("Good morning everyone. My name is Priya and I am 13 years old. "
+            "There are 3 people in my family. I waited an hour for a university bus. "
+            "I know that that is true. Thank you.")
+    assert rules(text) == []
+
+
+def test_base_verb_after_do_modals_and_causatives_is_not_an_agreement_error():
+    for text in ("Does he like cricket?", "Can she go home?", "Did she make it?", "What does my father do?",
+                 "Let it go.", "I watch my brother play cricket.", "Why doesn't she like it?",
+                 "My mother will help everyone study."):
+        assert rules(text) == [], text
+    assert rules("My father always go to work.") == ["THIRD_PERSON_AGREEMENT"]
+
+
+def test_offsets_point_at_the_error():
+    text = "I like it. she have a dog."
+    issue = get_checker().check(text)[-1]
+    assert text[issue["offset"]:].startswith(issue["text"])
+    assert issue["text"] == "she have"
@@ -0,0 +1,42 @@
+"""
+Tests for the hashed n-gram lite similarity backend
+"""
+import subprocess
+import sys
+import numpy as np
+from lite_similarity import HashedNgramEncoder, LABELED_FIRST_SENTENCES, LITE_GREETING_PATTERNS, LITE_SALUTATION_THRESHOLD
+from rubric_parser import RubricParser
+from semantic_keywords import PrototypeMatrix
+
+
+def test_rows_are_sparse_and_normalized():
+    vectors = HashedNgramEncoder().encode(["Hello everyone", "I study in class 8", ""])
+    assert vectors.shape[0] == 3
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    assert np.allclose(norms, [1.0, 1.0, 0.0])
+
+
+def test_greeting_scores_above_threshold_and_statement_below():
+    encoder = HashedNgramEncoder()
+    prototypes = PrototypeMatrix({"greeting": LITE_GREETING_PATTERNS}, encoder)
+    similarities = prototypes.similarities(encoder.encode(["Greetings everyone", "I study in class 8"]))[:, 0]
+    assert similarities[0] > LITE_SALUTATION_THRESHOLD > similarities[1]
+
+
+def test_labeled_sentences_all_reach_the_semantic_fallback():
+    metric = next(m for c in RubricParser().get_rubrics()["criteria"] for m in c["metrics"]
+                  if m["name"] == "Salutation Level")
+    keywords = [keyword.lower() for level in metric["scoring"] for keyword in level["keywords"]]
+    assert [s for s, _ in LABELED_FIRST_SENTENCES if any(k in s.lower() for k in keywords)] == []
+    assert len({s for s, _ in LABELED_FIRST_SENTENCES}) == len(LABELED_FIRST_SENTENCES) >= 100
+
+
+def test_lite_engine_does_not_import_torch():
+    code = (
+        "import sys; from scoring_engine import ScoringEngine; "
+        "engine = ScoringEngine({'criteria': []}, similarity_backend='lite'); "
+        "engine.calculate_score('Namaste everyone'); "
+        "print('torch' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "False"
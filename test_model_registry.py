@@ -0,0 +1,61 @@
+"""
+Tests for the shared model registry
+"""
+import threading
+from model_registry import ModelRegistry
+
+
+def test_loads_once_and_counts_references():
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    first = registry.acquire(("model", "a"), loader)
+    second = registry.acquire(("model", "a"), loader)
+    assert first.value is second.value
+    assert len(loads) == 1
+    assert registry.stats()[0]["refs"] == 2
+
+    first.release()
+    first.release()  # releasing twice must not drop the other reference
+    assert registry.stats()[0]["refs"] == 1
+
+    second.release()
+    assert registry.stats() == []
+
+
+def test_concurrent_acquire_loads_once():
+    registry = ModelRegistry()
+    loads = []
+    handles = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    threads = [threading.Thread(target=lambda: handles.append(registry.acquire(("model", "b"), loader)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert len({id(h.value) for h in handles}) == 1
+
+
+def test_failed_load_is_not_cached():
+    registry = ModelRegistry()
+
+    def broken():
+        raise RuntimeError("no model")
+
+    try:
+        registry.acquire(("model", "c"), broken)
+    except RuntimeError:
+        pass
+    assert registry.stats() == []
+    assert registry.acquire(("model", "c"), lambda: 42).value == 42
@@ -0,0 +1,101 @@
+"""
+Tests for the model server wire format, encode batcher and client recovery
+"""
+import socket
+import threading
+import numpy as np
+import pytest
+from model_server import (send_frame, recv_frame, pack_strings, unpack_strings, pack_matrix, unpack_matrix,
+                          EncodeBatcher, ModelClient, ModelServer, HEADER, MAX_FRAME,
+                          OP_ENCODE, OP_EMBEDDINGS)
+
+
+class CountingModel:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def encode(self, sentences):
+        self.calls.append(list(sentences))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return np.array([[len(s), i] for i, s in enumerate(sentences)], dtype=np.float32)
+
+
+def test_frames_strings_and_matrices_round_trip():
+    left, right = socket.socketpair()
+    strings = ["Hello", "", "नमस्ते café"]
+    send_frame(left, OP_ENCODE, pack_strings(strings))
+    opcode, body = recv_frame(right)
+    assert opcode == OP_ENCODE and unpack_strings(body) == strings
+
+    matrix = np.arange(6, dtype=np.float64).reshape(2, 3)
+    send_frame(left, OP_EMBEDDINGS, pack_matrix(matrix))
+    opcode, body = recv_frame(right)
+    decoded = unpack_matrix(body)
+    assert opcode == OP_EMBEDDINGS and decoded.dtype == np.float32 and np.array_equal(decoded, matrix)
+    left.close()
+    right.close()
+
+
+def test_oversized_or_truncated_frames_are_rejected():
+    left, right = socket.socketpair()
+    left.sendall(HEADER.pack(MAX_FRAME + 1, OP_ENCODE))
+    with pytest.raises(ValueError):
+        recv_frame(right)
+    left.sendall(HEADER.pack(10, OP_ENCODE) + b"abc")
+    left.close()
+    with pytest.raises(ConnectionError):
+        recv_frame(right)
+    right.close()
+
+
+def test_batcher_merges_concurrent_requests_and_splits_results():
+    model = CountingModel()
+    batcher = EncodeBatcher(model, max_batch=64, max_wait_ms=50)
+    requests = [["a" * (i + 1)] * (i + 1) for i in range(6)]
+    results = [None] * len(requests)
+
+    def run(i):
+        results[i] = batcher.encode(requests[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(model.calls) < len(requests)
+    for sentences, result in zip(requests, results):
+        assert result.shape == (len(sentences), 2)
+        assert (result[:, 0] == len(sentences[0])).all()
+    assert batcher.sentences == sum(len(r) for r in requests)
+
+
+def test_batcher_reports_model_errors_to_every_caller():
+    batcher = EncodeBatcher(CountingModel(fail=True), max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        batcher.encode(["hi"])
+
+
+def test_client_drops_the_connection_after_a_timeout(tmp_path):
+    path = str(tmp_path / "m.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    client = ModelClient(path, timeout=0.2)
+    with pytest.raises(socket.timeout):
+        client.encode(["never answered"])
+    # The late reply would otherwise be read as the answer to the next request
+    assert client._sock is None
+    client.close()
+    listener.close()
+
+
+def test_server_refuses_a_socket_another_server_is_listening_on(tmp_path):
+    path = str(tmp_path / "m.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    with pytest.raises(RuntimeError, match="already listening"):
+        ModelServer(path)
+    listener.close()
@@ -0,0 +1,57 @@
+"""
+Tests for MinHash/LSH near-duplicate detection and exact-match result reuse
+"""
+from near_duplicates import NearDuplicateIndex, ResultCache
+
+TEMPLATE = ("Good morning everyone, my name is {}. I am 13 years old and I study in class 8 at "
+            "Christ Public School. I live with my mother and father. My hobby is playing cricket "
+            "and reading books. Thank you for listening.")
+
+
+def test_template_copy_with_changed_name_is_flagged():
+    index = NearDuplicateIndex()
+    assert index.check("a", TEMPLATE.format("Ram")) == {"exact_match": None, "near_duplicates": []}
+    flagged = index.check("b", TEMPLATE.format("Priya"))
+    assert flagged["exact_match"] is None
+    assert [match["id"] for match in flagged["near_duplicates"]] == ["a"]
+    assert 0.8 <= flagged["near_duplicates"][0]["similarity"] < 1.0
+
+
+def test_unrelated_transcripts_and_resubmissions():
+    index = NearDuplicateIndex()
+    index.add("a", TEMPLATE.format("Ram"))
+    assert index.query("Hi, I like football and pizza. My brother plays the drums every night.") == []
+    assert index.check("c", TEMPLATE.format("Ram"))["exact_match"] == "a"
+    assert index.check("a", TEMPLATE.format("Ram"))["exact_match"] is None
+    assert len(index) == 2
+
+
+def test_result_cache_keys_on_text_and_duration():
+    cache = ResultCache(max_entries=1)
+    cache.put("hello", 30, {"overall_score": 1})
+    assert cache.get("hello", 60) is None
+    assert cache.get(" hello ", 30) == {"overall_score": 1}
+    cache.put("other", 30, {"overall_score": 2})
+    assert cache.get("hello", 30) is None
+
+
+def test_oldest_transcripts_are_evicted_beyond_max_entries():
+    index = NearDuplicateIndex(max_entries=2)
+    index.check("a", TEMPLATE.format("Ram"))
+    index.check("b", "Hi, I like football and pizza. My brother plays the drums every night.")
+    assert [m["id"] for m in index.check("c", TEMPLATE.format("Priya"))["near_duplicates"]] == ["a"]
+    # "a" was evicted when "c" arrived; "c" still matches
+    flagged = index.check("d", TEMPLATE.format("Ram"))
+    assert flagged["exact_match"] is None
+    assert [m["id"] for m in flagged["near_duplicates"]] == ["c"]
+    assert len(index) == 2
+    assert sum(len(bucket) for buckets in index._buckets for bucket in buckets.values()) == 2 * index.bands
+
+
+def test_result_cache_separates_scoring_variants():
+    cache = ResultCache()
+    cache.put("hello", 30, {"overall_score": 1})
+    assert cache.get("hello", 30, "chunked") is None
+    cache.put("hello", 30, {"overall_score": 2}, "chunked")
+    assert cache.get("hello", 30)["overall_score"] == 1
+    assert cache.get("hello", 30, "chunked")["overall_score"] == 2
@@ -0,0 +1,60 @@
+"""
+Tests for the compact result types
+"""
+import json
+import numpy as np
+import pytest
+import results
+from results import MetricResult, CriterionResult, ScoreResult, dumps
+
+
+def make_result():
+    wpm = MetricResult("Words Per Minute", 10, 10, {"wpm": 130.0, "level": "Ideal"},
+                       ("Speech rate: {} WPM ({})", (130.0, "Ideal")))
+    flow = MetricResult("Flow", 5, 5, feedback="Has proper closing")
+    criterion = CriterionResult("Speech Rate", 10, 15, 15, 10.0, [wpm, flow])
+    return ScoreResult(10.0, 120, [criterion], 130.0, 55)
+
+
+def test_feedback_is_formatted_on_first_read():
+    result = make_result()
+    metric = result.criteria_scores[0].metrics[0]
+    assert type(metric._feedback) is tuple
+    assert metric["feedback"] == "Speech rate: 130.0 WPM (Ideal)"
+    assert metric._feedback == "Speech rate: 130.0 WPM (Ideal)"
+
+
+def test_to_dict_and_json_bytes_match_the_dict_layout():
+    plain = make_result().to_dict()
+    assert list(plain) == ["overall_score", "word_count", "criteria_scores", "metadata"]
+    assert plain["criteria_scores"][0]["metrics"][0] == {
+        "metric": "Words Per Minute", "score": 10, "max_score": 10, "wpm": 130.0, "level": "Ideal",
+        "feedback": "Speech rate: 130.0 WPM (Ideal)",
+    }
+    assert json.loads(make_result().to_json_bytes()) == plain
+
+
+def test_scores_only_projection():
+    assert json.loads(make_result().to_json_bytes(projection="scores")) == {
+        "overall_score": 10.0, "word_count": 120,
+        "criteria": {"Speech Rate": 10.0},
+        "metrics": {"Words Per Minute": 10, "Flow": 5},
+    }
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_has_sorted_keys_and_no_non_finite_numbers(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(results, "orjson", None)
+    result = make_result()
+    result.criteria_scores[0].metrics[0].fields["wpm"] = float("nan")
+    result.wpm = np.float64("inf")
+    document = result.to_json_bytes()
+    assert b"NaN" not in document and b"Infinity" not in document
+    plain = json.loads(document)
+    assert list(plain) == ["criteria_scores", "metadata", "overall_score", "word_count"]
+    assert plain["metadata"] == {"duration_seconds": 55, "wpm": None}
+    assert plain["criteria_scores"][0]["metrics"][0]["wpm"] is None
+    assert dumps({"b": [np.float32(1.5), -float("inf")], "a": "é"}) == '{"a":"é","b":[1.5,null]}'.encode("utf-8")
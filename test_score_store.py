@@ -0,0 +1,46 @@
+"""
+Tests for cohort rank, top-k and histogram queries in the SQLite score store
+"""
+from score_store import ScoreStore, rubric_version
+
+
+def _result(score):
+    return {"overall_score": score, "criteria_scores": [{"criterion": "Clarity", "weighted_score": score / 10}]}
+
+
+def _store(tmp_path, scores, cohort="c1", version="v1"):
+    store = ScoreStore(str(tmp_path / "scores.db"), batch_size=3)
+    for student, score in scores.items():
+        store.record(student, cohort, version, _result(score))
+    return store
+
+
+def test_rank_and_percentile_count_ties_half(tmp_path):
+    store = _store(tmp_path, {"a": 90, "b": 70, "c": 70, "d": 50, "e": 10})
+    assert store.rank("a", "c1", "v1") == {"student_id": "a", "overall_score": 90.0, "rank": 1,
+                                           "cohort_size": 5, "percentile": 90.0}
+    assert store.rank("c", "c1", "v1")["rank"] == 2
+    assert store.rank("c", "c1", "v1")["percentile"] == 60.0
+    assert store.rank("e", "c1", "v1")["percentile"] == 10.0
+    assert store.rank("zz", "c1", "v1") is None
+
+
+def test_rescoring_replaces_and_cohorts_are_separate(tmp_path):
+    store = _store(tmp_path, {"a": 40, "b": 60})
+    store.record("a", "c1", "v1", _result(80))
+    store.record("x", "c2", "v1", _result(99))
+    store.record("b", "c1", "v2", _result(1))
+    assert store.top_k("c1", "v1", 5) == [{"student_id": "a", "overall_score": 80.0},
+                                          {"student_id": "b", "overall_score": 60.0}]
+    assert store.rank("b", "c1", "v1")["cohort_size"] == 2
+
+
+def test_histogram_last_bin_includes_high(tmp_path):
+    store = _store(tmp_path, {"a": 0, "b": 49.9, "c": 50, "d": 100, "e": 100})
+    histogram = store.histogram("c1", "v1", bins=2)
+    assert histogram == {"edges": [0.0, 50.0, 100.0], "counts": [2, 3]}
+
+
+def test_rubric_version_is_order_independent():
+    assert rubric_version({"a": 1, "b": 2}) == rubric_version({"b": 2, "a": 1})
+    assert rubric_version({"a": 1}) != rubric_version({"a": 2})
@@ -0,0 +1,45 @@
+"""
+Tests for semantic keyword concepts with the lite encoder (no model download)
+"""
+import numpy as np
+import pytest
+from rubric_parser import RubricParser
+from lite_similarity import HashedNgramEncoder
+from semantic_keywords import ConceptIndex, normalize_rows, split_sentences
+
+
+@pytest.fixture(scope="module")
+def encoder():
+    return HashedNgramEncoder()
+
+
+@pytest.fixture(scope="module")
+def index(encoder):
+    rubrics = RubricParser().get_rubrics()
+    metric = next(m for c in rubrics["criteria"] for m in c["metrics"] if m["name"] == "Keyword Presence")
+    return ConceptIndex(metric, encoder)
+
+
+def _matches(index, encoder, sentences):
+    return index.matches(normalize_rows(encoder.encode(sentences)))
+
+
+def test_paraphrases_map_to_their_concept(index, encoder):
+    sentences = ["I really want to become a pilot one day", "I live with my mom and dad"]
+    matches = _matches(index, encoder, sentences)
+    assert set(matches) == {"ambition", "family"}
+    assert matches["ambition"][1] == 0 and matches["family"][1] == 1
+    assert all(similarity >= index.threshold for similarity, _ in matches.values())
+
+
+def test_unrelated_sentences_match_no_concept(index, encoder):
+    sentences = ["The weather was rainy yesterday afternoon", "Photosynthesis converts light into chemical energy"]
+    assert _matches(index, encoder, sentences) == {}
+    best, _ = index.coverage(normalize_rows(encoder.encode(sentences)))
+    assert best.max() < index.threshold
+
+
+def test_a_transcript_without_sentences_covers_nothing(index, encoder):
+    assert split_sentences("  \n ") == []
+    best, best_sentence = index.coverage(normalize_rows(encoder.encode([])))
+    assert np.array_equal(best, np.zeros(len(index.concepts))) and (best_sentence == -1).all()
@@ -0,0 +1,42 @@
+"""
+Tests for the lexicon sentiment analyzer: negation, boosters, contrast and filler words
+"""
+from sentiment import SentimentAnalyzer
+
+
+def compound(text):
+    return SentimentAnalyzer().polarity_scores(text)["compound"]
+
+
+def test_negation_flips_and_damps_the_valence():
+    assert compound("I am happy") > 0
+    assert compound("I am not happy") < 0
+    assert abs(compound("I am not happy")) < compound("I am happy")
+    assert compound("I don't hate it") > 0
+
+
+def test_boosters_scale_the_next_word():
+    assert compound("I am very happy") > compound("I am happy") > compound("I am slightly happy") > 0
+    assert compound("super excited") > compound("excited")
+    assert compound("it was super") == 0.0
+
+
+def test_but_damps_what_came_before_it():
+    assert compound("I am tired but happy") > 0
+    assert compound("I am happy but tired") < 0
+
+
+def test_filler_like_and_kind_of_carry_no_valence():
+    assert compound("I like cricket") > 0
+    assert compound("I would like to thank you") > compound("I would to thank you")
+    assert compound("it was, like, um, huge") == 0.0
+    assert compound("a sport like cricket") == 0.0
+    assert compound("she is kind") > 0
+    assert compound("it was kind of") == 0.0
+    assert compound("I am nervous") < compound("I am kind of nervous") < 0
+
+
+def test_positive_and_negative_word_counts():
+    scores = SentimentAnalyzer().polarity_scores("Like, I love music but I hate exams")
+    assert (scores["positive_words"], scores["negative_words"]) == (1, 1)
+    assert round(scores["pos"] + scores["neg"] + scores["neu"], 9) == 1
@@ -0,0 +1,144 @@
+"""
+Tests for draft-then-refine transcription (Video_Scoring_Agent/agents.py) with stub models
+"""
+import pytest
+from rubric_parser import RubricParser
+from scoring_engine import ScoringEngine
+from video_jobs import VIDEO_AGENT_DIR, load_pipeline
+
+RUBRICS = {"criteria": [{"criterion": "Speech", "metrics": [
+    {"name": "Words Per Minute", "scoring": [{"range": [0, 80]}, {"range": [81, 140]}, {"range": [141, 300]}]},
+    {"name": "Vocabulary Richness", "scoring": [{"range": [0, 0.5]}, {"range": [0.51, 1.0]}]},
+    {"name": "Keyword Presence", "must_have": [], "good_to_have": []},
+]}]}
+
+
+class StubTranscriber:
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def transcribe(self, audio_path):
+        self.calls += 1
+        return self.text
+
+    def close(self):
+        pass
+
+
+class StubScorer:
+    rubrics = RUBRICS
+
+    def __init__(self, wpm=110.0, ttr=0.8, keyword_hits=("hello", "hi")):
+        self.wpm, self.ttr, self.keyword_hits = wpm, ttr, list(keyword_hits)
+        self.calls = 0
+
+    def score_transcript(self, transcript, duration):
+        self.calls += 1
+        return {"overall_score": 70.0, "criteria_scores": [{"metrics": [
+            {"metric": "Words Per Minute", "wpm": self.wpm},
+            {"metric": "Vocabulary Richness", "ttr": self.ttr},
+            {"metric": "Keyword Presence", "keywords_found": {
+                "Salutation": {"found": True, "keywords": self.keyword_hits}}},
+        ]}]}
+
+
+@pytest.fixture
+def agents_module(monkeypatch):
+    monkeypatch.syspath_prepend(VIDEO_AGENT_DIR)
+    import agents
+    return agents
+
+
+def _tiered(agents_module, scorer, **kwargs):
+    agent = agents_module.TieredTranscriptionAgent(scorer, "tiny", "base", **kwargs)
+    agent._transcribers = {"tiny": StubTranscriber("draft text"), "base": StubTranscriber("refined text")}
+    return agent
+
+
+def test_band_edges_are_the_interior_range_bounds(agents_module):
+    band_edges = agents_module.TieredTranscriptionAgent.band_edges
+    assert band_edges(RUBRICS["criteria"][0]["metrics"][0]) == [80, 81, 140, 141]
+    assert band_edges({"scoring": [{"range": [0, 10]}]}) == []
+    assert band_edges({}) == []
+
+
+def test_sensitive_metrics_are_those_near_an_edge_or_hit_by_one_keyword(agents_module):
+    agent = _tiered(agents_module, StubScorer(), keyword_check=True)
+    assert agent.find_sensitive_metrics(StubScorer().score_transcript("", 60)) == []
+    near_edge = StubScorer(wpm=137.0, ttr=0.52, keyword_hits=["hello"]).score_transcript("", 60)
+    assert agent.find_sensitive_metrics(near_edge) == ["Words Per Minute", "Vocabulary Richness",
+                                                       "Keyword Presence"]
+    narrow = _tiered(agents_module, StubScorer(), margins={"Words Per Minute": 1.0})
+    assert narrow.find_sensitive_metrics(near_edge) == ["Vocabulary Richness"]
+    assert all(isinstance(margin, float) for margin in narrow.margins.values())
+
+
+def test_stable_draft_keeps_its_scores_and_edge_cases_are_refined(agents_module):
+    scorer = StubScorer()
+    agent = _tiered(agents_module, scorer)
+    assert agent.transcribe("a.mp3", 60) == "draft text"
+    assert agent.last_tier == "draft" and agent.last_results["overall_score"] == 70.0
+
+    scorer.wpm = 139.0
+    assert agent.transcribe("a.mp3", 60) == "refined text"
+    assert agent.last_tier == "refined" and agent.last_results is None
+    assert agent.tier_counts == {"draft": 1, "refined": 1}
+
+
+class LiteScorer:
+    """ScoringAgent stand-in with the real rubric and the lite similarity backend"""
+
+    def __init__(self):
+        self.rubrics = RubricParser().get_rubrics()
+        self.engine = ScoringEngine(self.rubrics, similarity_backend="lite")
+
+    def score_transcript(self, transcript, duration):
+        return self.engine.calculate_score(transcript, duration)
+
+
+def test_sample_transcript_stays_in_the_draft_tier(agents_module):
+    with open("Sample text for case study.txt", "r", encoding="utf-8") as f:
+        sample = f.read()
+    scorer = LiteScorer()
+    results = scorer.score_transcript(sample, 52)
+    # Two concepts (about_family, origin) rest on one keyword; that alone no longer refines by default
+    assert _tiered(agents_module, scorer, keyword_check=True).find_sensitive_metrics(results) == [
+        "Keyword Presence", "Vocabulary Richness"]
+    # Its TTR (0.684) is 0.006 below the 0.69 band edge, inside the default 0.02 margin
+    assert _tiered(agents_module, scorer).find_sensitive_metrics(results) == ["Vocabulary Richness"]
+
+    agent = _tiered(agents_module, scorer, margins={"Vocabulary Richness": 0.005})
+    agent._transcribers["tiny"].text = sample
+    assert agent.transcribe("a.mp3", 52) == sample
+    assert agent.last_tier == "draft" and agent._transcribers["base"].calls == 0
+
+
+class StubVideo:
+    def extract_audio(self, video_path, output_audio_path):
+        with open(output_audio_path, "wb") as f:
+            f.write(b"audio")
+        return output_audio_path, 60.0
+
+
+class StubReporter:
+    def generate_report(self, results, transcript, output_path):
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(f"OVERALL SCORE: {results['overall_score']}")
+
+
+class StubAgents:
+    def __init__(self, transcriber, scorer):
+        self.video, self.transcriber, self.scorer, self.reporter = StubVideo(), transcriber, scorer, StubReporter()
+
+
+def test_pipeline_reuses_the_draft_scores(agents_module, tmp_path):
+    process_video, _ = load_pipeline()
+    video = tmp_path / "talk.mp4"
+    video.write_bytes(b"\x00" * 10)
+    scorer = StubScorer()
+    store = process_video(str(video), StubAgents(_tiered(agents_module, scorer), scorer), str(tmp_path / "jobs"))
+    assert store.manifest["status"] == "complete"
+    assert store.load("transcribe")["tier"] == "draft"
+    assert store.read_json("scores.json")["overall_score"] == 70.0
+    assert scorer.calls == 1
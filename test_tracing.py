@@ -0,0 +1,65 @@
+"""
+Tests for timing spans: nesting, per-trace filtering and Chrome trace export
+"""
+import json
+import threading
+import pytest
+from tracing import Tracer
+
+
+def test_nested_spans_are_contained_in_their_parent_and_exported(tmp_path):
+    tracer = Tracer()
+    with tracer.span("outer", category="stage", video="a.mp4"):
+        with tracer.span("inner"):
+            pass
+    inner, outer = [event for _, event in tracer.events]
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["tid"] == outer["tid"] and outer["args"] == {"video": "a.mp4"}
+
+    path = tracer.export_chrome_trace(str(tmp_path / "trace.json"))
+    with open(path, "r", encoding="utf-8") as f:
+        exported = json.load(f)
+    assert [event["name"] for event in exported["traceEvents"]] == ["inner", "outer"]
+    assert all(event["ph"] == "X" for event in exported["traceEvents"])
+    assert [row["name"] for row in tracer.summary()] and tracer.summary()[0]["count"] == 1
+
+
+def test_traces_of_concurrent_jobs_stay_apart(tmp_path):
+    tracer = Tracer()
+    barrier = threading.Barrier(2)
+
+    def job(job_id):
+        with tracer.trace(job_id):
+            barrier.wait()
+            with tracer.span(f"stage-{job_id}"):
+                barrier.wait()
+
+    threads = [threading.Thread(target=job, args=(job_id,)) for job_id in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with tracer.span("untraced"):
+        pass
+    assert [row["name"] for row in tracer.summary("a")] == ["stage-a"]
+    assert len(tracer.summary()) == 3
+
+    path = tracer.export_chrome_trace(str(tmp_path / "b.json"), "b")
+    with open(path, "r", encoding="utf-8") as f:
+        assert [event["name"] for event in json.load(f)["traceEvents"]] == ["stage-b"]
+    tracer.reset("a")
+    assert sorted(row["name"] for row in tracer.summary()) == ["stage-b", "untraced"]
+
+
+def test_disabled_tracer_records_nothing_and_errors_are_tagged():
+    tracer = Tracer(enabled=False)
+    with tracer.span("skipped"):
+        pass
+    assert len(tracer.events) == 0
+
+    tracer.enabled = True
+    with pytest.raises(KeyError):
+        with tracer.span("failing"):
+            raise KeyError("x")
+    assert tracer.events[0][1]["args"] == {"error": "KeyError"}
@@ -0,0 +1,120 @@
+"""
+Tests for the persistent video job queue (the pipeline is replaced by a runner that writes artifacts)
+"""
+import io
+import os
+import time
+import shutil
+import pytest
+from video_jobs import VideoJobQueue, UploadTooLarge, PathJobsDisabled, ArtifactsMissing, VIDEO_AGENT_DIR
+
+
+@pytest.fixture(autouse=True)
+def video_agent_modules(monkeypatch):
+    # artifacts.py lives with the video pipeline
+    monkeypatch.syspath_prepend(VIDEO_AGENT_DIR)
+
+
+class NoAgents:
+    def close(self):
+        pass
+
+
+def fake_pipeline(video_path, agents, artifacts_dir):
+    from artifacts import ArtifactStore, STAGES
+    store = ArtifactStore(video_path, root_dir=artifacts_dir)
+    store.write_text("transcript.txt", "Hello, I am Ram.")
+    store.write_json("scores.json", {"overall_score": 42.0, "criteria_scores": []})
+    store.write_text("report.txt", "OVERALL SCORE: 42.0/100")
+    files = {"transcribe": ["transcript.txt"], "score": ["scores.json"], "report": ["report.txt"]}
+    for stage in STAGES:
+        data = {"overall_score": 42.0} if stage == "score" else {"duration": 3.0}
+        store.complete(stage, data=data, files=files.get(stage))
+    return store
+
+
+def _queue(tmp_path, **kwargs):
+    return VideoJobQueue(str(tmp_path / "jobs"), runner=fake_pipeline, agents_factory=NoAgents, **kwargs)
+
+
+def _wait(queue, job_id, status="complete"):
+    for _ in range(200):
+        job = queue.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+
+def test_upload_runs_to_completion_and_results_are_readable(tmp_path):
+    from artifacts import STAGES
+    queue = _queue(tmp_path).start()
+    job = queue.submit_upload(io.BytesIO(b"\x00" * 3_000_000), "talk.MP4")
+    assert job["status"] in ("queued", "running") and job["source"] == "upload"
+    job = _wait(queue, job["id"])
+    assert job["overall_score"] == 42.0
+    assert job["stages"] == STAGES
+    _, scores, transcript, report = queue.results(job["id"])
+    assert scores["overall_score"] == 42.0 and transcript == "Hello, I am Ram."
+    shutil.rmtree(job["artifact_dir"])
+    with pytest.raises(ArtifactsMissing):
+        queue.results(job["id"])
+    queue.close()
+    # The upload is removed once the transcript and scores exist
+    assert not os.path.exists(job["video_path"])
+
+
+def test_rejected_uploads_leave_nothing_behind(tmp_path):
+    queue = _queue(tmp_path, max_upload_bytes=1000)
+    with pytest.raises(UploadTooLarge):
+        queue.submit_upload(io.BytesIO(b"\x00" * 5000), "talk.mp4")
+    with pytest.raises(ValueError):
+        queue.submit_upload(io.BytesIO(b"data"), "notes.txt")
+    with pytest.raises(ValueError):
+        queue.submit_path(str(tmp_path / "missing.mp4"))
+    assert os.listdir(queue.upload_dir) == []
+    assert queue.counts()["jobs"] == {}
+
+
+def test_interrupted_jobs_are_requeued_after_restart(tmp_path):
+    video = tmp_path / "talk.mp4"
+    video.write_bytes(b"\x00" * 100)
+    queue = _queue(tmp_path, max_attempts=2, video_root=str(tmp_path))
+    job_id = queue.submit_path(str(video))["id"]
+    # Claim it as a worker would, then "crash" before it finishes
+    with queue._cond:
+        queue._claim()
+    assert queue.get(job_id)["status"] == "running"
+    queue.close()
+
+    queue = _queue(tmp_path, max_attempts=2, video_root=str(tmp_path))
+    assert queue.get(job_id)["status"] == "queued"
+    with queue._cond:
+        queue._claim()
+    queue.close()
+
+    # Second interruption reaches max_attempts
+    queue = _queue(tmp_path, max_attempts=2, video_root=str(tmp_path))
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and "Interrupted 2 times" in job["error"]
+    queue.close()
+
+
+def test_path_jobs_keep_the_source_video(tmp_path):
+    video = tmp_path / "talk.mp4"
+    video.write_bytes(b"\x00" * 100)
+    queue = _queue(tmp_path, video_root=str(tmp_path)).start()
+    job = _wait(queue, queue.submit_path(str(video))["id"])
+    assert job["status"] == "complete" and video.exists()
+    with pytest.raises(ValueError):
+        queue.submit_path("/etc/hosts.mp4")
+    queue.close()
+
+
+def test_path_jobs_need_a_video_root(tmp_path):
+    video = tmp_path / "talk.mp4"
+    video.write_bytes(b"\x00" * 100)
+    queue = _queue(tmp_path)
+    with pytest.raises(PathJobsDisabled):
+        queue.submit_path(str(video))
+    queue.close()
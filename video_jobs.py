@@ -0,0 +1,319 @@
+"""
+Video Jobs - Persistent queue and worker pool for scoring videos behind the API
+
+POST /api/jobs stores a job row in SQLite (WAL) and returns at once; a small
+pool of worker threads claims queued jobs and runs the Video_Scoring_Agent
+pipeline (extract audio, Whisper transcription, MiniLM scoring, report) on
+them. Each worker owns its agents, so the Whisper and sentence-transformer
+models are loaded on its first job and kept until shutdown (shared with the
+rest of the process through the model registry).
+
+Uploaded videos are copied to disk in 1 MB chunks as they arrive, under a
+.part name that is renamed only once the upload is complete, so a job never
+points at a truncated file. Job state lives in jobs.db and each job's stage
+outputs in the pipeline's artifact directories: after a restart, jobs that
+were running are queued again and resume from their last completed stage.
+A job interrupted `max_attempts` times is marked failed instead of retried.
+Recovery assumes one API process per root_dir.
+
+Layout under root_dir:
+
+    jobs.db            job rows (status, source, timings, error, artifact dir)
+    uploads/<id>.<ext> uploaded videos (deleted once their job completes)
+    artifacts/         per-video stage outputs (see Video_Scoring_Agent/artifacts.py)
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import importlib.util
+
+VIDEO_AGENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Video_Scoring_Agent")
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+CHUNK_BYTES = 1 << 20
+# The pipeline's entry module, imported under a name no other module uses
+PIPELINE_MODULE = "video_scoring_agent_main"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    video_path TEXT NOT NULL,
+    filename TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    artifact_dir TEXT,
+    overall_score REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+COLUMNS = ("id", "status", "source", "video_path", "filename", "created_at", "started_at",
+           "finished_at", "attempts", "artifact_dir", "overall_score", "error")
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class PathJobsDisabled(ValueError):
+    pass
+
+
+class ArtifactsMissing(LookupError):
+    pass
+
+
+_pipeline_lock = threading.Lock()
+
+
+def load_pipeline():
+    """(process_video, LazyAgents) from the Video_Scoring_Agent CLI; imported on first use"""
+    with _pipeline_lock:
+        module = sys.modules.get(PIPELINE_MODULE)
+        if module is None:
+            if VIDEO_AGENT_DIR not in sys.path:
+                # For main.py's own imports (agents, artifacts); appended, so the API's
+                # copies of the shared engine modules keep precedence
+                sys.path.append(VIDEO_AGENT_DIR)
+            # Loaded by file path: a plain "import main" could resolve to another main module
+            spec = importlib.util.spec_from_file_location(PIPELINE_MODULE, os.path.join(VIDEO_AGENT_DIR, "main.py"))
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[PIPELINE_MODULE] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                del sys.modules[PIPELINE_MODULE]
+                raise
+    return module.process_video, module.LazyAgents
+
+
+class VideoJobQueue:
+    """
+    Thread-safe job table plus `workers` threads running the video pipeline.
+    `runner(video_path, agents, artifacts_dir)` returns the job's ArtifactStore
+    and `agents_factory()` builds one worker's agents; both default to the
+    Video_Scoring_Agent pipeline.
+    """
+
+    def __init__(self, root_dir="video_jobs", workers=1, max_upload_bytes=2 << 30, max_attempts=3,
+                 video_root=None, runner=None, agents_factory=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.upload_dir = os.path.join(self.root_dir, "uploads")
+        self.artifacts_dir = os.path.join(self.root_dir, "artifacts")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+        self.workers = workers
+        self.max_upload_bytes = max_upload_bytes
+        self.max_attempts = max_attempts
+        self.video_root = os.path.realpath(video_root) if video_root else None
+        self._runner = runner
+        self._agents_factory = agents_factory
+        self._cond = threading.Condition()
+        self._closed = False
+        self._db = sqlite3.connect(os.path.join(self.root_dir, "jobs.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._recover()
+        self._threads = []
+
+    def _recover(self):
+        """Requeue jobs a previous process was running, failing those interrupted too often"""
+        with self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, "
+                "error = 'Interrupted ' || attempts || ' times; not retried' "
+                "WHERE status = 'running' AND attempts >= ?", (time.time(), self.max_attempts))
+            requeued = self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+        for name in os.listdir(self.upload_dir):
+            if name.endswith(".part"):
+                os.remove(os.path.join(self.upload_dir, name))
+        if requeued:
+            print(f"[VideoJobs] Requeued {requeued} interrupted job(s)")
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"video-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit_upload(self, stream, filename):
+        """Copy a file-like upload to disk chunk by chunk and queue it; returns the job"""
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension not in VIDEO_EXTENSIONS:
+            raise ValueError(f"Unsupported video type {extension or '(none)'}; expected one of {VIDEO_EXTENSIONS}")
+        job_id = uuid.uuid4().hex
+        video_path = os.path.join(self.upload_dir, job_id + extension)
+        part_path = video_path + ".part"
+        written = 0
+        try:
+            with open(part_path, "wb") as f:
+                while True:
+                    chunk = stream.read(CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > self.max_upload_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {self.max_upload_bytes} bytes")
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.remove(part_path)
+            raise
+        if not written:
+            os.remove(part_path)
+            raise ValueError("Uploaded video is empty")
+        os.replace(part_path, video_path)
+        return self._insert(job_id, "upload", video_path, os.path.basename(filename))
+
+    def submit_path(self, path):
+        """Queue a video already on this host; only files inside video_root, and only when one is set"""
+        if self.video_root is None:
+            raise PathJobsDisabled("Path jobs are disabled; set a video root (SCORING_VIDEO_ROOT) to allow them")
+        video_path = os.path.realpath(path)
+        if os.path.commonpath([self.video_root, video_path]) != self.video_root:
+            raise ValueError(f"Video paths must be inside {self.video_root}")
+        if not video_path.lower().endswith(VIDEO_EXTENSIONS):
+            raise ValueError(f"Unsupported video type; expected one of {VIDEO_EXTENSIONS}")
+        if not os.path.isfile(video_path):
+            raise ValueError(f"Video file not found: {path}")
+        return self._insert(uuid.uuid4().hex, "path", video_path, os.path.basename(video_path))
+
+    def _insert(self, job_id, source, video_path, filename):
+        with self._cond:
+            with self._db:
+                self._db.execute("INSERT INTO jobs (id, status, source, video_path, filename, created_at) "
+                                 "VALUES (?, 'queued', ?, ?, ?, ?)",
+                                 (job_id, source, video_path, filename, time.time()))
+            self._cond.notify()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Job record as a dict (queued jobs include their queue position), or None"""
+        with self._cond:
+            row = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(zip(COLUMNS, row))
+            if job["status"] == "queued":
+                job["queue_position"] = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?",
+                    (job["created_at"],)).fetchone()[0]
+        job["stages"] = self._stages(job["artifact_dir"])
+        return job
+
+    def _stages(self, artifact_dir):
+        """Completed pipeline stages from the job's artifact manifest"""
+        if not artifact_dir:
+            return []
+        try:
+            with open(os.path.join(artifact_dir, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [name for name, entry in manifest.get("stages", {}).items() if entry.get("status") == "done"]
+
+    def results(self, job_id):
+        """
+        (job, scores, transcript, report) for a complete job; the last three are None
+        otherwise. Raises ArtifactsMissing when a complete job's outputs are gone.
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] != "complete":
+            return job, None, None, None
+        contents = []
+        try:
+            for name in ("scores.json", "transcript.txt", "report.txt"):
+                with open(os.path.join(job["artifact_dir"], name), "r", encoding="utf-8") as f:
+                    contents.append(f.read())
+            scores = json.loads(contents[0])
+        except (OSError, ValueError) as e:
+            raise ArtifactsMissing(f"Results of job {job_id} are no longer available: {e}")
+        return job, scores, contents[1], contents[2]
+
+    def counts(self):
+        with self._cond:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"workers": self.workers, "jobs": dict(rows)}
+
+    def _claim(self):
+        """Mark the oldest queued job running and return it (caller holds the lock)"""
+        row = self._db.execute("SELECT id, source, video_path FROM jobs WHERE status = 'queued' "
+                               "ORDER BY created_at LIMIT 1").fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                             "WHERE id = ?", (time.time(), row[0]))
+        return row
+
+    def _finish(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._cond:
+            with self._db:
+                self._db.execute(f"UPDATE jobs SET {assignments}, finished_at = ? WHERE id = ?",
+                                 (*fields.values(), time.time(), job_id))
+
+    def _work(self):
+        agents = None
+        try:
+            while True:
+                with self._cond:
+                    job = None if self._closed else self._claim()
+                    while job is None:
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                        job = None if self._closed else self._claim()
+                job_id, source, video_path = job
+                try:
+                    runner, agents_factory = self._runner, self._agents_factory
+                    if runner is None or agents_factory is None:
+                        process_video, LazyAgents = load_pipeline()
+                        runner, agents_factory = runner or process_video, agents_factory or LazyAgents
+                    if agents is None:
+                        agents = agents_factory()
+                    store = runner(video_path, agents, self.artifacts_dir)
+                    completed = self._record(job_id, store)
+                except Exception as e:
+                    print(f"[VideoJobs] {job_id} failed: {e}")
+                    self._finish(job_id, status="failed", error=str(e))
+                    continue
+                if completed and source == "upload":
+                    # The transcript and scores supersede the uploaded video
+                    os.remove(video_path)
+        finally:
+            if agents is not None:
+                agents.close()
+
+    def _record(self, job_id, store):
+        """Copy the pipeline's outcome from its manifest into the job row"""
+        manifest = store.manifest
+        if manifest["status"] != "complete":
+            error = manifest.get("error") or {}
+            self._finish(job_id, status="failed", artifact_dir=store.job_dir,
+                         error=f"stage '{error.get('stage')}' failed: {error.get('message')}")
+            return False
+        self._finish(job_id, status="complete", artifact_dir=store.job_dir,
+                     overall_score=manifest["stages"]["score"]["data"].get("overall_score"), error=None)
+        return True
+
+    def close(self, timeout=5.0):
+        """Stop claiming jobs; a job still running after `timeout` resumes on the next start"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0.0))
+        if not any(thread.is_alive() for thread in self._threads):
+            self._db.close()